@@ -1,13 +1,27 @@
 import os
+import sys
 from sharedtoolbox import configs
-from sharedtoolbox.core import eventHandler, stdHandler
+from sharedtoolbox.core import eventHandler, stdHandler, sessionLog, outputSinks, scriptMirror
 
 event_handler = eventHandler.EventHandler()
-std_out_handler = stdHandler.StdOutHandler(event_handler) 
-std_err_handler = stdHandler.StdErrHandler(event_handler) 
+if os.environ.get(configs.TRACE_EVENTS_ENV_VAR):
+    event_handler.start_trace()
+output_capture = stdHandler.OutputCapture(event_handler)
 
+# Sinks are attached before stdout and stderr are overridden, so startup errors still reach the original streams
 configs.Prefs()
 
+session_log = sessionLog.SessionLogWriter(configs.CONSOLE_LOGS_PATH,
+                                          segment_bytes=configs.Prefs.console_log_segment_bytes,
+                                          max_sessions=configs.Prefs.console_log_max_sessions)
+for sink in outputSinks.create_sinks(configs.Prefs.output_sinks, output_capture, sys.stdout, sys.stderr, session_log):
+    output_capture.add_sink(sink)
+output_capture.configure_spill(configs.TEMP_SCRIPT_PATH, configs.Prefs.console_spill_bytes)
+std_out_handler = stdHandler.StdOutHandler(event_handler, output_capture)
+std_err_handler = stdHandler.StdErrHandler(event_handler, output_capture)
+script_mirror = scriptMirror.ScriptMirror(configs.SCRIPT_MIRROR_PATH, configs.Prefs.get_mirrored_script_path,
+                                          event_handler)
+
 # Temporary config
 # os.environ['SHAREDTOOLBOX_PROJECT_ROOT'] = r'C:\Users\Michael\AppData\Roaming\sharedtoolbox\projects'
 
@@ -19,12 +19,17 @@ LOCAL_SCRIPT_ENV_VAR = 'SHAREDTOOLBOX_LOCAL_PATH'
 SHARED_SCRIPT_ENV_VAR = 'SHAREDTOOLBOX_SHARED_PATH'
 PROJECT_ROOT_ENV_VAR = 'SHAREDTOOLBOX_PROJECT_ROOT'
 PROJECT_SCRIPT_LOCATION_ENV_VAR = 'SHAREDTOOLBOX_PROJECT_SCRIPT_LOCATION'
+TRACE_EVENTS_ENV_VAR = 'SHAREDTOOLBOX_TRACE_EVENTS'  # Set to 1 to record event emits, exported on exit
 
 LOCAL_SCRIPT_PATH = os.path.join(LOCAL_CONFIGS_PATH, 'scripts')
 SHARED_SCRIPT_PATH = os.path.join(SHARED_CONFIGS_PATH, 'scripts')
 PROJECT_ROOT_PATH = ''
 PROJECT_SCRIPT_LOCATION = '.sharedtoolbox' + os.sep + 'scripts'
 TEMP_SCRIPT_PATH = os.path.join(LOCAL_CONFIGS_PATH, 'temp')
+CONSOLE_LOGS_PATH = os.path.join(LOCAL_CONFIGS_PATH, 'logs')
+EVENT_TRACES_PATH = os.path.join(LOCAL_CONFIGS_PATH, 'traces')
+SCAN_INDEX_PATH = os.path.join(LOCAL_CONFIGS_PATH, 'index')
+SCRIPT_MIRROR_PATH = os.path.join(LOCAL_CONFIGS_PATH, 'mirror')
             
 
 class Prefs:
@@ -42,12 +47,25 @@ class Prefs:
     editor_theme = None
     editor_font = None
     console_toggled = None
+    console_max_lines = None
+    console_max_bytes = None
+    console_log_segment_bytes = None
+    console_log_max_sessions = None
+    console_spill_bytes = None
+    output_sinks = None
+    nav_poll_interval = None
+    scan_concurrency = None
+    scan_share_concurrency = None
+    mirror_shared_scripts = None
+    mirror_sync_interval = None
 
     # Profile
     local_script_path = None
     shared_script_path = None
     project_root_path = None
     project_script_location = None
+    scan_max_depth = None
+    scan_max_entries = None
     env_vars = None
     
     def __init__(self):
@@ -65,6 +83,17 @@ class Prefs:
         Prefs.editor_theme = data.get('editor_theme', 'native')
         Prefs.editor_font = data.get('editor_font', 'Consolas')
         Prefs.console_toggled = data.get('console_toggled', True)
+        Prefs.console_max_lines = data.get('console_max_lines', 100000)
+        Prefs.console_max_bytes = data.get('console_max_bytes', 32 * 1024 * 1024)
+        Prefs.console_log_segment_bytes = data.get('console_log_segment_bytes', 8 * 1024 * 1024)
+        Prefs.console_log_max_sessions = data.get('console_log_max_sessions', 30)
+        Prefs.console_spill_bytes = data.get('console_spill_bytes', 20 * 1024 * 1024)
+        Prefs.output_sinks = data.get('output_sinks', {})  # Sink name: settings, see core.outputSinks
+        Prefs.nav_poll_interval = data.get('nav_poll_interval', 10)  # s, between scans of network script roots
+        Prefs.scan_concurrency = data.get('scan_concurrency', 8)  # Concurrent directory reads per share, when scanning
+        Prefs.scan_share_concurrency = data.get('scan_share_concurrency', {})  # Share or drive: scan_concurrency override
+        Prefs.mirror_shared_scripts = data.get('mirror_shared_scripts', True)  # Serve the shared scripts from a local copy
+        Prefs.mirror_sync_interval = data.get('mirror_sync_interval', 60)  # s, between revalidations of the local copy
         
         self.load_profile(self.current_profile)
 
@@ -88,6 +117,8 @@ class Prefs:
         cls.shared_script_path = profile_data.get('shared_script_path')
         cls.project_root_path = profile_data.get('project_root_path')
         cls.project_script_location = profile_data.get('project_script_location')
+        cls.scan_max_depth = profile_data.get('scan_max_depth', 0)  # Directory levels scanned per root, 0: unlimited
+        cls.scan_max_entries = profile_data.get('scan_max_entries', 0)  # Entries scanned per root, 0: unlimited
         cls.env_vars = profile_data.get('env')
 
     @classmethod
@@ -178,11 +209,12 @@ class Prefs:
         cls._save_prefs_profile_data(profile_data)
 
     @classmethod
-    def get_pinned_files(cls, valid_only=False):
+    def get_pinned_files(cls, valid_only=False, exists=os.path.isfile):
         """Gets all pinned files from the current profile
 
         Args:
             valid_only (bool): Only return files that exist in the current environment and are found on disk. Defaults to False
+            exists: Function returning True if a file is found. Defaults to os.path.isfile
         
         Returns:
             list: List of pinned files
@@ -196,7 +228,7 @@ class Prefs:
                 or _file.startswith(os.path.normpath(cls.get_shared_script_path()))\
                 or _file.startswith(os.path.normpath(os.path.join(cls.get_project_root_path(), cls.get_project_script_location())))\
                 or _file.startswith(TEMP_SCRIPT_PATH):
-                    if os.path.isfile(_file):
+                    if exists(_file):
                         pinned_files.append(file)
         else:
             pinned_files = profile_data.get('pinned_files', [])
@@ -228,6 +260,11 @@ class Prefs:
         """Returns the configured shared script path"""
         return cls.shared_script_path or os.environ.get(SHARED_SCRIPT_ENV_VAR, SHARED_SCRIPT_PATH)
     
+    @classmethod
+    def get_mirrored_script_path(cls):
+        """Returns the script path served from a local mirror, None if mirroring is disabled"""
+        return cls.get_shared_script_path() if cls.mirror_shared_scripts else None
+
     @classmethod
     def get_project_root_path(cls):
         """Returns the configured project path"""
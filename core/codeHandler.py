@@ -7,7 +7,8 @@ import traceback
 # Third-Party Imports
 
 # Local Imports
-from sharedtoolbox import configs, event_handler
+from sharedtoolbox import configs, event_handler, output_capture
+from sharedtoolbox.core import stdHandler
 
 # ______________________________________________________________________________________________________________________
 
@@ -17,7 +18,19 @@ class CodeHandler:
     """
 
     @staticmethod
-    def run_code(code):
+    def run_code(code, label=None):
+        """Runs a piece of code
+        All output written while running, from this thread, is attributed to a new run
+
+        Args:
+            code (str): Code to run
+            label (str): Run label, optional
+        """
+        with output_capture.run(label):
+            CodeHandler._run_code(code)
+
+    @staticmethod
+    def _run_code(code):
         """Runs a piece of code"""
         # Gather some data
         loc = len(code.split('\n'))
@@ -34,7 +47,7 @@ class CodeHandler:
             exec(code, {})
 
         except:
-            with ColoredConsole('red'):
+            with ColoredConsole('red', stream='stderr'):
                 stack = CodeHandler._format_stack_trace(code=code, stack=traceback.format_exc())
                 print(stack)
         finally:
@@ -113,16 +126,24 @@ class CodeHandler:
 
 
 class ColoredConsole():
-    """Colors the console, and adds a heading and trailing <br>"""
-    def __init__(self, color):
+    """Colors the console, and adds a heading and trailing line break"""
+    def __init__(self, color, stream='system'):
+        """Constructor
+
+        Args:
+            color (str): Text color
+            stream (str): Stream the output is tagged with. Defaults to 'system'
+        """
         self.color = color
+        self._color_context = stdHandler.ColorContext(color, stream=stream)
 
     def __enter__(self, *args):
-        #event_handler.console_write_html.emit('<span style="color: {};"><br>'.format(self.color))
-        event_handler.console_write_html.emit('<span style="color: {};"><br>'.format(self.color))
+        self._color_context.__enter__()
+        output_capture.write('\n')
 
     def __exit__(self, *args):
-        event_handler.console_write_html.emit('<br></span>')
+        output_capture.write('\n')
+        self._color_context.__exit__(*args)
 
 
 # ______________________________________________________________________________________________________________________
@@ -0,0 +1,379 @@
+# System Imports
+import os
+import re
+import sys
+import gzip
+import json
+import queue
+import base64
+import threading
+from array import array
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+# Third-Party Imports
+from qtpy.QtCore import QObject, Signal
+
+# Local Imports
+
+# ______________________________________________________________________________________________________________________
+
+
+def trigrams(text):
+    """Returns the lowercase trigrams of a text"""
+    text = text.lower()
+    return set(map(''.join, zip(text, text[1:], text[2:])))
+
+
+def required_literals(pattern, flags=0):
+    """Returns the literal runs every match of a regular expression holds
+
+    Args:
+        pattern (str): Regular expression
+        flags (int): re flags
+
+    Returns:
+        list: Literal strings. Empty if nothing is required, ie: top-level alternations
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except Exception:
+        return []
+    runs = []
+    current = []
+    for op, av in parsed:
+        if op == sre_parse.LITERAL:
+            current.append(chr(av))
+            continue
+        if op == sre_parse.BRANCH:
+            return []
+        if current:
+            runs.append(''.join(current))
+            current = []
+    if current:
+        runs.append(''.join(current))
+    return runs
+
+
+class ContentIndex(object):
+    """
+    Trigram index of the content of script files.
+
+    Every lowercase trigram maps to the files holding it. A search only reads the files holding every trigram of
+    the searched text (or of the literals a regular expression requires), instead of every file.
+    Files are re-indexed when their mtime or size changed. Thread safe.
+    """
+
+    VERSION = 1
+    MAX_FILE_SIZE = 2 * 1024 * 1024  # bytes, larger files are not indexed
+
+    def __init__(self, file_path=None):
+        """Constructor
+
+        Args:
+            file_path (str): Index file, optional
+        """
+        self.file_path = file_path
+        self._lock = threading.RLock()
+        self._files = {}  # Path: [file id, mtime, size]
+        self._paths = {}  # File id: path
+        self._trigrams = {}  # Trigram: set of file ids
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._files)
+
+    def load(self):
+        """Loads the index file
+
+        Returns:
+            bool: True if an index was loaded
+        """
+        try:
+            with gzip.open(self.file_path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError, EOFError):
+            return False
+        if data.get('version') != self.VERSION:
+            return False
+        with self._lock:
+            self._files = data.get('files', {})
+            self._paths = {entry[0]: path for path, entry in self._files.items()}
+            self._trigrams = {trigram: set(array('I', base64.b64decode(ids)))
+                              for trigram, ids in data.get('trigrams', {}).items()}
+            self._next_id = max(self._paths, default=-1) + 1
+        return True
+
+    def save(self):
+        """Writes the index file. The previous file is only replaced once the new one is complete.
+        File ids are written as packed arrays, far smaller and faster to write than json lists"""
+        with self._lock:
+            data = {'version': self.VERSION, 'files': dict(self._files),
+                    'trigrams': {trigram: base64.b64encode(array('I', sorted(ids)).tobytes()).decode('ascii')
+                                 for trigram, ids in self._trigrams.items()}}
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        tmp_path = self.file_path + '.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.file_path)
+
+    def update_file(self, path):
+        """Indexes a file again if it changed since it was indexed. Missing files are removed
+
+        Args:
+            path (str): File path
+
+        Returns:
+            bool: True if the index changed
+        """
+        return self.update([path], remove_missing=False) > 0
+
+    def remove_file(self, path):
+        """Removes a file from the index
+
+        Returns:
+            bool: True if the file was indexed
+        """
+        with self._lock:
+            return self._remove([path]) > 0
+
+    def update(self, paths, remove_missing=True, cancelled=None):
+        """Indexes the given files, only the ones changed since they were indexed
+
+        Args:
+            paths (list): File paths
+            remove_missing (bool): Remove the indexed files not given. Defaults to True
+            cancelled: Function returning True to stop, optional
+
+        Returns:
+            int: Number of files indexed or removed
+        """
+        paths = [os.path.normpath(path) for path in paths]
+        removed = set(self._files).difference(paths) if remove_missing else set()
+        changed = []
+        for path in paths:
+            if cancelled is not None and cancelled():
+                break
+            try:
+                stat = os.stat(path)
+            except OSError:
+                removed.add(path)
+                continue
+            entry = self._files.get(path)
+            if entry is None or entry[1] != stat.st_mtime or entry[2] != stat.st_size:
+                changed.append((path, stat))
+
+        # Removed and changed files are dropped in a single pass over the trigrams
+        with self._lock:
+            count = self._remove(removed.union(path for path, stat in changed))
+        for path, stat in changed:
+            if cancelled is not None and cancelled():
+                break
+            self._add(path, stat)
+        return max(count, len(changed))
+
+    def _add(self, path, stat):
+        """Indexes a file"""
+        text = ''
+        if stat.st_size <= self.MAX_FILE_SIZE:
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    text = f.read()
+            except OSError:
+                return
+        file_trigrams = trigrams(text)
+        with self._lock:
+            file_id = self._next_id
+            self._next_id += 1
+            self._files[path] = [file_id, stat.st_mtime, stat.st_size]
+            self._paths[file_id] = path
+            for trigram in file_trigrams:
+                ids = self._trigrams.get(trigram)
+                if ids is None:
+                    self._trigrams[trigram] = {file_id}
+                else:
+                    ids.add(file_id)
+
+    def _remove(self, paths):
+        """Removes files from the index, the lock must be held
+
+        Returns:
+            int: Number of files removed
+        """
+        file_ids = set()
+        for path in paths:
+            entry = self._files.pop(path, None)
+            if entry is not None:
+                file_ids.add(entry[0])
+                del self._paths[entry[0]]
+        if file_ids:
+            for trigram, ids in list(self._trigrams.items()):
+                if not file_ids.isdisjoint(ids):
+                    ids -= file_ids
+                    if not ids:
+                        del self._trigrams[trigram]
+        return len(file_ids)
+
+    def candidates(self, text, regex=False):
+        """Returns the files that may hold the searched text
+
+        Args:
+            text (str): Text or regular expression searched
+            regex (bool): Is text a regular expression? Defaults to False
+
+        Returns:
+            list: File paths
+        """
+        literals = required_literals(text, re.IGNORECASE) if regex else [text]
+        required = set()
+        for literal in literals:
+            required.update(trigrams(literal))
+        with self._lock:
+            if not required:
+                return sorted(self._files)
+            ids = None
+            for trigram in sorted(required, key=lambda x: len(self._trigrams.get(x, ()))):
+                ids = set(self._trigrams.get(trigram, ())) if ids is None else ids & self._trigrams.get(trigram, set())
+                if not ids:
+                    return []
+            return sorted(self._paths[file_id] for file_id in ids)
+
+    def search(self, text, regex=False, case_sensitive=False, max_lines=5000, cancelled=None):
+        """Searches the content of the indexed files, line by line: ^ and $ anchor to each line, and no match spans
+        a line break
+
+        Args:
+            text (str): Text or regular expression to find
+            regex (bool): Is text a regular expression? Defaults to False
+            case_sensitive (bool): Defaults to False
+            max_lines (int): Number of matching lines returned at most. Defaults to 5000
+            cancelled: Function returning True to stop, optional
+
+        Raises:
+            re.error: Invalid regular expression
+
+        Yields:
+            str, list: File path, [(line number, line text, match start, match end)]
+        """
+        if not text:
+            return
+        expression = re.compile(text if regex else re.escape(text), 0 if case_sensitive else re.IGNORECASE)
+        for path in self.candidates(text, regex=regex):
+            if max_lines <= 0 or (cancelled is not None and cancelled()):
+                return
+            try:
+                with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                    content = f.read()
+            except OSError:
+                continue
+            lines = []
+            for number, line in enumerate(content.split('\n'), 1):
+                match = expression.search(line)
+                if match is None:
+                    continue
+                lines.append((number, line, match.start(), match.end()))
+                if len(lines) >= max_lines:
+                    break
+            if lines:
+                max_lines -= len(lines)
+                yield path, lines
+
+
+class ContentIndexer(QObject):
+    """
+    Keeps a ContentIndex up to date on a worker thread, and saves it once idle
+    """
+
+    indexUpdated = Signal(int)  # Number of files indexed
+
+    def __init__(self, *args, **kwargs):
+        super(ContentIndexer, self).__init__(*args, **kwargs)
+        self.index = ContentIndex()
+        self._jobs = queue.Queue()
+        self._queued = 0  # Serial of the last job queued
+        self._done = 0  # Serial of the last job processed
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name='ContentIndexer', daemon=True)
+        self._thread.start()
+
+    def open(self, file_path):
+        """Switches to another index file, ie: on profile change
+
+        Args:
+            file_path (str): Index file
+        """
+        self._put(('open', file_path))
+
+    def update(self, paths):
+        """Indexes the changed files of a list. Files no longer listed are removed
+
+        Args:
+            paths (list): Every file path to index
+
+        Returns:
+            int: Job serial, see processed()
+        """
+        return self._put(('update', list(paths)))
+
+    def update_file(self, path):
+        """Indexes a file again, ie: once saved
+
+        Args:
+            path (str): File path
+        """
+        self._put(('file', path))
+
+    def processed(self, serial):
+        """Returns True once the job with the given serial was processed, ie: when indexUpdated is emitted"""
+        return self._done >= serial
+
+    def _put(self, job):
+        """Queues a job
+
+        Returns:
+            int: Job serial
+        """
+        with self._lock:
+            self._queued += 1
+            self._jobs.put(job + (self._queued,))
+            return self._queued
+
+    def _pending_update(self):
+        """Returns True if a newer update or index switch is queued, the current update is then stopped"""
+        return any(job[0] in ('open', 'update') for job in list(self._jobs.queue))
+
+    def _run(self):
+        """Worker thread loop"""
+        dirty = False
+        while True:
+            kind, value, serial = self._jobs.get()
+            if kind == 'open':
+                if dirty:
+                    self._save()
+                self.index = ContentIndex(value)
+                self.index.load()
+                dirty = False
+            elif kind == 'update':
+                dirty = self.index.update(value, cancelled=self._pending_update) > 0 or dirty
+            elif kind == 'file':
+                dirty = self.index.update_file(value) or dirty
+            self._done = serial
+            if self._jobs.empty():
+                if dirty:
+                    self._save()
+                    dirty = False
+                self.indexUpdated.emit(len(self.index))
+
+    def _save(self):
+        """Saves the index, ignoring write errors"""
+        if self.index.file_path:
+            try:
+                self.index.save()
+            except OSError:
+                pass
+
+
+# ______________________________________________________________________________________________________________________
@@ -1,13 +1,25 @@
 # System Imports
 import os
 import sys
+import weakref
+import threading
+from collections import deque
 
 # Third-Party Imports
+from qtpy.QtCore import QObject, QCoreApplication, QTimer, Signal, Qt
 
 # Local Imports
+from sharedtoolbox.core import eventTracer
 
 # ______________________________________________________________________________________________________________________
 
+_MAIN_THREAD_ID = threading.main_thread().ident
+
+# Coalescing modes
+LATEST = 'latest'
+BATCH = 'batch'
+
+
 class Singleton(type):
     __instances__ = {}
 
@@ -33,13 +45,16 @@ class EventHandler(object, metaclass=Singleton):
         self.std_out_write = Event(str)
         self.std_err_write = Event(str)
         self.console_write_html = Event(str)
+        self.output_spilled = Event(int, str, int) # Run id, spill file path, bytes written. Triggered from the OutputCapture
 
         self.file_clicked = Event(str) # File path. Triggered from the navigation
         self.file_opened = Event(str) # File path. Triggered from the FilesWidget. This is the current editor displayed
-        self.file_state_changed = Event(bool) # True: Saved. False: Unsaved.  Only the current file emits this signal.
+        self.file_state_changed = Event(bool, coalesce=LATEST) # True: Saved. False: Unsaved.  Only the current file emits this signal.
         self.file_saved = Event(str) # File path.
-        self.unindent_text = Event()  # Triggered from the EditorControls.
-        self.indent_text = Event()  # Triggered from the EditorControls.
+        self.file_changed_on_disk = Event(str) # File path. Triggered from the ScriptMirror, once a mirrored script changed in the library.
+        self.go_to_line = Event(int) # Line number. Triggered from the content search, to the current editor.
+        self.unindent_text = Event()  # Triggered from the EditorControls, to the current CodeEditor.
+        self.indent_text = Event()  # Triggered from the EditorControls, to the current CodeEditor.
         self.move_filebtn_left = Event()  # Triggered from the EditorControls.
         self.move_filebtn_right = Event()  # Triggered from the EditorControls.
         self.select_previous_filebtn = Event()  # Triggered from the EditorControls.
@@ -56,72 +71,437 @@ class EventHandler(object, metaclass=Singleton):
         self.shortcut_previous_filebtn = Event()
         self.shortcut_next_filebtn = Event()
         self.shortcut_move_filebtn_right = Event()
-        self.shortcut_indent = Event()
-        self.shortcut_unindent = Event()
+        self.shortcut_indent = Event()  # Triggered to the CodeEditor the shortcut was pressed in.
+        self.shortcut_unindent = Event()  # Triggered to the CodeEditor the shortcut was pressed in.
         self.shortcut_run_selection = Event()
         self.shortcut_run_all = Event()
+        self.shortcut_quick_open = Event()
+        self.shortcut_search_in_scripts = Event()
+
+        for name, event in vars(self).items():
+            if isinstance(event, Event):
+                event.name = name
+
+    def start_trace(self, max_records=500000):
+        """Starts recording every emit and the duration of each listener
+
+        Args:
+            max_records (int): Number of records kept, the oldest are dropped first
+        """
+        Event.TRACER = eventTracer.EventTracer(max_records=max_records)
+
+    def stop_trace(self, path=None):
+        """Stops recording emits
+
+        Args:
+            path (str): Chrome trace file to export the records to, optional
+
+        Returns:
+            EventTracer: Tracer holding the records, None if not tracing
+        """
+        tracer = Event.TRACER
+        Event.TRACER = None
+        if tracer is not None and path:
+            tracer.export(path)
+        return tracer
+
+    @property
+    def tracing(self):
+        """Returns True while emits are recorded"""
+        return Event.TRACER is not None
 
 class Event():
     """
     A base class for an event
-    
-    Events can be fired or listened to
+
+    Events can be fired or listened to.
+    Listeners connected with a target only receive emit_to() on that target (ie: the editor a shortcut was pressed in),
+    other listeners receive emit() broadcasts.
+    Bound methods are held weakly: listeners go away with their owner, and right away when the owner is a QObject
+    being destroyed. Argument types are only validated when VALIDATE_ARGS is set (SHAREDTOOLBOX_DEBUG_EVENTS=1).
+
+    Listeners are always called on the GUI thread: emits from the GUI thread are synchronous, emits from other threads
+    are queued and delivered by the event loop, in order.
+    Coalescing events are always queued, and delivered once per event loop tick:
+        latest: only the last emitted arguments are delivered
+        batch: every emit is delivered. Listeners connected with batched=True get a single call with the list of
+               argument tuples instead
     """
 
-    def __init__(self, *args):
+    VALIDATE_ARGS = bool(os.environ.get('SHAREDTOOLBOX_DEBUG_EVENTS'))
+    TRACER = None  # EventTracer recording emits, see EventHandler.start_trace
+
+    def __init__(self, *args, coalesce=None):
         """Constructor
-        
+
         Args:
             *args (type): Number of arguments and their types that emitting this function will send
+            coalesce (str): None, 'latest' or 'batch'. Defaults to None
         """
-        self._listeners = []
+        self.name = None  # Set by the EventHandler
+        self._coalesce = coalesce
+        self._pending = {}  # Scope key: list of argument tuples waiting for the GUI thread
+        self._scheduled = False
+        self._lock = threading.Lock()
+        self._batched = set()  # (Scope key, listener key) of the listeners taking batches
+        self._scopes = {None: {}}  # Scope key: {listener key: (weak reference to the owner or None, function)}
+        self._snapshots = {}  # Scope key: listeners as of the last change, iterated by emit_to
+        self._snapshot = ()  # Broadcast listeners as of the last change, iterated by emit
         self._args = args
 
 
     def emit(self, *args):
-        """Emits an event. Loops through listeners and calls them"""
-        if not len(args) == len(self._args):
-            self._raise_invalid_args(*args)
-        for i, arg in enumerate(args):
-            if not issubclass(type(arg), self._args[i]):
-                self._raise_invalid_args(*args)
+        """Emits an event to every listener connected without a target"""
+        if self.VALIDATE_ARGS:
+            self._validate_args(args)
+        if self._coalesce is None and threading.get_ident() == _MAIN_THREAD_ID:
+            self._call(None, self._snapshot, args)
+        else:
+            self._post(None, args)
 
-        cleanup_listeners = []
-        for listener in self._listeners:
-            try:
-                listener(*args)
-            except RuntimeError:
-                cleanup_listeners.append(listener)
 
-        if cleanup_listeners:
-            self._listeners = [listener for listener in self._listeners if listener not in cleanup_listeners]
-            cleanup_listeners = []
+    def emit_to(self, target, *args):
+        """Emits an event to the listeners connected with the given target only
+
+        Args:
+            target: Target the listeners were connected with
+        """
+        if self.VALIDATE_ARGS:
+            self._validate_args(args)
+        scope = self._scope_key(target)
+        if self._coalesce is not None or threading.get_ident() != _MAIN_THREAD_ID:
+            self._post(scope, args)
+            return
+        snapshot = self._snapshots.get(scope)
+        if snapshot:
+            self._call(scope, snapshot, args)
 
 
-    def connect(self, func):
+    def connect(self, func, target=None, batched=False, debounce_ms=None, throttle_ms=None):
         """Adds a listening function to the event
-        
+
         Args:
             func: Listening function
+            target: Only receive emits sent to this target (any hashable or object). Defaults to None: broadcasts
+            batched (bool): On 'batch' events, receive a single list of argument tuples per tick. Defaults to False
+            debounce_ms (int): Only call the listener once emits stopped for this long, with the last arguments
+            throttle_ms (int): Call the listener at most once per interval, the last arguments of an interval are
+                               delivered at its end
         """
-        if func not in self._listeners:
-            self._listeners.append(func)
+        scope = self._scope_key(target)
+        key = self._key(func)
+        listeners = self._scopes.setdefault(scope, {})
+        if key in listeners:
+            return
+        owner = getattr(func, '__self__', None)
+        ref = None
+        if owner is not None and hasattr(func, '__func__'):
+            # Call the plain function on the dereferenced owner, cheaper than a WeakMethod
+            ref = weakref.ref(owner, lambda r, scope=scope, key=key: self._remove(scope, key))
+            func = func.__func__
+        for obj in {id(x): x for x in [owner, target] if isinstance(x, QObject)}.values():
+            try:
+                obj.destroyed.connect(lambda *args, scope=scope, key=key: self._remove(scope, key))
+            except RuntimeError:
+                return
+        if debounce_ms is not None or throttle_ms is not None:
+            func = _RateLimiter(ref, func, debounce_ms=debounce_ms, throttle_ms=throttle_ms)
+            ref = None
+        listeners[key] = (ref, func)
+        if batched:
+            self._batched.add((scope, key))
+        self._update_snapshot(scope)
 
 
-    def disconnect(self, func):
+    def disconnect(self, func, target=None):
         """Disconnects a listener from the event
-        
+
         Args:
             func: Function to disconnect
+            target: Target the function was connected with, optional
         """
-        if func in self._listeners:
-            self._listeners.remove(func)
-            
-            
+        self._remove(self._scope_key(target), self._key(func))
+
+
+    def _post(self, scope, args):
+        """Queues an emit for the GUI thread"""
+        with self._lock:
+            if self._coalesce == LATEST:
+                self._pending[scope] = [args]
+            else:
+                self._pending.setdefault(scope, []).append(args)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        if Event.TRACER is not None:
+            Event.TRACER.add_queued(self.name)
+        _Dispatcher.post(self)
+
+
+    def _deliver_pending(self):
+        """Delivers the queued emits. Called on the GUI thread"""
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+            self._scheduled = False
+        for scope, args_list in pending.items():
+            snapshot = self._snapshot if scope is None else self._snapshots.get(scope)
+            if not snapshot:
+                continue
+            if self._batched:
+                batched = tuple(x for x in snapshot if (scope, x[0]) in self._batched)
+                if batched:
+                    self._call(scope, batched, (args_list,))
+                    snapshot = tuple(x for x in snapshot if (scope, x[0]) not in self._batched)
+            for args in args_list:
+                self._call(scope, snapshot, args)
+
+
+    def _call(self, scope, snapshot, args):
+        """Calls the listeners of a snapshot"""
+        if Event.TRACER is not None:
+            self._call_traced(scope, snapshot, args)
+            return
+        cleanup_keys = None
+        arg_count = len(args)
+        for key, ref, func in snapshot:
+            try:
+                if ref is None:
+                    func(*args)
+                    continue
+                owner = ref()
+                if owner is None:
+                    continue
+                # Prepending the owner to *args copies the tuple, most events have a single argument or none
+                if arg_count == 1:
+                    func(owner, args[0])
+                elif arg_count == 0:
+                    func(owner)
+                else:
+                    func(owner, *args)
+            except RuntimeError:
+                # Qt object deleted behind a listener that could not be tracked
+                if cleanup_keys is None:
+                    cleanup_keys = []
+                cleanup_keys.append(key)
+
+        if cleanup_keys:
+            for key in cleanup_keys:
+                self._remove(scope, key)
+
+
+    def _call_traced(self, scope, snapshot, args):
+        """Calls the listeners of a snapshot, recording the duration of each"""
+        tracer = Event.TRACER
+        cleanup_keys = []
+        start = tracer.clock()
+        for key, ref, func in snapshot:
+            owner = None
+            if ref is not None:
+                owner = ref()
+                if owner is None:
+                    continue
+            listener_start = tracer.clock()
+            try:
+                if ref is None:
+                    func(*args)
+                else:
+                    func(owner, *args)
+            except RuntimeError:
+                cleanup_keys.append(key)
+            finally:
+                tracer.add_listener(self.name, getattr(func, '__qualname__', repr(func)), listener_start, tracer.clock())
+        tracer.add_emit(self.name, start, tracer.clock(), len(snapshot), target=scope)
+
+        for key in cleanup_keys:
+            self._remove(scope, key)
+
+
+    @staticmethod
+    def _key(func):
+        """Returns the key identifying a listener. Bound methods are identified by their owner and function"""
+        if hasattr(func, '__func__') and getattr(func, '__self__', None) is not None:
+            return (id(func.__self__), id(func.__func__))
+        return func
+
+
+    @staticmethod
+    def _scope_key(target):
+        """Returns the key identifying a target. Objects are identified by id, to not be kept alive by the event"""
+        if target is None or isinstance(target, (str, int, float, tuple)):
+            return target
+        return ('object', id(target))
+
+
+    def _remove(self, scope, key):
+        """Removes a listener by key"""
+        listeners = self._scopes.get(scope)
+        entry = listeners.pop(key, None) if listeners is not None else None
+        if entry is not None:
+            if isinstance(entry[1], _RateLimiter):
+                entry[1].stop()
+            self._batched.discard((scope, key))
+            self._update_snapshot(scope)
+
+
+    def _update_snapshot(self, scope):
+        """Rebuilds the tuple of listeners iterated on emit. Emits in progress keep iterating the previous one"""
+        listeners = self._scopes.get(scope, {})
+        snapshot = tuple((key, ref, func) for key, (ref, func) in listeners.items())
+        if scope is None:
+            self._snapshot = snapshot
+        elif snapshot:
+            self._snapshots[scope] = snapshot
+        else:
+            # Last listener of this target gone
+            self._scopes.pop(scope, None)
+            self._snapshots.pop(scope, None)
+
+
+    def _validate_args(self, args):
+        """Raises if the arguments do not match the event signature"""
+        if len(args) != len(self._args) or not all(isinstance(arg, arg_type) for arg, arg_type in zip(args, self._args)):
+            self._raise_invalid_args(*args)
+
+
     def _raise_invalid_args(self, *args):
         """Raises an invalid arguments exception"""
         raise ValueError('Invalid event args. \nExpected: "{}" \nReceived: "{}"'
                          .format(', '.join(list([str(x) for x in self._args])), ', '.join([str(type(x)) for x in args]))
                          )
 
+class _RateLimiter(object):
+    """
+    Listener wrapper calling the listener once emits stopped for a while (debounce), or at most once per interval
+    (throttle). Listeners are called on the GUI thread, so are the timers.
+    """
+
+    def __init__(self, ref, func, debounce_ms=None, throttle_ms=None):
+        """Constructor
+
+        Args:
+            ref (weakref.ref): Weak reference to the listener's owner, None for plain functions
+            func: Listener function
+            debounce_ms (int): Debounce delay, optional
+            throttle_ms (int): Throttle interval, optional
+        """
+        self.ref = ref
+        self.func = func
+        self.debounce_ms = debounce_ms
+        self.throttle_ms = throttle_ms
+        self.__qualname__ = getattr(func, '__qualname__', repr(func))
+        self._timer = None
+        self._pending = None  # Arguments waiting for the timer
+
+    def __call__(self, *args):
+        if QCoreApplication.instance() is None:
+            self._invoke(args)
+            return
+        if self._timer is None:
+            # Parented, so Qt owns the timer and releases it along with the dispatcher
+            self._timer = QTimer(_Dispatcher.instance())
+            self._timer.setSingleShot(True)
+            self._timer.timeout.connect(self._on_timeout)
+
+        if self.debounce_ms is not None:
+            self._pending = args
+            self._timer.start(self.debounce_ms)
+        elif self._timer.isActive():
+            self._pending = args
+        else:
+            # Leading call, then hold the next calls until the interval ends
+            self._invoke(args)
+            self._timer.start(self.throttle_ms)
+
+    def stop(self):
+        """Drops the pending call and releases the timer. The timer may already be deleted, ie: at exit"""
+        self._pending = None
+        timer, self._timer = self._timer, None
+        if timer is None:
+            return
+        try:
+            timer.stop()
+            timer.timeout.disconnect(self._on_timeout)
+        except RuntimeError:
+            # Internal C++ object already deleted
+            return
+        timer.deleteLater()
+
+    def _on_timeout(self):
+        """Delivers the pending call"""
+        args = self._pending
+        self._pending = None
+        if args is None:
+            return
+        self._invoke(args)
+        if self.throttle_ms is not None and self._timer is not None:
+            self._timer.start(self.throttle_ms)
+
+    def _invoke(self, args):
+        """Calls the listener"""
+        try:
+            if self.ref is None:
+                self.func(*args)
+            else:
+                owner = self.ref()
+                if owner is not None:
+                    self.func(owner, *args)
+        except RuntimeError:
+            # Qt object deleted while the call was pending
+            pass
+
+
+class _Dispatcher(QObject):
+    """
+    Lives on the GUI thread and delivers the queued emits of every event
+    """
+
+    wake = Signal()
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        super(_Dispatcher, self).__init__(*args, **kwargs)
+        self._events = deque()
+        self.wake.connect(self._process, Qt.QueuedConnection)
+
+    @classmethod
+    def post(cls, event):
+        """Schedules the delivery of an event's queued emits on the GUI thread
+
+        Args:
+            event (Event): Event with queued emits
+        """
+        dispatcher = cls.instance()
+        if dispatcher is None:
+            # No event loop to queue to
+            event._deliver_pending()
+            return
+        dispatcher._events.append(event)
+        dispatcher.wake.emit()
+
+    @classmethod
+    def instance(cls):
+        """Returns the dispatcher, living on the GUI thread
+
+        Returns:
+            _Dispatcher: Dispatcher, None if there is no application yet
+        """
+        app = QCoreApplication.instance()
+        if app is None:
+            return None
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    dispatcher = cls()
+                    dispatcher.moveToThread(app.thread())
+                    cls._instance = dispatcher
+        return cls._instance
+
+    def _process(self):
+        """Delivers the queued emits"""
+        while self._events:
+            self._events.popleft()._deliver_pending()
+
+
 # ______________________________________________________________________________________________________________________
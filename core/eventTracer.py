@@ -0,0 +1,126 @@
+# System Imports
+import os
+import sys
+import json
+import time
+import threading
+from collections import deque
+
+# Third-Party Imports
+
+# Local Imports
+
+# ______________________________________________________________________________________________________________________
+
+
+class EventTracer(object):
+    """
+    Records event emits and the time spent in each of their listeners.
+
+    Records are kept in a bounded buffer and exported as Chrome trace events (JSON), which can be opened in
+    chrome://tracing or https://ui.perfetto.dev. Each emit is a slice, with one nested slice per listener.
+    """
+
+    def __init__(self, max_records=500000):
+        """Constructor
+
+        Args:
+            max_records (int): Number of records kept, the oldest are dropped first. Defaults to 500000
+        """
+        self._records = deque(maxlen=max_records)
+        self._thread_names = {}  # Thread ident: thread name
+        self._origin = time.perf_counter()
+
+    @staticmethod
+    def clock():
+        """Returns the current time, in seconds"""
+        return time.perf_counter()
+
+    def add_emit(self, event_name, start, end, listener_count, target=None):
+        """Records an emit
+
+        Args:
+            event_name (str): Event name
+            start (float): Start time, from clock()
+            end (float): End time, from clock()
+            listener_count (int): Number of listeners called
+            target: Target emitted to, optional
+        """
+        args = {'listeners': listener_count}
+        if target is not None:
+            args['target'] = str(target)
+        self._records.append(('emit', event_name, start, end, self._thread(), args))
+
+    def add_listener(self, event_name, listener_name, start, end):
+        """Records a listener call
+
+        Args:
+            event_name (str): Event name
+            listener_name (str): Listener qualified name
+            start (float): Start time, from clock()
+            end (float): End time, from clock()
+        """
+        self._records.append(('listener', listener_name, start, end, self._thread(), {'event': event_name}))
+
+    def add_queued(self, event_name):
+        """Records an emit queued to the GUI thread
+
+        Args:
+            event_name (str): Event name
+        """
+        now = self.clock()
+        self._records.append(('queued', event_name, now, now, self._thread(), {}))
+
+    def slowest_listeners(self, count=10):
+        """Returns the listeners with the most time spent in them
+
+        Args:
+            count (int): Number of listeners to return. Defaults to 10
+
+        Returns:
+            list: (listener name, event name, number of calls, total duration in ms, max duration in ms)
+        """
+        stats = {}
+        for kind, name, start, end, tid, args in list(self._records):
+            if kind != 'listener':
+                continue
+            key = (name, args['event'])
+            calls, total, maximum = stats.get(key, (0, 0.0, 0.0))
+            duration = (end - start) * 1000.0
+            stats[key] = (calls + 1, total + duration, max(maximum, duration))
+        rows = [(key[0], key[1]) + value for key, value in stats.items()]
+        return sorted(rows, key=lambda x: x[3], reverse=True)[:count]
+
+    def export(self, path):
+        """Exports the records as a Chrome trace file
+
+        Args:
+            path (str): JSON file path
+        """
+        pid = os.getpid()
+        trace_events = []
+        for tid, thread_name in self._thread_names.items():
+            trace_events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                                 'args': {'name': thread_name}})
+        for kind, name, start, end, tid, args in list(self._records):
+            trace_event = {'name': name, 'cat': kind, 'pid': pid, 'tid': tid,
+                           'ts': (start - self._origin) * 1000000.0, 'args': args}
+            if kind == 'queued':
+                trace_event.update({'ph': 'i', 's': 't'})
+            else:
+                trace_event.update({'ph': 'X', 'dur': (end - start) * 1000000.0})
+            trace_events.append(trace_event)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f)
+
+    def _thread(self):
+        """Returns the current thread ident, keeping track of its name"""
+        ident = threading.get_ident()
+        if ident not in self._thread_names:
+            self._thread_names[ident] = threading.current_thread().name
+        return ident
+
+
+# ______________________________________________________________________________________________________________________
@@ -0,0 +1,181 @@
+# System Imports
+import os
+import re
+import sys
+import heapq
+import bisect
+import string
+import operator
+from itertools import repeat
+
+# Third-Party Imports
+
+# Local Imports
+
+# ______________________________________________________________________________________________________________________
+
+
+class _Field(object):
+    """
+    Lowercase values of one field of every script (names or paths), and the structures used to match them:
+    - A newline separated blob, so a regex runs over every value at once
+    - Sorted values, for prefix lookups
+    - Per-character masks of the values holding the character, built on first use. A mask is an int holding one
+      byte per value, 1 if the value holds the character
+    """
+
+    def __init__(self, values):
+        """Constructor
+
+        Args:
+            values (list): Lowercase values, one per script
+        """
+        self.values = values
+        self.starts = []
+        offset = 0
+        for value in values:
+            self.starts.append(offset)
+            offset += len(value) + 1
+        self.blob = '\n'.join(values) + '\n'
+        self.order = sorted(range(len(values)), key=values.__getitem__)
+        self.sorted = [values[i] for i in self.order]
+        self._masks = {}  # Character: mask
+
+    def mask(self, char):
+        """Returns the mask of the values holding a character"""
+        mask = self._masks.get(char)
+        if mask is None:
+            mask = self._masks[char] = int.from_bytes(
+                bytes(map(operator.contains, self.values, repeat(char))), 'little')
+        return mask
+
+    def candidates(self, query):
+        """Returns the mask of the values holding every character of a query"""
+        mask = None
+        for char in set(query):
+            mask = self.mask(char) if mask is None else mask & self.mask(char)
+            if not mask:
+                break
+        return mask
+
+    def prefixed(self, query, limit):
+        """Returns the indexes of the values starting with a query, up to limit"""
+        indexes = []
+        for i in range(bisect.bisect_left(self.sorted, query), len(self.sorted)):
+            if len(indexes) >= limit or not self.sorted[i].startswith(query):
+                break
+            indexes.append(self.order[i])
+        return indexes
+
+
+class FuzzyIndex(object):
+    """
+    Fuzzy finder over script names and relative paths.
+
+    A query matches the values holding its characters in order. Values holding all of the characters are found
+    with the per-character masks, and matched one by one when few. When many, a single regex runs over the blob of
+    every value instead, until enough matches are found. Match patterns never backtrack: each gap excludes the
+    character that ends it.
+    Matches are ranked by: query prefix of the value, match starting the value, compactness of the match, then
+    length of the value. Names are searched first, paths fill the remaining results.
+    """
+
+    SCAN_LIMIT = 500  # Matches ranked at most per field, per search
+    CANDIDATE_LIMIT = 8000  # Candidates matched one by one at most, the blob is scanned past that
+    PRELOADED_CHARS = string.ascii_lowercase + string.digits + '_-/ .'
+
+    def __init__(self, scripts):
+        """Constructor
+
+        Args:
+            scripts (list): (name, relative path, path) tuples
+        """
+        self.scripts = sorted(scripts, key=lambda x: x[1].lower())
+        self._names = _Field([script[0].lower() for script in self.scripts])
+        self._paths = _Field([script[1].lower().replace('\\', '/') for script in self.scripts])
+        for char in self.PRELOADED_CHARS:
+            self._names.mask(char)
+            self._paths.mask(char)
+
+    def __len__(self):
+        return len(self.scripts)
+
+    def search(self, query, limit=20):
+        """Returns the best matches of a query
+
+        Args:
+            query (str): Characters to match in order. Whitespace is ignored, slashes match against paths only
+            limit (int): Number of results. Defaults to 20
+
+        Returns:
+            list: (name, relative path, path) tuples, best first
+        """
+        query = ''.join(query.lower().replace('\\', '/').split())
+        if not query:
+            return []
+        pattern = re.compile(re.escape(query[0]) + ''.join(
+            '[^{}\n]*{}'.format(re.escape(char), re.escape(char)) for char in query[1:]))
+
+        found = set()
+        results = []
+        fields = [self._paths] if '/' in query else [self._names, self._paths]
+        for field in fields:
+            count = limit - len(results)
+            for rank in heapq.nsmallest(count, self._ranks(field, query, pattern, found, count)):
+                found.add(rank[-1])
+                results.append(self.scripts[rank[-1]])
+            if len(results) >= limit:
+                break
+        return results
+
+    def _ranks(self, field, query, pattern, exclude, count):
+        """Returns the ranks of the matches of a field, up to SCAN_LIMIT.
+        Prefix matches rank first, the other matches are skipped when there are enough of them
+
+        Returns:
+            list: Rank tuples, with the script index last
+        """
+        mask = field.candidates(query)
+        if not mask:
+            return []
+
+        # Values starting with the query
+        ranks = [(0, 0, len(query), len(field.values[index]), index)
+                 for index in field.prefixed(query, self.SCAN_LIMIT) if index not in exclude]
+        if len(ranks) >= count:
+            return ranks
+        exclude = exclude.union(rank[-1] for rank in ranks)
+
+        flags = mask.to_bytes(len(field.values), 'little')
+        if flags.count(1) <= self.CANDIDATE_LIMIT:
+            # Few candidates, match them one by one
+            index = flags.find(1)
+            while index != -1 and len(ranks) < self.SCAN_LIMIT:
+                if index not in exclude:
+                    value = field.values[index]
+                    match = pattern.search(value)
+                    if match is not None:
+                        start, end = match.span()
+                        ranks.append((1, start != 0, end - start, len(value), index))
+                index = flags.find(1, index + 1)
+            return ranks
+
+        # Many candidates, run the regex over the blob until enough matches are found
+        search = pattern.search
+        find = field.blob.find
+        starts = field.starts
+        pos = 0
+        while len(ranks) < self.SCAN_LIMIT:
+            match = search(field.blob, pos)
+            if match is None:
+                break
+            start, end = match.span()
+            index = bisect.bisect_right(starts, start) - 1
+            line_start = starts[index]
+            pos = find('\n', end) + 1
+            if index not in exclude:
+                ranks.append((1, start != line_start, end - start, pos - line_start - 1, index))
+        return ranks
+
+
+# ______________________________________________________________________________________________________________________
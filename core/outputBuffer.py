@@ -0,0 +1,344 @@
+# System Imports
+import os
+import re
+import sys
+from bisect import bisect_right
+from itertools import islice
+from collections import deque
+
+# Third-Party Imports
+
+# Local Imports
+
+# ______________________________________________________________________________________________________________________
+
+
+class OutputLine(object):
+    """
+    A single line of console output
+    """
+    __slots__ = ('number', 'text', 'stream', 'color', 'run_id', 'thread_name', 'size')
+
+    def __init__(self, number, text, stream='stdout', color=None, run_id=None, thread_name=None):
+        """Constructor
+
+        Args:
+            number (int): Absolute line number, since the buffer was created
+            text (str): Line text, without its line break
+            stream (str): Stream the line was written to ('stdout', 'stderr' or 'system')
+            color (str): Text color, optional
+            run_id (int): Id of the run that wrote this line, optional
+            thread_name (str): Name of the thread that wrote this line, optional
+        """
+        self.number = number
+        self.text = text
+        self.stream = stream
+        self.color = color
+        self.run_id = run_id
+        self.thread_name = thread_name
+        self.size = len(text.encode('utf-8', 'replace')) + 1
+
+
+class OutputBuffer(object):
+    """
+    Ring buffer holding the console output, line by line.
+    The oldest lines are dropped once the line cap or the byte cap is exceeded.
+    """
+
+    def __init__(self, max_lines=None, max_bytes=None):
+        """Constructor
+
+        Args:
+            max_lines (int): Maximum number of lines kept. None for no limit
+            max_bytes (int): Maximum number of bytes kept. None for no limit
+        """
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self._lines = deque()
+        self._bytes = 0
+        self._next_number = 0
+        self._open = False  # Is the last line still waiting for its line break?
+        self.dropped_lines = 0
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __getitem__(self, index):
+        return self._lines[index]
+
+    def __iter__(self):
+        return iter(self._lines)
+
+    @property
+    def size(self):
+        """Returns the approximate size of the buffer in bytes"""
+        return self._bytes
+
+    @property
+    def first_number(self):
+        """Returns the absolute line number of the first line kept in the buffer"""
+        return self._lines[0].number if self._lines else self._next_number
+
+    @property
+    def next_number(self):
+        """Returns the absolute line number the next new line will get"""
+        return self._next_number
+
+    def line(self, number):
+        """Returns the line with the given absolute line number
+
+        Args:
+            number (int): Absolute line number
+
+        Returns:
+            OutputLine: Line, None if dropped or not written yet
+        """
+        index = number - self.first_number
+        if 0 <= index < len(self._lines):
+            return self._lines[index]
+        return None
+
+    def lines(self, start_number, end_number):
+        """Iterates over a range of lines
+
+        Args:
+            start_number (int): First absolute line number
+            end_number (int): Absolute line number to stop at, excluded
+
+        Returns:
+            iterator: OutputLine iterator
+        """
+        first_number = self.first_number
+        return islice(self._lines, max(start_number - first_number, 0), max(end_number - first_number, 0))
+
+    def append(self, text, stream='stdout', color=None, run_id=None, thread_name=None, trim=True):
+        """Appends some text to the buffer
+        Text that does not end with a line break stays open, and is continued by the next write with the same attributes
+
+        Args:
+            text (str): Text to append
+            stream (str): Stream the text was written to ('stdout', 'stderr' or 'system')
+            color (str): Text color, optional
+            run_id (int): Id of the run that wrote this text, optional
+            thread_name (str): Name of the thread that wrote this text, optional
+            trim (bool): Drop the oldest lines exceeding the caps? If False, the caller announces then drops them
+                through overflow() and trim(). Defaults to True
+
+        Returns:
+            int, bool, int: Number of lines dropped from the front, was the last line updated, number of lines added
+        """
+        if not text:
+            return 0, False, 0
+
+        parts = text.split('\n')
+        updated = False
+        added = 0
+
+        # Continue the open line
+        if self._open:
+            last = self._lines[-1]
+            if (last.stream, last.color, last.run_id, last.thread_name) == (stream, color, run_id, thread_name):
+                self._bytes -= last.size
+                last.text += parts.pop(0)
+                last.size = len(last.text.encode('utf-8', 'replace')) + 1
+                self._bytes += last.size
+                updated = True
+                if not parts:
+                    # No line break written, the line stays open
+                    return self.trim() if trim else 0, updated, added
+            self._open = False
+
+        # A trailing line break closes the last line and leaves an empty part behind
+        self._open = parts[-1] != ''
+        if not self._open:
+            parts.pop()
+
+        for part in parts:
+            line = OutputLine(self._next_number, part, stream=stream, color=color, run_id=run_id, thread_name=thread_name)
+            self._next_number += 1
+            self._lines.append(line)
+            self._bytes += line.size
+            added += 1
+
+        return self.trim() if trim else 0, updated, added
+
+    def replace_text(self, number, text):
+        """Replaces the text of a line
+
+        Args:
+            number (int): Absolute line number
+            text (str): New text, without line break
+
+        Returns:
+            bool: False if the line is no longer in the buffer
+        """
+        line = self.line(number)
+        if line is None:
+            return False
+        self._bytes -= line.size
+        line.text = text
+        line.size = len(text.encode('utf-8', 'replace')) + 1
+        self._bytes += line.size
+        return True
+
+    def clear(self):
+        """Clears the buffer. Line numbers keep increasing"""
+        self._lines.clear()
+        self._bytes = 0
+        self._open = False
+        self.dropped_lines = 0
+
+    def overflow(self):
+        """Returns the number of oldest lines to drop for the buffer to fit its caps, without dropping them"""
+        count = len(self._lines)
+        size = self._bytes
+        dropped = 0
+        while count - dropped > 1 and (
+            (self.max_lines and count - dropped > self.max_lines)
+            or (self.max_bytes and size > self.max_bytes)
+        ):
+            size -= self._lines[dropped].size
+            dropped += 1
+        return dropped
+
+    def trim(self, count=None):
+        """Drops the oldest lines
+
+        Args:
+            count (int): Number of lines to drop. Defaults to overflow(), until the buffer fits its caps
+
+        Returns:
+            int: Number of lines dropped
+        """
+        dropped = self.overflow() if count is None else min(count, len(self._lines))
+        for _ in range(dropped):
+            self._bytes -= self._lines.popleft().size
+        self.dropped_lines += dropped
+        return dropped
+
+
+class OutputSearchIndex(object):
+    """
+    Line index used to search an OutputBuffer without going through any widget.
+
+    Lines are grouped in fixed blocks of absolute line numbers. Each block caches its joined text and the offset of
+    every line in it, so a text search is a handful of str.find scans in C, then a bisect per match.
+    Regular expressions are matched line by line, so no match can span a line break.
+    Only the last block can still change, it is rebuilt when its content changed.
+    """
+
+    BLOCK_LINES = 4096
+
+    def __init__(self, buffer):
+        """Constructor
+
+        Args:
+            buffer (OutputBuffer): Buffer to index
+        """
+        self.buffer = buffer
+        self._blocks = {}  # Block id: (signature, numbers, starts, texts, text, lower text)
+
+    def clear(self):
+        """Drops every cached block"""
+        self._blocks = {}
+
+    def discard(self, number):
+        """Drops the cached block holding the given line, after its text was replaced
+
+        Args:
+            number (int): Absolute line number
+        """
+        self._blocks.pop(number // self.BLOCK_LINES, None)
+
+    def search(self, pattern, regex=False, case_sensitive=False, accept=None):
+        """Searches the buffer
+
+        Args:
+            pattern (str): Text or regular expression to find
+            regex (bool): Is the pattern a regular expression? Defaults to False
+            case_sensitive (bool): Defaults to False
+            accept: Function taking an OutputLine, returning False for lines to skip. Optional
+
+        Raises:
+            re.error: Invalid regular expression
+
+        Returns:
+            list: Sorted absolute line numbers of the matching lines
+        """
+        if not pattern or not len(self.buffer):
+            return []
+        if regex:
+            expression = re.compile(pattern, 0 if case_sensitive else re.IGNORECASE)
+        elif not case_sensitive:
+            pattern = pattern.lower()
+
+        first_number = self.buffer.first_number
+        matches = []
+        self._drop_stale_blocks(first_number)
+        for block_id in range(first_number // self.BLOCK_LINES, (self.buffer.next_number - 1) // self.BLOCK_LINES + 1):
+            numbers, starts, texts, text, lower = self._block(block_id)
+            if regex:
+                indexes = (index for index, line_text in enumerate(texts) if expression.search(line_text))
+            else:
+                indexes = self._find_lines(starts, text if case_sensitive else lower, pattern)
+            for index in indexes:
+                number = numbers[index]
+                if number < first_number:
+                    continue
+                if accept is not None and not accept(self.buffer.line(number)):
+                    continue
+                matches.append(number)
+        return matches
+
+    @staticmethod
+    def _find_lines(starts, haystack, needle):
+        """Yields the index of every line holding needle, skipping to the next line after each match"""
+        position = haystack.find(needle)
+        while position != -1:
+            yield bisect_right(starts, position) - 1
+            line_end = haystack.find('\n', position + len(needle))
+            if line_end == -1:
+                return
+            position = haystack.find(needle, line_end + 1)
+
+    def _block(self, block_id):
+        """Returns the cached block, rebuilding it if its lines changed
+
+        Args:
+            block_id (int): Block id
+
+        Returns:
+            list, list, list, str, str: Line numbers, line start offsets, line texts, joined text, joined lowercase
+                text
+        """
+        start_number = max(block_id * self.BLOCK_LINES, self.buffer.first_number)
+        end_number = min((block_id + 1) * self.BLOCK_LINES, self.buffer.next_number)
+        last = self.buffer.line(end_number - 1)
+        signature = (end_number, last.size if last else 0)
+
+        cached = self._blocks.get(block_id)
+        if cached is not None and cached[0] == signature:
+            return cached[1:]
+
+        numbers = []
+        starts = []
+        texts = []
+        offset = 0
+        for line in self.buffer.lines(start_number, end_number):
+            numbers.append(line.number)
+            starts.append(offset)
+            texts.append(line.text)
+            offset += len(line.text) + 1
+        text = '\n'.join(texts)
+        block = (signature, numbers, starts, texts, text, text.lower())
+        self._blocks[block_id] = block
+        return block[1:]
+
+    def _drop_stale_blocks(self, first_number):
+        """Drops the cached blocks holding only dropped lines"""
+        first_block = first_number // self.BLOCK_LINES
+        for block_id in [x for x in self._blocks if x < first_block]:
+            del self._blocks[block_id]
+
+
+# ______________________________________________________________________________________________________________________
@@ -0,0 +1,306 @@
+# System Imports
+import os
+import sys
+import time
+import queue
+import atexit
+import socket
+import threading
+
+# Third-Party Imports
+
+# Local Imports
+
+# ______________________________________________________________________________________________________________________
+
+SYNC = 'sync'
+ASYNC = 'async'
+BLOCK = 'block'
+DROP = 'drop'
+
+DEFAULT_SETTINGS = {
+    'console': {'enabled': True, 'policy': SYNC},
+    'stream': {'enabled': True, 'policy': SYNC, 'interval': 100, 'max_buffer': 10000, 'backpressure': BLOCK},
+    'log_file': {'enabled': True, 'policy': SYNC},
+    'socket': {'enabled': False, 'policy': ASYNC, 'interval': 100, 'max_buffer': 10000, 'backpressure': DROP,
+               'port': 50507},
+}
+
+
+class OutputSink(object):
+    """
+    Base class of a destination for the captured output.
+
+    Each sink has its own flush policy:
+        sync: chunks are delivered right away, from the writing thread
+        async: chunks are buffered and delivered in batches from the sink's own thread, every `interval` ms
+    When an async sink's buffer is full (`max_buffer` chunks), its backpressure setting either blocks the writer
+    until there is room, or drops the chunk.
+    """
+
+    name = None
+
+    def __init__(self, enabled=True, policy=SYNC, interval=100, max_buffer=10000, backpressure=BLOCK, **kwargs):
+        """Constructor
+
+        Args:
+            enabled (bool): Defaults to True
+            policy (str): 'sync' or 'async'. Defaults to 'sync'
+            interval (int): Async flush interval, in ms. Defaults to 100
+            max_buffer (int): Async buffer size, in chunks. Defaults to 10000
+            backpressure (str): 'block' or 'drop', when the async buffer is full. Defaults to 'block'
+        """
+        self.enabled = enabled
+        self.policy = policy
+        self.interval = interval
+        self.backpressure = backpressure
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_buffer)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def configure(self, **settings):
+        """Updates the sink settings, live
+
+        Args:
+            **settings: Any of the constructor's arguments
+        """
+        if settings.get('policy', self.policy) != self.policy and self.policy == ASYNC:
+            # Deliver what is still buffered before going synchronous
+            self.flush()
+        for key in ['enabled', 'policy', 'interval', 'backpressure']:
+            if key in settings:
+                setattr(self, key, settings[key])
+
+    def push(self, chunk):
+        """Sends a chunk to the sink. Called from the writing thread
+
+        Args:
+            chunk (OutputChunk): Chunk to deliver
+        """
+        if not self.enabled:
+            return
+        if self.policy != ASYNC:
+            self.deliver([chunk])
+            return
+
+        self._start()
+        if self.backpressure == DROP:
+            try:
+                self._queue.put_nowait(chunk)
+            except queue.Full:
+                self.dropped += 1
+        else:
+            self._queue.put(chunk)
+
+    def flush(self):
+        """Blocks until every buffered chunk is delivered"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def deliver(self, chunks):
+        """Delivers chunks to the destination. To be implemented by subclasses
+
+        Args:
+            chunks (list): List of OutputChunk
+        """
+        raise NotImplementedError
+
+    def _start(self):
+        """Starts the async delivery thread"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='OutputSink-{}'.format(self.name), daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        """Async delivery loop. Batches everything buffered during one interval"""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.interval / 1000.0
+            while True:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                self.deliver(batch)
+            except Exception:
+                # A failing sink must never take the others down
+                self.dropped += len(batch)
+            finally:
+                for i in range(len(batch)):
+                    self._queue.task_done()
+
+
+class ConsoleSink(OutputSink):
+    """
+    Sends the output to the console widget, through the OutputCapture's GUI queue
+    """
+
+    name = 'console'
+
+    def __init__(self, capture, **settings):
+        """Constructor
+
+        Args:
+            capture (OutputCapture): Capture delivering to the GUI thread
+        """
+        super(ConsoleSink, self).__init__(**settings)
+        self.capture = capture
+
+    def deliver(self, chunks):
+        for chunk in chunks:
+            self.capture.enqueue(chunk)
+
+
+class StreamSink(OutputSink):
+    """
+    Echoes the output to the original stdout/stderr streams (ie: the DCC's own script editor)
+    """
+
+    name = 'stream'
+
+    def __init__(self, stdout, stderr, **settings):
+        """Constructor
+
+        Args:
+            stdout: Original stdout stream
+            stderr: Original stderr stream
+        """
+        super(StreamSink, self).__init__(**settings)
+        self.stdout = stdout
+        self.stderr = stderr
+
+    def deliver(self, chunks):
+        if len(chunks) == 1:
+            chunk = chunks[0]
+            (self.stderr if chunk.stream == 'stderr' else self.stdout).write(chunk)
+            return
+        # Join consecutive chunks of the same stream, slow streams are much faster with a few large writes
+        texts = []
+        stream = None
+        for chunk in chunks:
+            chunk_stream = self.stderr if chunk.stream == 'stderr' else self.stdout
+            if chunk_stream is not stream and texts:
+                stream.write(''.join(texts))
+                texts = []
+            stream = chunk_stream
+            texts.append(chunk)
+        if texts:
+            stream.write(''.join(texts))
+
+
+class LogFileSink(OutputSink):
+    """
+    Sends the output to the session log writer
+    """
+
+    name = 'log_file'
+
+    def __init__(self, writer, **settings):
+        """Constructor
+
+        Args:
+            writer (SessionLogWriter): Session log writer
+        """
+        super(LogFileSink, self).__init__(**settings)
+        self.writer = writer
+
+    def deliver(self, chunks):
+        self.writer.write(''.join(chunks))
+
+
+class SocketSink(OutputSink):
+    """
+    Streams the output to a local TCP socket, for external viewers.
+    Output written while nothing listens is dropped. Reconnection is attempted at most every few seconds.
+    """
+
+    name = 'socket'
+    RETRY_DELAY = 5.0  # s
+
+    def __init__(self, port=50507, **settings):
+        """Constructor
+
+        Args:
+            port (int): Local port to connect to
+        """
+        super(SocketSink, self).__init__(**settings)
+        self.port = port
+        self._socket = None
+        self._last_attempt = 0.0
+
+    def configure(self, **settings):
+        super(SocketSink, self).configure(**settings)
+        if settings.get('port', self.port) != self.port:
+            self.port = settings['port']
+            self._disconnect()
+
+    def deliver(self, chunks):
+        if self._socket is None and not self._connect():
+            self.dropped += len(chunks)
+            return
+        try:
+            self._socket.sendall(''.join(chunks).encode('utf-8', 'replace'))
+        except OSError:
+            self._disconnect()
+            self.dropped += len(chunks)
+
+    def _connect(self):
+        """Connects to the local port, if the last attempt is old enough
+
+        Returns:
+            bool: Connected?
+        """
+        if time.monotonic() - self._last_attempt < self.RETRY_DELAY:
+            return False
+        self._last_attempt = time.monotonic()
+        try:
+            self._socket = socket.create_connection(('127.0.0.1', self.port), timeout=0.5)
+        except OSError:
+            self._socket = None
+        return self._socket is not None
+
+    def _disconnect(self):
+        if self._socket is not None:
+            try:
+                self._socket.close()
+            except OSError:
+                pass
+            self._socket = None
+
+
+def create_sinks(settings, capture, stdout, stderr, writer):
+    """Creates every sink from the given settings
+
+    Args:
+        settings (dict): Sink name: sink settings. Missing values fall back to DEFAULT_SETTINGS
+        capture (OutputCapture): Capture delivering to the GUI thread
+        stdout: Original stdout stream
+        stderr: Original stderr stream
+        writer (SessionLogWriter): Session log writer
+
+    Returns:
+        list: List of OutputSink, in delivery order
+    """
+    def sink_settings(name):
+        _settings = dict(DEFAULT_SETTINGS.get(name, {}))
+        _settings.update((settings or {}).get(name, {}))
+        return _settings
+
+    return [
+        StreamSink(stdout, stderr, **sink_settings('stream')),
+        ConsoleSink(capture, **sink_settings('console')),
+        LogFileSink(writer, **sink_settings('log_file')),
+        SocketSink(**sink_settings('socket')),
+    ]
+
+
+# ______________________________________________________________________________________________________________________
@@ -0,0 +1,289 @@
+# System Imports
+import os
+import re
+import sys
+import hashlib
+import threading
+
+# Third-Party Imports
+
+# Local Imports
+from sharedtoolbox.utils import pathUtils
+
+# ______________________________________________________________________________________________________________________
+
+
+IGNORE_FILE_NAME = '.sharedtoolboxignore'
+DEFAULT_IGNORE_PATTERNS = (
+    '__pycache__/', '.git/', '.hg/', '.svn/', '.venv/', 'venv/', 'virtualenv/', 'site-packages/', 'node_modules/',
+    '*.egg-info/', '.mypy_cache/', '.pytest_cache/', '.tox/', '.idea/', '.vscode/',
+)
+PATTERN_FLAGS = re.IGNORECASE if os.name == 'nt' else 0
+
+
+def translate(pattern):
+    """Translates a gitignore-style glob to a regular expression. * and ? never match a slash, ** matches any
+    number of directories
+
+    Args:
+        pattern (str): Glob, relative to the directory of its ignore file
+
+    Returns:
+        str: Regular expression
+    """
+    parts = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+            continue
+        elif pattern.startswith('**', i):
+            parts.append('.*')
+            i += 2
+            continue
+        elif c == '*':
+            parts.append('[^/]*')
+        elif c == '?':
+            parts.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                parts.append(re.escape(c))
+            else:
+                content = pattern[i + 1:end].replace('\\', '\\\\')
+                if content[0] in '!^':
+                    content = '^' + content[1:]
+                parts.append('[{}]'.format(content))
+                i = end + 1
+                continue
+        elif c == '\\' and i + 1 < n:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return ''.join(parts)
+
+
+def parse(lines, base=''):
+    """Parses the lines of an ignore file, following the gitignore syntax: blank lines and # comments are skipped,
+    ! negates, a trailing / only matches directories, and a pattern holding a / is anchored to the ignore file's
+    directory, else matches at any depth below it
+
+    Args:
+        lines (list): Ignore file lines
+        base (str): Directory of the ignore file, relative to the root walked, with forward slashes
+
+    Returns:
+        list: (compiled expression, negated?, directories only?) tuples
+    """
+    prefix = re.escape(base + '/') if base else ''
+    patterns = []
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if not line.endswith('\\ '):
+            line = line.rstrip()
+        if not line or line.startswith('#'):
+            continue
+        negate = line.startswith('!')
+        if negate:
+            line = line[1:]
+        elif line.startswith('\\#') or line.startswith('\\!'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+        anchored = '/' in line
+        expression = '^{}{}{}$'.format(prefix, '' if anchored else '(?:.*/)?', translate(line.lstrip('/')))
+        try:
+            patterns.append((re.compile(expression, PATTERN_FLAGS), negate, dir_only))
+        except re.error:
+            continue
+    return patterns
+
+
+class IgnoreRules(object):
+    """
+    Ignore patterns applying to the entries of a directory: the default patterns, then the patterns of the ignore
+    file of every directory from the root walked down to it. The last matching pattern wins.
+    Immutable, every directory holding an ignore file extends the rules of its parent.
+    """
+
+    __slots__ = ('patterns', 'key')
+
+    def __init__(self, patterns=(), key=''):
+        """Constructor
+
+        Args:
+            patterns (tuple): (compiled expression, negated?, directories only?) tuples
+            key (str): Identifies the patterns, changes whenever they change
+        """
+        self.patterns = patterns
+        self.key = key
+
+    def extend(self, lines, base, key):
+        """Returns the rules extended with the patterns of an ignore file
+
+        Args:
+            lines (list): Ignore file lines
+            base (str): Directory of the ignore file, relative to the root walked
+            key (str): Identifies the ignore file version
+
+        Returns:
+            IgnoreRules: Extended rules
+        """
+        return IgnoreRules(self.patterns + tuple(parse(lines, base)), '{}|{}'.format(self.key, key))
+
+    def ignored(self, relative_path, is_dir):
+        """Returns True if an entry is ignored
+
+        Args:
+            relative_path (str): Entry path, relative to the root walked, with forward slashes
+            is_dir (bool): Is the entry a directory?
+        """
+        ignored = False
+        for expression, negate, dir_only in self.patterns:
+            if ignored == negate and (is_dir or not dir_only) and expression.match(relative_path):
+                ignored = not negate
+        return ignored
+
+
+class ScanRules(object):
+    """
+    Ignore rules and limits applied while walking script trees, so pruned directories are never listed.
+
+    Directories are pruned by the default ignore patterns and the .sharedtoolboxignore files found on the way, in
+    the gitignore syntax. Directories deeper than max_depth below the root are not listed, and the walks of a root,
+    ie: of all its projects, stop once max_entries directories and scripts were listed. Limits of 0 are unlimited.
+    """
+
+    def __init__(self, max_depth=0, max_entries=0, patterns=DEFAULT_IGNORE_PATTERNS):
+        """Constructor
+
+        Args:
+            max_depth (int): Directory levels listed below the root, 0 for unlimited
+            max_entries (int): Directories and scripts listed per root at most, 0 for unlimited
+            patterns (tuple): Patterns ignored in every root. Defaults to DEFAULT_IGNORE_PATTERNS
+        """
+        self.max_depth = max(0, max_depth or 0)
+        self.max_entries = max(0, max_entries or 0)
+        patterns_key = hashlib.sha1(repr(tuple(patterns)).encode('utf-8')).hexdigest()
+        self.root_rules = IgnoreRules().extend(patterns, '', patterns_key)
+        self._ignore_files = {}  # Path key: (mtime, lines)
+        self._lock = threading.Lock()
+
+    def ignore_rules(self, root, path, parent_rules, has_ignore_file=True):
+        """Returns the rules applying to the entries of a directory
+
+        Args:
+            root (str): Root walked
+            path (str): Directory path
+            parent_rules (IgnoreRules): Rules applying to the directory itself
+            has_ignore_file (bool): Does the directory hold an ignore file? The file is only read if True
+
+        Returns:
+            IgnoreRules: Rules
+        """
+        if not has_ignore_file:
+            return parent_rules
+        file_path = os.path.join(path, IGNORE_FILE_NAME)
+        key = pathUtils.normalize_path(file_path)
+        try:
+            mtime = os.stat(file_path).st_mtime
+            with self._lock:
+                cached = self._ignore_files.get(key)
+            if cached is None or cached[0] != mtime:
+                with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                    cached = (mtime, f.readlines())
+                with self._lock:
+                    self._ignore_files[key] = cached
+        except OSError:
+            return parent_rules
+        return parent_rules.extend(cached[1], self.relative_path(root, path), '{}@{}'.format(key, mtime))
+
+    def relative_path(self, root, path):
+        """Returns the path of a directory relative to the root walked, with forward slashes. Empty for the root"""
+        relative_path = os.path.relpath(path, root)
+        return '' if relative_path == os.curdir else relative_path.replace(os.sep, '/')
+
+    def key(self, rules, depth):
+        """Returns the key of the rules and limits applied to a directory. Its indexed listing is only reused while
+        the key did not change
+
+        Args:
+            rules (IgnoreRules): Rules applying to the directory's entries
+            depth (int): Directory depth below the root
+        """
+        leaf = bool(self.max_depth and depth >= self.max_depth)
+        return hashlib.sha1('{}|{}'.format(rules.key, leaf).encode('utf-8')).hexdigest()[:16]
+
+    def apply(self, root, path, depth, rules, dirs, files):
+        """Returns the entries of a directory that are not pruned
+
+        Args:
+            root (str): Root walked
+            path (str): Directory path
+            depth (int): Directory depth below the root
+            rules (IgnoreRules): Rules applying to the directory's entries
+            dirs (list): [(directory name, directory path)]
+            files (list): Script names
+
+        Returns:
+            list, list: [(directory name, directory path)], script names
+        """
+        base = self.relative_path(root, path)
+        prefix = base + '/' if base else ''
+        if self.max_depth and depth >= self.max_depth:
+            dirs = []
+        else:
+            dirs = [(name, dir_path) for name, dir_path in dirs if not rules.ignored(prefix + name, True)]
+        files = [name for name in files if not rules.ignored(prefix + name, False)]
+        return dirs, files
+
+    def resolve(self, root, path):
+        """Resolves the rules of a directory outside of a walk, from the root down to it
+
+        Args:
+            root (str): Root walked
+            path (str): Directory path
+
+        Returns:
+            IgnoreRules, int: Rules applying to the directory's entries, directory depth.
+                None, None if the directory is pruned, or not below the root
+        """
+        relative_path = self.relative_path(root, path)
+        if relative_path.startswith('..') or os.path.isabs(relative_path):
+            return None, None
+        names = relative_path.split('/') if relative_path else []
+        current = root
+        rules = self.ignore_rules(root, current, self.root_rules)
+        for depth, name in enumerate(names):
+            if (self.max_depth and depth >= self.max_depth) or rules.ignored('/'.join(names[:depth + 1]), True):
+                return None, None
+            current = os.path.join(current, name)
+            rules = self.ignore_rules(root, current, rules)
+        return rules, len(names)
+
+    def filter_listing(self, root, path, dirs, files):
+        """Returns the entries of a directory listed outside of a walk that are not pruned, ie: listed on expand
+
+        Args:
+            root (str): Root walked
+            path (str): Directory path
+            dirs (list): [(directory name, directory path)]
+            files (list): Script names
+
+        Returns:
+            list, list: [(directory name, directory path)], script names. Empty if the directory is pruned
+        """
+        rules, depth = self.resolve(root, path)
+        if rules is None:
+            return [], []
+        return self.apply(root, path, depth, rules, dirs, files)
+
+
+# ______________________________________________________________________________________________________________________
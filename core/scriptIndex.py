@@ -0,0 +1,87 @@
+# System Imports
+import os
+import sys
+import json
+import hashlib
+
+# Third-Party Imports
+
+# Local Imports
+from sharedtoolbox.utils import pathUtils
+
+# ______________________________________________________________________________________________________________________
+
+
+class ScriptIndex(object):
+    """
+    Persisted scan of a script root: every directory listed, with its mtime.
+
+    A directory's mtime changes whenever an entry is added, removed or renamed in it, so a directory whose mtime
+    did not change since the last scan can reuse its indexed listing instead of being listed again.
+    Listings are indexed once pruned by the scan rules, along with the key of the rules applied.
+    """
+
+    VERSION = 2
+
+    def __init__(self, index_path, root):
+        """Constructor
+
+        Args:
+            index_path (str): Folder holding the index files
+            root (str): Script root indexed
+        """
+        self.root = root
+        self.file_path = os.path.join(
+            index_path, '{}.json'.format(hashlib.sha1(pathUtils.normalize_path(root).encode('utf-8')).hexdigest()))
+        self.dirs = {}  # Path key: {'path': str, 'mtime': float, 'dirs': [[name, path]], 'files': [names],
+                        #            'ignore': holds an ignore file?, 'rules': key of the scan rules applied}
+
+    def load(self):
+        """Loads the index file
+
+        Returns:
+            bool: True if an index was loaded
+        """
+        try:
+            with open(self.file_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != self.VERSION or pathUtils.normalize_path(data.get('root', '')) != pathUtils.normalize_path(self.root):
+            return False
+        self.dirs = data.get('dirs', {})
+        return True
+
+    def save(self):
+        """Writes the index file. The previous file is only replaced once the new one is complete"""
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        tmp_path = self.file_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': self.VERSION, 'root': self.root, 'dirs': self.dirs}, f)
+        os.replace(tmp_path, self.file_path)
+
+    def get(self, path):
+        """Returns the indexed entry of a directory, None if not indexed"""
+        return self.dirs.get(pathUtils.normalize_path(path))
+
+    def listings(self):
+        """Iterates over the indexed listings, parents first
+
+        Yields:
+            str, list, list: Directory path, [(directory name, directory path)], script names
+        """
+        root_entry = self.get(self.root)
+        if root_entry is None:
+            return
+        stack = [root_entry]
+        while stack:
+            entry = stack.pop()
+            dirs = [tuple(x) for x in entry['dirs']]
+            yield entry['path'], dirs, entry['files']
+            for name, dir_path in reversed(dirs):
+                child = self.get(dir_path)
+                if child is not None:
+                    stack.append(child)
+
+
+# ______________________________________________________________________________________________________________________
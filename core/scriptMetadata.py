@@ -0,0 +1,247 @@
+# System Imports
+import os
+import re
+import ast
+import sys
+import json
+import queue
+import inspect
+import tokenize
+import threading
+
+# Third-Party Imports
+from qtpy.QtCore import QObject, Signal
+
+# Local Imports
+
+# ______________________________________________________________________________________________________________________
+
+
+TAG_PATTERN = re.compile(r'^\s*(author|tags|dcc)\s*:\s*(.*?)\s*$', re.IGNORECASE | re.MULTILINE)
+DESCRIPTION_PATTERN = re.compile(r'^\s*description\s*:\s*(.+?)\s*$', re.IGNORECASE | re.MULTILINE)
+CODING_PATTERN = re.compile(r'^#.*coding[:=]')
+
+
+def extract(path):
+    """Extracts the metadata of a script from its header: the module docstring, the comments above it, and the
+    author, tags and dcc header tags found in either. Only the header is read, up to the first statement.
+    The description is the value of a "Description :" header tag, else the first paragraph of the docstring or
+    comments
+
+    Args:
+        path (str): Script path
+
+    Returns:
+        dict: {'description': str, 'doc': str, 'comments': str, 'author': str, 'tags': [str], 'dcc': [str]}.
+            None if unreadable
+    """
+    comments = []
+    strings = []
+    doc = ''
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for token in tokenize.generate_tokens(f.readline):
+                if token.type == tokenize.COMMENT:
+                    if not strings and not (token.start[0] == 1 and token.string.startswith('#!')) \
+                            and not CODING_PATTERN.match(token.string):
+                        comments.append(token.string[1:].strip())
+                elif token.type == tokenize.STRING:
+                    strings.append(token.string)
+                elif token.type == tokenize.NEWLINE and strings:
+                    # The first statement is a string: the module docstring
+                    doc = ast.literal_eval(' '.join(strings))
+                    break
+                elif token.type not in (tokenize.NL, tokenize.NEWLINE):
+                    break
+    except (OSError, SyntaxError, ValueError, tokenize.TokenError):
+        if not comments and not doc:
+            return None
+    doc = inspect.cleandoc(doc) if isinstance(doc, str) else ''
+    comments = '\n'.join(comments).strip()
+
+    match = DESCRIPTION_PATTERN.search(doc) or DESCRIPTION_PATTERN.search(comments)
+    if match is not None:
+        description = match.group(1)
+    else:
+        description = TAG_PATTERN.sub('', doc or comments).strip().split('\n\n')[0].strip()
+
+    metadata = {'description': description, 'doc': doc, 'comments': comments, 'author': '', 'tags': [], 'dcc': []}
+    for name, value in TAG_PATTERN.findall(comments + '\n' + doc):
+        name = name.lower()
+        if name == 'author':
+            metadata['author'] = metadata['author'] or value
+        else:
+            metadata[name].extend(x for x in re.split(r'[,;\s]+', value.lower()) if x and x not in metadata[name])
+    return metadata
+
+
+def summary(metadata):
+    """Returns the description of a script's metadata, used as tooltip
+
+    Args:
+        metadata (dict): Script metadata, see extract
+
+    Returns:
+        str: Description, empty if the script has no metadata
+    """
+    lines = []
+    if metadata.get('description'):
+        lines.append(metadata['description'])
+    if metadata.get('author'):
+        lines.append('Author: {}'.format(metadata['author']))
+    if metadata.get('tags'):
+        lines.append('Tags: {}'.format(', '.join(metadata['tags'])))
+    if metadata.get('dcc'):
+        lines.append('DCC: {}'.format(', '.join(metadata['dcc'])))
+    return '\n'.join(lines)
+
+
+class MetadataCache(object):
+    """
+    Persisted metadata of the scripts, keyed by path. An entry is only valid while the script's mtime matches
+    """
+
+    VERSION = 1
+
+    def __init__(self, file_path):
+        """Constructor
+
+        Args:
+            file_path (str): Cache file
+        """
+        self.file_path = file_path
+        self.scripts = {}  # Path: [mtime, metadata]
+
+    def load(self):
+        """Loads the cache file
+
+        Returns:
+            bool: True if a cache was loaded
+        """
+        try:
+            with open(self.file_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != self.VERSION:
+            return False
+        self.scripts = data.get('scripts', {})
+        return True
+
+    def save(self):
+        """Writes the cache file. The previous file is only replaced once the new one is complete"""
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        tmp_path = self.file_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': self.VERSION, 'scripts': self.scripts}, f)
+        os.replace(tmp_path, self.file_path)
+
+    def get(self, path, mtime):
+        """Returns the cached metadata of a script, None if not cached or outdated"""
+        entry = self.scripts.get(path)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+        return None
+
+    def set(self, path, mtime, metadata):
+        """Caches the metadata of a script"""
+        self.scripts[path] = [mtime, metadata]
+
+    def discard(self, path):
+        """Removes a script from the cache
+
+        Returns:
+            bool: True if the script was cached
+        """
+        return self.scripts.pop(path, None) is not None
+
+
+class MetadataExtractor(QObject):
+    """
+    Extracts the metadata of scripts on a worker thread, reusing the cached metadata of the scripts whose mtime
+    did not change. Metadata is streamed back in batches through metadataReady, only when it changed since last
+    emitted. The cache is saved once idle
+    """
+
+    metadataReady = Signal(object)  # {path: metadata}
+
+    BATCH_SIZE = 500  # Scripts
+
+    def __init__(self, cache_path, *args, **kwargs):
+        """Constructor
+
+        Args:
+            cache_path (str): Cache file
+        """
+        super(MetadataExtractor, self).__init__(*args, **kwargs)
+        self.cache = MetadataCache(cache_path)
+        self._emitted = {}  # Path: mtime of the metadata last emitted
+        self._jobs = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='MetadataExtractor', daemon=True)
+        self._thread.start()
+
+    def request(self, paths):
+        """Extracts the metadata of scripts. A newer request stops the running one
+
+        Args:
+            paths (list): Every script path
+        """
+        self._jobs.put(('request', [os.path.normpath(path) for path in paths]))
+
+    def request_file(self, path):
+        """Extracts the metadata of a script again, ie: once saved
+
+        Args:
+            path (str): Script path
+        """
+        self._jobs.put(('file', [os.path.normpath(path)]))
+
+    def reset(self):
+        """Emits the metadata of the next requests again, ie: once the model was rebuilt"""
+        self._jobs.put(('reset', None))
+
+    def _pending_request(self):
+        """Returns True if a newer request or reset is queued, the current request is then stopped"""
+        return any(job[0] in ('request', 'reset') for job in list(self._jobs.queue))
+
+    def _run(self):
+        """Worker thread loop"""
+        self.cache.load()
+        dirty = False
+        while True:
+            kind, paths = self._jobs.get()
+            if kind == 'reset':
+                self._emitted = {}
+                continue
+            batch = {}
+            for path in paths:
+                if kind == 'request' and self._pending_request():
+                    break
+                try:
+                    mtime = os.stat(path).st_mtime
+                except OSError:
+                    dirty = self.cache.discard(path) or dirty
+                    continue
+                if self._emitted.get(path) == mtime:
+                    continue
+                metadata = self.cache.get(path, mtime)
+                if metadata is None:
+                    metadata = extract(path) or {}
+                    self.cache.set(path, mtime, metadata)
+                    dirty = True
+                self._emitted[path] = mtime
+                batch[path] = metadata
+                if len(batch) >= self.BATCH_SIZE:
+                    self.metadataReady.emit(batch)
+                    batch = {}
+            if batch:
+                self.metadataReady.emit(batch)
+            if dirty and self._jobs.empty():
+                try:
+                    self.cache.save()
+                except OSError:
+                    pass
+                dirty = False
+
+
+# ______________________________________________________________________________________________________________________
@@ -0,0 +1,404 @@
+# System Imports
+import io
+import os
+import sys
+import json
+import queue
+import hashlib
+import threading
+
+# Third-Party Imports
+
+# Local Imports
+from sharedtoolbox.utils import pathUtils
+
+# ______________________________________________________________________________________________________________________
+
+
+def content_hash(data):
+    """Returns the hash validating the content of a file
+
+    Args:
+        data (bytes): File content
+
+    Returns:
+        str: sha1 hex digest
+    """
+    return hashlib.sha1(data).hexdigest()
+
+
+class ScriptMirror(object):
+    """
+    Read-through local copy of a script library, ie: the shared scripts on a network share.
+
+    Scripts are read from the mirror once mirrored, and mirrored on their first read. Every mirrored copy is
+    validated against the hash of the content it was copied from, an invalid copy is read again from the library.
+    A valid copy is served right away, then revalidated against the library on the worker thread, so a slow share
+    never blocks a read. A background pass revalidates the whole mirror: only the scripts whose mtime or size
+    changed are read, and only the ones whose content changed are copied. Scripts found changed are reported
+    through event_handler.file_changed_on_disk. While the library is unreachable, the last good copies keep being
+    served.
+    The manifest is written by the worker thread, once idle.
+    The mirrored library follows the source function, ie: the shared script path of the current profile.
+    """
+
+    VERSION = 1
+
+    def __init__(self, mirror_path, source, event_handler=None):
+        """Constructor
+
+        Args:
+            mirror_path (str): Folder holding the mirrors, one per library
+            source: Function returning the library path to mirror, None to disable mirroring
+            event_handler (EventHandler): Receives file_changed_on_disk, optional
+        """
+        self.mirror_path = mirror_path
+        self._source_function = source
+        self.event_handler = event_handler
+        self._lock = threading.RLock()
+        self.source = None
+        self.root = None  # Folder of the current library's mirror
+        self._files = {}  # Relative path: {'hash': str, 'mtime': float, 'size': int}
+        self._dirty = False  # Manifest changed since written?
+        self._jobs = queue.Queue()
+        self._thread = None
+
+    # Paths
+
+    def _update_source(self):
+        """Switches to the mirror of the current library, if it changed"""
+        source = self._source_function()
+        with self._lock:
+            if source == self.source:
+                return
+            self._save()
+            self.source = source
+            self._files = {}
+            self.root = None
+            if not source:
+                return
+            self.root = os.path.join(self.mirror_path,
+                                     hashlib.sha1(pathUtils.normalize_path(source).encode('utf-8')).hexdigest())
+            try:
+                with open(os.path.join(self.root, 'manifest.json'), 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                return
+            if data.get('version') == self.VERSION and \
+                    pathUtils.normalize_path(data.get('source', '')) == pathUtils.normalize_path(source):
+                self._files = data.get('files', {})
+
+    def relative_path(self, path):
+        """Returns the path of a script relative to the mirrored library
+
+        Returns:
+            str: Relative path, with forward slashes. None if the script is not in the library
+        """
+        self._update_source()
+        source = self.source
+        if not source:
+            return None
+        key = pathUtils.normalize_path(path)
+        source_key = os.path.join(pathUtils.normalize_path(source), '')
+        if not key.startswith(source_key):
+            return None
+        return os.path.normpath(path)[len(source_key):].replace('\\', '/')
+
+    def local_path(self, relative_path):
+        """Returns the path of a script's mirrored copy"""
+        return os.path.join(self.root, 'files', *relative_path.split('/'))
+
+    def exists(self, path):
+        """Returns True if a script is mirrored, or found on disk. Mirrored scripts are checked first, so an
+        unreachable library does not block
+
+        Args:
+            path (str): Script path
+        """
+        relative_path = self.relative_path(path)
+        with self._lock:
+            if relative_path is not None and relative_path in self._files \
+                    and os.path.isfile(self.local_path(relative_path)):
+                return True
+        return os.path.isfile(path)
+
+    # Reads
+
+    def read(self, path):
+        """Returns the content of a script, from its mirrored copy when valid, else from the script itself.
+        A served copy is revalidated against the library on the worker thread
+
+        Args:
+            path (str): Script path
+
+        Raises:
+            OSError: The script is not mirrored, and cannot be read
+
+        Returns:
+            bytes: Content
+        """
+        relative_path = self.relative_path(path)
+        if relative_path is None:
+            with open(path, 'rb') as f:
+                return f.read()
+        with self._lock:
+            entry = self._files.get(relative_path)
+        if entry is not None:
+            try:
+                with open(self.local_path(relative_path), 'rb') as f:
+                    data = f.read()
+                if content_hash(data) == entry['hash']:
+                    self._put(('revalidate', path))
+                    return data
+                # Invalid copy, copied again
+                os.remove(self.local_path(relative_path))
+            except OSError:
+                pass
+        data = self.fetch(path)
+        if data is None:
+            raise OSError('Cannot read "{}"'.format(path))
+        self._put(('save', None))
+        return data
+
+    def version(self, path):
+        """Returns the version of a script: the mtime and size of the script its mirrored copy was copied from, as
+        last revalidated, else of the script itself
+
+        Args:
+            path (str): Script path
+
+        Returns:
+            tuple: mtime, size. None if unknown
+        """
+        relative_path = self.relative_path(path)
+        if relative_path is not None:
+            with self._lock:
+                entry = self._files.get(relative_path)
+            if entry is not None:
+                return entry['mtime'], entry['size']
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size
+
+    def read_text(self, path):
+        """Returns the content of a script as text, decoded like a file opened in text mode
+
+        Args:
+            path (str): Script path
+
+        Raises:
+            OSError: The script is not mirrored, and cannot be read
+
+        Returns:
+            str: Content
+        """
+        return io.TextIOWrapper(io.BytesIO(self.read(path))).read()
+
+    def fetch(self, path, stat=None):
+        """Copies a script of the library to the mirror, if its content changed
+
+        Args:
+            path (str): Script path
+            stat (os.stat_result): Stat of the script, optional
+
+        Returns:
+            bytes: Content. None if the script cannot be read
+        """
+        relative_path = self.relative_path(path)
+        with self._lock:
+            root = self.root
+        try:
+            stat = stat or os.stat(path)
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        if relative_path is None:
+            return data
+        digest = content_hash(data)
+        with self._lock:
+            if root is None or root != self.root:
+                # Library switched meanwhile
+                return data
+            entry = self._files.get(relative_path)
+            local_path = self.local_path(relative_path)
+            if entry is None or entry['hash'] != digest or not os.path.isfile(local_path):
+                try:
+                    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                    tmp_path = local_path + '.tmp'
+                    with open(tmp_path, 'wb') as f:
+                        f.write(data)
+                    os.replace(tmp_path, local_path)
+                except OSError:
+                    return data
+            self._files[relative_path] = {'hash': digest, 'mtime': stat.st_mtime, 'size': stat.st_size}
+            self._dirty = True
+        return data
+
+    # Revalidation
+
+    def revalidate(self, path):
+        """Copies a mirrored script again if it changed in the library since mirrored, ie: once its copy was served.
+        Nothing changes while the library is unreachable
+
+        Args:
+            path (str): Script path
+
+        Returns:
+            bool: True if the script changed
+        """
+        relative_path = self.relative_path(path)
+        if relative_path is None:
+            return False
+        with self._lock:
+            entry = self._files.get(relative_path)
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+            return False
+        if self.fetch(path, stat) is None:
+            return False
+        self._changed(path)
+        return True
+
+    def sync(self, paths, cancelled=None):
+        """Revalidates the mirror against the library. Only the scripts whose mtime or size changed are read.
+        Scripts not listed are removed from the mirror once confirmed gone from the library, as listings may be
+        partial, ie: truncated by the scan limits
+
+        Args:
+            paths (list): Every script path of the library
+            cancelled: Function returning True to stop, optional
+
+        Returns:
+            int: Number of scripts copied or removed
+        """
+        self._update_source()
+        with self._lock:
+            source, root = self.source, self.root
+        if not source or not os.path.isdir(source):
+            # Unreachable, keep the last good copies
+            return 0
+        count = 0
+        listed = set()
+        for path in paths:
+            if cancelled is not None and cancelled():
+                return count
+            relative_path = self.relative_path(path)
+            if relative_path is None:
+                continue
+            listed.add(relative_path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            with self._lock:
+                entry = self._files.get(relative_path)
+            if entry is not None and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size:
+                continue
+            before = entry['hash'] if entry is not None else None
+            if self.fetch(path, stat) is None:
+                continue
+            if entry is not None:
+                self._changed(path)
+            with self._lock:
+                entry = self._files.get(relative_path)
+            count += entry is not None and entry['hash'] != before
+
+        with self._lock:
+            unlisted = set(self._files).difference(listed) if root == self.root else set()
+        gone = set()
+        for relative_path in unlisted:
+            if cancelled is not None and cancelled():
+                break
+            if not os.path.lexists(os.path.join(source, *relative_path.split('/'))):
+                gone.add(relative_path)
+        if gone and not os.path.isdir(source):
+            # Became unreachable meanwhile, the scripts may not be gone
+            gone = set()
+
+        with self._lock:
+            if root != self.root:
+                return count
+            for relative_path in gone:
+                if self._files.pop(relative_path, None) is None:
+                    continue
+                try:
+                    os.remove(self.local_path(relative_path))
+                except OSError:
+                    pass
+                self._dirty = True
+                count += 1
+        return count
+
+    def request_sync(self, paths):
+        """Revalidates the mirror on a worker thread. A newer request stops the running one
+
+        Args:
+            paths: Iterable of every script path of the library, iterated on the worker thread
+        """
+        self._put(('sync', paths))
+
+    def update_file(self, path):
+        """Copies a script to the mirror if it is in the library, ie: once saved
+
+        Args:
+            path (str): Script path
+        """
+        if self.relative_path(path) is None:
+            return
+        if self.fetch(path) is not None:
+            self._put(('save', None))
+
+    def _put(self, job):
+        """Queues a job, starting the worker thread if needed"""
+        with self._lock:
+            self._jobs.put(job)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='ScriptMirror', daemon=True)
+                self._thread.start()
+
+    def _pending_sync(self):
+        """Returns True if a newer sync is queued, the current sync is then stopped"""
+        return any(job[0] == 'sync' for job in list(self._jobs.queue))
+
+    def _changed(self, path):
+        """Reports a script changed in the library since mirrored"""
+        if self.event_handler is not None:
+            self.event_handler.file_changed_on_disk.emit(os.path.normpath(path))
+
+    def _run(self):
+        """Worker thread loop. The manifest is written once no job is left"""
+        while True:
+            kind, value = self._jobs.get()
+            if kind == 'sync':
+                self.sync(value, cancelled=self._pending_sync)
+            elif kind == 'revalidate':
+                self.revalidate(value)
+            if self._jobs.empty():
+                self._save()
+
+    def _save(self):
+        """Writes the manifest of the current mirror if it changed, ignoring write errors"""
+        with self._lock:
+            if not self._dirty or self.root is None:
+                return
+            self._dirty = False
+            root = self.root
+            try:
+                os.makedirs(root, exist_ok=True)
+                tmp_path = os.path.join(root, 'manifest.json.tmp')
+                with open(tmp_path, 'w') as f:
+                    json.dump({'version': self.VERSION, 'source': self.source, 'files': self._files}, f)
+                os.replace(tmp_path, os.path.join(root, 'manifest.json'))
+            except OSError:
+                pass
+
+
+# ______________________________________________________________________________________________________________________
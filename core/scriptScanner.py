@@ -0,0 +1,405 @@
+# System Imports
+import os
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Third-Party Imports
+from qtpy.QtCore import QObject, Signal
+
+# Local Imports
+from sharedtoolbox.core import scanRules
+from sharedtoolbox.utils import pathUtils
+
+# ______________________________________________________________________________________________________________________
+
+
+def scan_dir(path):
+    """Lists the sub-directories and python scripts of a directory, and whether it holds an ignore file
+
+    Args:
+        path (str): Directory path
+
+    Returns:
+        list, list, bool: Sorted directory names, sorted script names, holds an ignore file?
+        None, None, False if the directory cannot be listed
+    """
+    dirs = []
+    files = []
+    has_ignore_file = False
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        dirs.append(entry.name)
+                    elif entry.name.endswith('.py'):
+                        files.append(entry.name)
+                    elif entry.name == scanRules.IGNORE_FILE_NAME:
+                        has_ignore_file = True
+                except OSError:
+                    continue
+    except OSError:
+        return None, None, False
+    dirs.sort(key=str.lower)
+    files.sort(key=str.lower)
+    return dirs, files, has_ignore_file
+
+
+def list_dir(path):
+    """Lists the sub-directories and python scripts of a directory
+
+    Args:
+        path (str): Directory path
+
+    Returns:
+        list, list: Sorted directory names, sorted script names. None, None if the directory cannot be listed
+    """
+    dirs, files, has_ignore_file = scan_dir(path)
+    return dirs, files
+
+
+def share_of(path):
+    """Returns the share or drive holding a path, ie: \\\\server\\share or c:. Concurrency is limited per share
+
+    Args:
+        path (str): Path
+
+    Returns:
+        str: Normalized share or drive. os.sep when paths have no drive
+    """
+    return os.path.normcase(os.path.splitdrive(os.path.abspath(path))[0]) or os.sep
+
+
+def read_dir(path, index=None, entries=None, rules=None, root=None, depth=0, ignore_rules=None):
+    """Lists a directory, reusing its indexed listing when its mtime, and the rules applied to it, did not change
+
+    Args:
+        path (str): Directory path
+        index (ScriptIndex): Previous scan, optional
+        entries (dict): Filled with the index entry of the directory, optional
+        rules (ScanRules): Rules pruning the listing, optional
+        root (str): Root walked, required with rules
+        depth (int): Directory depth below the root
+        ignore_rules (IgnoreRules): Ignore rules applying to the directory itself, required with rules
+
+    Returns:
+        list, list, bool, IgnoreRules: [(directory name, directory path)], script names, listed again?,
+        ignore rules applying to the directory's entries. None, None, False, None if the directory cannot be listed
+    """
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None, None, False, None
+    entry = index.get(path) if index is not None else None
+    child_rules, rules_key = None, None
+    if entry is not None and entry['mtime'] == mtime and rules is not None:
+        child_rules = rules.ignore_rules(root, path, ignore_rules, entry.get('ignore', False))
+        rules_key = rules.key(child_rules, depth)
+    if entry is not None and entry['mtime'] == mtime and entry.get('rules') == rules_key:
+        dirs, files, has_ignore_file, changed = [tuple(x) for x in entry['dirs']], entry['files'], \
+            entry.get('ignore', False), False
+    else:
+        names, files, has_ignore_file = scan_dir(path)
+        if names is None:
+            return None, None, False, None
+        dirs, changed = [(name, os.path.join(path, name)) for name in names], True
+        if rules is not None:
+            child_rules = rules.ignore_rules(root, path, ignore_rules, has_ignore_file)
+            rules_key = rules.key(child_rules, depth)
+            dirs, files = rules.apply(root, path, depth, child_rules, dirs, files)
+    if entries is not None:
+        entries[pathUtils.normalize_path(path)] = {'path': path, 'mtime': mtime, 'dirs': dirs, 'files': files,
+                                               'ignore': has_ignore_file, 'rules': rules_key}
+    return dirs, files, changed, child_rules
+
+
+class EntryBudget(object):
+    """
+    Directories and scripts a scan may still list. Charged in walk order, see charge(), so the same entries are
+    listed by every scan. Thread safe
+    """
+
+    def __init__(self, count):
+        """Constructor
+
+        Args:
+            count (int): Directories and scripts listed at most
+        """
+        self.remaining = count
+        self._lock = threading.Lock()
+
+    @property
+    def exhausted(self):
+        return self.remaining <= 0
+
+    def take(self, count):
+        """Takes entries from the budget
+
+        Args:
+            count (int): Entries wanted
+
+        Returns:
+            int: Entries granted, less than wanted once the budget runs out
+        """
+        with self._lock:
+            taken = min(count, max(0, self.remaining))
+            self.remaining -= taken
+            return taken
+
+
+def walk_dirs(root, index=None, entries=None, slots=None, rules=None, stop=None):
+    """Walks a script tree top-down, yielding every directory read. Parents are always read before their children
+
+    Args:
+        root (str): Root directory
+        index (ScriptIndex): Previous scan, optional. Directories whose mtime did not change are not listed again
+        entries (dict): Filled with the index entry of every directory read, optional
+        slots (threading.Semaphore): Held while reading each directory, to limit the reads of a share, optional
+        rules (ScanRules): Ignore rules and depth limit, optional. Pruned directories are never read
+        stop: Function returning True to stop the walk, optional
+
+    Yields:
+        str, list, list, bool: Directory path, [(directory name, directory path)], script names, listed again?
+    """
+    stack = [(root, 0, rules.root_rules if rules is not None else None)]
+    while stack:
+        if stop is not None and stop():
+            return
+        path, depth, ignore_rules = stack.pop()
+        if slots is None:
+            dirs, files, changed, child_rules = read_dir(path, index, entries, rules, root, depth, ignore_rules)
+        else:
+            with slots:
+                dirs, files, changed, child_rules = read_dir(path, index, entries, rules, root, depth, ignore_rules)
+        if dirs is None:
+            continue
+        yield path, dirs, files, changed
+        stack.extend((dir_path, depth + 1, child_rules) for name, dir_path in reversed(dirs))
+
+
+def charge(listings, budget):
+    """Charges directory listings to an entry budget, in order, until it runs out
+
+    Args:
+        listings: Iterable of (directory path, [(directory name, directory path)], script names, listed again?)
+        budget (EntryBudget): Budget, None for no limit
+
+    Yields:
+        str, list, list, bool: The listings charged. A listing overflowing the budget ends them as
+            (directory path, None, None, True): partial, the directory is then listed in full on expand
+    """
+    for path, dirs, files, changed in listings:
+        if budget is not None:
+            count = len(dirs) + len(files)
+            if budget.take(count) < count:
+                yield path, None, None, True
+                return
+        yield path, dirs, files, changed
+        if budget is not None and budget.exhausted:
+            return
+
+
+def walk_scripts(root, index=None, entries=None, slots=None, rules=None):
+    """Walks a script tree top-down. Parents are always listed before their children
+
+    Args:
+        root (str): Root directory
+        index (ScriptIndex): Previous scan, optional. Directories whose mtime did not change are not listed again,
+            and not yielded
+        entries (dict): Filled with the index entry of every directory walked, optional
+        slots (threading.Semaphore): Held while reading each directory, to limit the reads of a share, optional
+        rules (ScanRules): Ignore rules and limits, optional. Pruned directories are never listed. Once max_entries
+            directories and scripts were walked, the walk stops, the directories left are listed on expand
+
+    Yields:
+        str, list, list: Directory path, [(directory name, directory path)], script names.
+            None listings for a directory truncated by max_entries, see charge()
+    """
+    budget = EntryBudget(rules.max_entries) if rules is not None and rules.max_entries else None
+    for path, dirs, files, changed in charge(walk_dirs(root, index, entries, slots, rules), budget):
+        if dirs is None and entries is not None:
+            # Partial, listed again by the next scan
+            entries.pop(pathUtils.normalize_path(path), None)
+        if changed:
+            yield path, dirs, files
+
+
+class ScriptScanner(QObject):
+    """
+    Scans script trees on worker threads.
+    Listings are streamed back to the GUI thread in batches, through batchReady. Starting a new generation
+    cancels every scan still running.
+    Directory reads are limited per share: every scan of a share holds one of its slots while reading a directory,
+    so roots sharing a share also share its limit.
+    Directories truncated by the scan limits are emitted with None listings, they are listed in full on expand.
+    """
+
+    rootStarted = Signal(int, str)  # Generation, root key
+    batchReady = Signal(int, str, object)  # Generation, root key, list of (path, [(name, path)], [script names])
+    rootFinished = Signal(int, str)  # Generation, root key
+
+    BATCH_INTERVAL = 0.05  # s
+    BATCH_SIZE = 200  # Listings
+
+    def __init__(self, *args, **kwargs):
+        super(ScriptScanner, self).__init__(*args, **kwargs)
+        self.generation = 0
+        self._slots = {}  # (share, concurrency): BoundedSemaphore
+        self._slots_lock = threading.Lock()
+
+    def cancel(self):
+        """Cancels every scan running. Their remaining batches are never emitted
+
+        Returns:
+            int: New generation
+        """
+        self.generation += 1
+        return self.generation
+
+    def slots(self, path, concurrency):
+        """Returns the semaphore limiting the directory reads of a path's share
+
+        Args:
+            path (str): Path on the share
+            concurrency (int): Concurrent directory reads allowed on the share
+
+        Returns:
+            threading.BoundedSemaphore: Semaphore
+        """
+        key = (share_of(path), max(1, concurrency))
+        with self._slots_lock:
+            slots = self._slots.get(key)
+            if slots is None:
+                slots = self._slots[key] = threading.BoundedSemaphore(key[1])
+            return slots
+
+    def scan(self, key, root, index=None, concurrency=1, rules=None):
+        """Scans a script tree in the background
+
+        Args:
+            key (str): Root key, passed back with the signals
+            root (str): Root directory
+            index (ScriptIndex): Previous scan, optional. Only the directories changed since are listed and emitted,
+                then the index is rewritten
+            concurrency (int): Concurrent directory reads allowed on the root's share. Defaults to 1
+            rules (ScanRules): Ignore rules and limits, optional
+        """
+        entries = {}
+        slots = self.slots(root, concurrency)
+        self._start(key, lambda: walk_scripts(root, index, entries, slots, rules), index, entries)
+
+    def scan_projects(self, key, project_root, script_location, index=None, concurrency=1, rules=None):
+        """Scans the script tree of every project in the background
+        The first listing holds the projects, as directories of project_root pointing to their script location.
+        Projects are walked concurrently by up to concurrency threads, their listings are emitted in project order.
+        max_entries is charged in project order too, so the same projects are truncated by every scan
+
+        Args:
+            key (str): Root key, passed back with the signals
+            project_root (str): Folder holding the projects
+            script_location (str): Script folder, relative to each project
+            index (ScriptIndex): Previous scan, optional. Only the directories changed since are listed and emitted,
+                then the index is rewritten
+            concurrency (int): Concurrent directory reads allowed on the project root's share. Defaults to 1
+            rules (ScanRules): Ignore rules and limits, applied to the script tree of each project, optional.
+                max_entries applies to the whole root, shared by the projects
+        """
+        entries = {}
+        slots = self.slots(project_root, concurrency)
+        limit = rules.max_entries if rules is not None else 0
+        budget = EntryBudget(limit) if limit else None
+        generation = self.generation
+
+        def stop():
+            return generation != self.generation or (budget is not None and budget.exhausted)
+
+        def walk_project(script_path):
+            # Only the listings charged to the budget are indexed
+            project_entries = {}
+            listings = []
+            count = 0
+            for listing in walk_dirs(script_path, index, project_entries, slots, rules, stop):
+                listings.append(listing)
+                count += len(listing[1]) + len(listing[2])
+                if limit and count >= limit:
+                    break
+            return listings, project_entries
+
+        def walk():
+            with slots:
+                project_dirs, files, changed, ignore_rules = read_dir(project_root, index, entries)
+            if project_dirs is None:
+                return
+            # The indexed listing already points to the script locations
+            script_dirs = [(name, os.path.join(project_root, name, script_location)) for name, path in project_dirs]
+            if changed or script_dirs != project_dirs:
+                entries[pathUtils.normalize_path(project_root)]['dirs'] = script_dirs
+                yield project_root, script_dirs, []
+            if not script_dirs:
+                return
+            executor = ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(script_dirs))),
+                                          thread_name_prefix='ScriptScanner-{}'.format(key))
+            futures = [executor.submit(walk_project, script_path) for name, script_path in script_dirs]
+            try:
+                for future in futures:
+                    listings, project_entries = future.result()
+                    for path, dirs, files, changed in charge(listings, budget):
+                        entry_key = pathUtils.normalize_path(path)
+                        if dirs is not None and entry_key in project_entries:
+                            entries[entry_key] = project_entries[entry_key]
+                        if changed:
+                            yield path, dirs, files
+                    if budget is not None and budget.exhausted:
+                        return
+            finally:
+                for future in futures:
+                    future.cancel()
+                executor.shutdown(wait=False)
+
+        self._start(key, walk, index, entries)
+
+    def _start(self, key, walk, index=None, entries=None):
+        """Runs a walk on a worker thread
+
+        Args:
+            key (str): Root key
+            walk: Function returning a listing generator
+            index (ScriptIndex): Index rewritten with entries once the walk completes, optional
+            entries (dict): Index entries filled by the walk, optional
+        """
+        generation = self.generation
+        self.rootStarted.emit(generation, key)
+        thread = threading.Thread(target=self._run, args=(generation, key, walk, index, entries),
+                                  name='ScriptScanner-{}'.format(key), daemon=True)
+        thread.start()
+
+    def _run(self, generation, key, walk, index=None, entries=None):
+        """Worker thread loop"""
+        batch = []
+        last_emit = time.monotonic()
+        try:
+            for listing in walk():
+                if generation != self.generation:
+                    return
+                batch.append(listing)
+                if len(batch) >= self.BATCH_SIZE or time.monotonic() - last_emit >= self.BATCH_INTERVAL:
+                    self.batchReady.emit(generation, key, batch)
+                    batch = []
+                    last_emit = time.monotonic()
+            if batch and generation == self.generation:
+                self.batchReady.emit(generation, key, batch)
+            # An unreachable root keeps its last index
+            if index is not None and entries and generation == self.generation:
+                index.dirs = entries
+                try:
+                    index.save()
+                except OSError:
+                    pass
+        finally:
+            if generation == self.generation:
+                self.rootFinished.emit(generation, key)
+
+
+# ______________________________________________________________________________________________________________________
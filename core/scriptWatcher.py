@@ -0,0 +1,96 @@
+# System Imports
+import os
+import sys
+
+# Third-Party Imports
+from qtpy.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
+
+# Local Imports
+
+# ______________________________________________________________________________________________________________________
+
+
+DRIVE_REMOTE = 4  # GetDriveType
+
+
+def is_network_path(path):
+    """Returns True if a path is on a network share: UNC paths, and mapped network drives on Windows
+
+    Args:
+        path (str): Path
+
+    Returns:
+        bool: Is a network path?
+    """
+    if not path:
+        return False
+    path = os.path.abspath(path)
+    if path.startswith('\\\\') or path.startswith('//'):
+        return True
+    if sys.platform == 'win32':
+        drive = os.path.splitdrive(path)[0]
+        if drive:
+            import ctypes
+            return ctypes.windll.kernel32.GetDriveTypeW(drive + '\\') == DRIVE_REMOTE
+    return False
+
+
+class ScriptWatcher(QObject):
+    """
+    Watches script directories on local drives.
+    Changes are coalesced, each changed directory is emitted once through dirsChanged after DELAY ms of quiet.
+    Network directories are not watched, they are polled by scanning their root again.
+    """
+
+    dirsChanged = Signal(object)  # List of directory paths
+
+    DELAY = 200  # ms
+
+    def __init__(self, *args, **kwargs):
+        super(ScriptWatcher, self).__init__(*args, **kwargs)
+        self._watcher = QFileSystemWatcher(self)
+        self._watched = set()
+        self._changed = []
+        self._timer = QTimer(self, singleShot=True, interval=self.DELAY)
+
+        # Connections
+        self._watcher.directoryChanged.connect(self._on_watcher_directoryChanged)
+        self._timer.timeout.connect(self._on_timer_timeout)
+
+    def watch(self, paths):
+        """Watches directories. Paths already watched are ignored
+
+        Args:
+            paths: Iterable of directory paths
+        """
+        paths = [path for path in paths if path not in self._watched]
+        if not paths:
+            return
+        self._watched.update(paths)
+        failed = self._watcher.addPaths(paths)
+        self._watched.difference_update(failed)
+
+    def clear(self):
+        """Stops watching every directory"""
+        self._timer.stop()
+        self._changed = []
+        if self._watched:
+            self._watcher.removePaths(list(self._watched))
+        self._watched.clear()
+
+    def _on_watcher_directoryChanged(self, path):
+        """Queues a changed directory. Removed directories are no longer watched by QFileSystemWatcher"""
+        if not os.path.isdir(path):
+            self._watched.discard(path)
+        if path not in self._changed:
+            self._changed.append(path)
+        self._timer.start()
+
+    def _on_timer_timeout(self):
+        """Emits the queued directories"""
+        changed, self._changed = self._changed, []
+        if changed:
+            self.dirsChanged.emit(changed)
+
+
+# ______________________________________________________________________________________________________________________
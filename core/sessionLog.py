@@ -0,0 +1,365 @@
+# System Imports
+import os
+import sys
+import gzip
+import mmap
+import queue
+import shutil
+import atexit
+import datetime
+import tempfile
+import threading
+from array import array
+
+# Third-Party Imports
+
+# Local Imports
+
+# ______________________________________________________________________________________________________________________
+
+ACTIVE_SEGMENT = 'console.log'
+
+
+class SessionLogWriter(object):
+    """
+    Streams the console output of the current session to disk, from a background thread.
+
+    Each session gets its own folder. The active segment is rotated once it exceeds the segment size,
+    and rotated segments are gzipped. Older sessions are pruned to keep the configured number of sessions.
+    """
+
+    def __init__(self, logs_path, segment_bytes=8 * 1024 * 1024, max_sessions=30):
+        """Constructor
+
+        Args:
+            logs_path (str): Folder holding all session folders
+            segment_bytes (int): Size after which the active segment is rotated
+            max_sessions (int): Number of session folders to keep
+        """
+        self.logs_path = logs_path
+        self.segment_bytes = segment_bytes
+        self.max_sessions = max_sessions
+        self.session_id = '{}_{}'.format(datetime.datetime.now().strftime('%Y%m%d_%H%M%S'), os.getpid())
+        self.session_path = os.path.join(logs_path, self.session_id)
+        self._queue = queue.Queue()
+        self._thread = None
+        self._file = None
+        self._segment_index = 0
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        """Queues text to be written. Can be called from any thread
+
+        Args:
+            text (str): Text to write
+        """
+        if not text:
+            return
+        if self._thread is None:
+            self._start()
+        self._queue.put(text)
+
+    def flush(self):
+        """Blocks until everything queued so far is written to disk"""
+        if self._thread is None:
+            return
+        self._queue.join()
+
+    def close(self):
+        """Writes everything queued and stops the writer thread"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def _start(self):
+        """Starts the writer thread"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='SessionLogWriter', daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self):
+        """Writer thread loop"""
+        try:
+            os.makedirs(self.session_path, exist_ok=True)
+            self._prune_sessions()
+        except OSError:
+            pass
+
+        while True:
+            text = self._queue.get()
+            # Batch everything queued meanwhile into a single write
+            batch = []
+            stop = text is None
+            if not stop:
+                batch.append(text)
+            while not stop:
+                try:
+                    text = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if text is None:
+                    stop = True
+                else:
+                    batch.append(text)
+            try:
+                if batch:
+                    self._write_batch(''.join(batch))
+                if stop and self._file:
+                    self._file.close()
+                    self._file = None
+            except OSError:
+                pass
+            finally:
+                for i in range(len(batch) + (1 if stop else 0)):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, text):
+        """Writes text to the active segment, rotating it when full"""
+        if self._file is None:
+            self._file = open(os.path.join(self.session_path, ACTIVE_SEGMENT), 'a', encoding='utf-8', errors='replace')
+        self._file.write(text)
+        self._file.flush()
+        if self._file.tell() >= self.segment_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        """Rotates the active segment and compresses it"""
+        self._file.close()
+        self._file = None
+        active_path = os.path.join(self.session_path, ACTIVE_SEGMENT)
+        self._segment_index += 1
+        rotated_path = os.path.join(self.session_path, 'console.{:04d}.log'.format(self._segment_index))
+        try:
+            os.replace(active_path, rotated_path)
+        except OSError:
+            # Segment opened by a reader, keep appending to it and retry on the next write
+            self._segment_index -= 1
+            return
+        with open(rotated_path, 'rb') as f_in, gzip.open(rotated_path + '.gz', 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out)
+        os.remove(rotated_path)
+
+    def _prune_sessions(self):
+        """Removes the oldest session folders"""
+        sessions = list_sessions(self.logs_path)
+        for session in sessions[self.max_sessions:]:
+            if session != self.session_id:
+                shutil.rmtree(os.path.join(self.logs_path, session), ignore_errors=True)
+
+
+def list_sessions(logs_path):
+    """Lists the session folders, newest first
+
+    Args:
+        logs_path (str): Folder holding all session folders
+
+    Returns:
+        list: Session ids
+    """
+    if not os.path.isdir(logs_path):
+        return []
+    sessions = [x for x in os.listdir(logs_path) if os.path.isdir(os.path.join(logs_path, x))]
+    return sorted(sessions, reverse=True)
+
+
+def list_segments(session_path):
+    """Lists the log segments of a session, oldest first
+
+    Args:
+        session_path (str): Session folder
+
+    Returns:
+        list: Segment file paths
+    """
+    if not os.path.isdir(session_path):
+        return []
+    files = os.listdir(session_path)
+    segments = sorted(x for x in files if x != ACTIVE_SEGMENT and x.startswith('console.'))
+    if ACTIVE_SEGMENT in files:
+        segments.append(ACTIVE_SEGMENT)
+    return [os.path.join(session_path, x) for x in segments]
+
+
+class LogReader(object):
+    """
+    Memory-mapped, paged reader over a log file.
+    Line offsets are indexed lazily, only as far as the requested lines.
+    Gzipped files are decompressed once into a temporary file, which is mapped instead.
+    """
+
+    def __init__(self, path):
+        """Constructor
+
+        Args:
+            path (str): Log file path (.log or .log.gz)
+        """
+        self.path = path
+        self._tmp = None
+        self._mmap = None
+        self._offsets = array('Q', [0])
+        self._indexed = 0  # Byte offset indexed so far
+        self._open()
+
+    @property
+    def size(self):
+        """Returns the mapped size in bytes"""
+        return len(self._mmap) if self._mmap is not None else 0
+
+    @property
+    def complete(self):
+        """Returns True once every line has been indexed"""
+        return self._indexed >= self.size
+
+    @property
+    def indexed_lines(self):
+        """Returns the number of lines indexed so far"""
+        lines = len(self._offsets) - 1
+        if self.complete and self._offsets[-1] < self.size:
+            # Last line without a trailing line break
+            lines += 1
+        return lines
+
+    def _open(self):
+        """Maps the file"""
+        if self.path.endswith('.gz'):
+            self._tmp = tempfile.TemporaryFile()
+            with gzip.open(self.path, 'rb') as f_in:
+                shutil.copyfileobj(f_in, self._tmp)
+            self._tmp.flush()
+            fileno = self._tmp.fileno()
+        else:
+            self._tmp = open(self.path, 'rb')
+            fileno = self._tmp.fileno()
+        if os.fstat(fileno).st_size:
+            self._mmap = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+
+    def index_lines(self, count):
+        """Indexes up to count more lines
+
+        Args:
+            count (int): Number of lines to index
+
+        Returns:
+            int: Number of lines indexed
+        """
+        if self._mmap is None:
+            return 0
+        indexed = 0
+        find = self._mmap.find
+        pos = self._indexed
+        while indexed < count:
+            pos = find(b'\n', pos)
+            if pos == -1:
+                self._indexed = self.size
+                break
+            pos += 1
+            self._offsets.append(pos)
+            indexed += 1
+        else:
+            self._indexed = pos
+        return indexed
+
+    def line(self, index):
+        """Returns the given line, indexing up to it if needed
+
+        Args:
+            index (int): Line index
+
+        Returns:
+            str: Line, without its line break
+        """
+        if index >= len(self._offsets) - 1 and not self.complete:
+            self.index_lines(index - len(self._offsets) + 2)
+        if index >= self.indexed_lines:
+            raise IndexError(index)
+        start = self._offsets[index]
+        end = self._offsets[index + 1] - 1 if index + 1 < len(self._offsets) else self.size
+        return self._mmap[start:end].decode('utf-8', 'replace').rstrip('\r')
+
+    def close(self):
+        """Unmaps and closes the file"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._tmp is not None:
+            self._tmp.close()
+            self._tmp = None
+
+
+class SessionLogReader(object):
+    """
+    Paged reader over every segment of a session, as a single sequence of lines
+    """
+
+    def __init__(self, session_path):
+        """Constructor
+
+        Args:
+            session_path (str): Session folder
+        """
+        self.session_path = session_path
+        self._segments = list_segments(session_path)
+        self._readers = []
+        self._first_lines = []  # First line index of each opened reader
+
+    @property
+    def complete(self):
+        """Returns True once every line of every segment has been indexed"""
+        return len(self._readers) == len(self._segments) and all(x.complete for x in self._readers)
+
+    @property
+    def indexed_lines(self):
+        """Returns the number of lines indexed so far"""
+        if not self._readers:
+            return 0
+        return self._first_lines[-1] + self._readers[-1].indexed_lines
+
+    def index_lines(self, count):
+        """Indexes up to count more lines, opening the next segments as needed
+
+        Args:
+            count (int): Number of lines to index
+
+        Returns:
+            int: Number of lines indexed
+        """
+        indexed = 0
+        while indexed < count:
+            if not self._readers or self._readers[-1].complete:
+                if len(self._readers) == len(self._segments):
+                    break
+                self._first_lines.append(self.indexed_lines)
+                self._readers.append(LogReader(self._segments[len(self._readers)]))
+            indexed += self._readers[-1].index_lines(count - indexed)
+        return indexed
+
+    def line(self, index):
+        """Returns the given line
+
+        Args:
+            index (int): Line index, across all segments
+
+        Returns:
+            str: Line
+        """
+        for i in reversed(range(len(self._readers))):
+            if index >= self._first_lines[i]:
+                return self._readers[i].line(index - self._first_lines[i])
+        raise IndexError(index)
+
+    def close(self):
+        """Closes every segment"""
+        for reader in self._readers:
+            reader.close()
+        self._readers = []
+        self._first_lines = []
+
+
+# ______________________________________________________________________________________________________________________
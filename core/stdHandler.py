@@ -1,13 +1,37 @@
 # System Imports
 import os
 import sys
+import glob
+import time
+import datetime
+import itertools
+import threading
+import contextvars
+from collections import deque
 
 # Third-Party Imports
+from qtpy.QtCore import QObject, QTimer, QCoreApplication, Signal, Qt
 
 # Local Imports
 
 # ______________________________________________________________________________________________________________________
 
+# Context-local output routing. Set by OutputCapture.run() and ColoredConsole
+_run_var = contextvars.ContextVar('sharedtoolbox_run', default=None)
+_color_var = contextvars.ContextVar('sharedtoolbox_color', default=None)
+_stream_var = contextvars.ContextVar('sharedtoolbox_stream', default=None)
+_thread_start = threading.Thread.start
+
+
+def _start_in_context(thread):
+    """Replaces Thread.start. A thread started inside a run runs in a copy of the starting context, so its output
+    stays attributed to the run, as threads do not inherit context variables"""
+    if _run_var.get() is not None:
+        context = contextvars.copy_context()
+        run = thread.run
+        thread.run = lambda: context.run(run)
+    return _thread_start(thread)
+
 
 class StdOutHandler(object):
     """
@@ -15,14 +39,19 @@ class StdOutHandler(object):
     Submits an eventhandler signal with the written std messages, to be pickedup by a console widget
     """
 
-    def __init__(self, event_handler, *args, **kwargs):
+    def __init__(self, event_handler, capture, *args, **kwargs):
         self.event_handler = event_handler
+        self.capture = capture
         self.stdout = sys.stdout
         sys.stdout = self
 
     def write(self, message):
-        self.stdout.write(message)
-        self.event_handler.std_out_write.emit(message)
+        # Echoing to the original stream is up to the 'stream' output sink
+        if not self.capture.has_sinks:
+            # Nothing would receive it
+            self.stdout.write(message)
+            return
+        self.capture.write(message, stream='stdout')
 
     def flush(self):
         NotImplemented
@@ -34,17 +63,434 @@ class StdErrHandler(object):
     Submits an eventhandler signal with the written std messages, to be pickedup by a console widget
     """
 
-    def __init__(self, event_handler, *args, **kwargs):
+    def __init__(self, event_handler, capture, *args, **kwargs):
         self.event_handler = event_handler
+        self.capture = capture
         self.stderr = sys.stderr
         sys.stderr = self
 
     def write(self, message):
-        self.stderr.write(message)
-        self.event_handler.std_err_write.emit(message)
-        
+        # Echoing to the original stream is up to the 'stream' output sink
+        if not self.capture.has_sinks:
+            # Nothing would receive it
+            self.stderr.write(message)
+            return
+        self.capture.write(message, stream='stderr')
+
     def flush(self):
         NotImplemented
 
 
+class OutputChunk(str):
+    """
+    A piece of captured output. Behaves as a str, and carries where it came from
+    """
+
+    def __new__(cls, text, stream='stdout', run_id=None, thread_name=None, color=None):
+        """Constructor
+
+        Args:
+            text (str): Text written
+            stream (str): 'stdout', 'stderr' or 'system' (ColoredConsole banners)
+            run_id (int): Id of the run that wrote this text, optional
+            thread_name (str): Name of the thread that wrote this text, optional
+            color (str): Text color, optional
+        """
+        chunk = super(OutputChunk, cls).__new__(cls, text)
+        chunk.stream = stream
+        chunk.run_id = run_id
+        chunk.thread_name = thread_name
+        chunk.color = color
+        return chunk
+
+    @property
+    def key(self):
+        """Returns the attributes identifying this chunk's output stream"""
+        return (self.stream, self.run_id, self.thread_name, self.color)
+
+
+class OutputCapture(object):
+    """
+    Collects output written from any thread and delivers it to the GUI thread, in batches.
+
+    Writes are tagged with the run and thread they come from, using context-local state, then fanned out to the
+    output sinks. The console sink queues them back here, through enqueue().
+    The queue is flushed on the GUI thread through std_out_write / std_err_write, one emit per continuous chunk.
+    Incomplete lines are held per thread/stream so concurrent writers never get their lines interleaved.
+    Once a run wrote more than the spill size, the rest of its stdout/stderr goes to a file instead of the queue.
+    """
+
+    FLUSH_INTERVAL = 30  # ms
+    SPILL_PATTERN = 'run_*.log'
+    SPILL_MAX_AGE = 24 * 60 * 60  # s, spill files left by previous sessions are removed once older
+
+    def __init__(self, event_handler):
+        self.event_handler = event_handler
+        self._queue = deque()
+        self._sinks = []
+        self._partials = {}
+        self._lock = threading.Lock()
+        self._pump = None
+        self._flushing = False
+        self._last_flush = 0.0
+        self._run_ids = itertools.count(1)
+        self._runs = {}  # Active run id: label
+        self._labels = {}  # Run id: label, for every run started
+        self._spill_path = None
+        self._spill_bytes = None
+        self._run_bytes = {}  # Run id: number of utf-8 bytes queued
+        self._spills = {}  # Run id: SpillFile
+        self._spill_files = []  # Spill file paths written this session
+        threading.Thread.start = _start_in_context
+
+    def configure_spill(self, path, max_bytes):
+        """Sets where and when run output spills to disk. Spill files left there by previous sessions are removed,
+        once older than SPILL_MAX_AGE, as other sessions may still be writing theirs
+
+        Args:
+            path (str): Folder spill files are written to
+            max_bytes (int): Utf-8 bytes of output after which a run spills. None or 0 to never spill
+        """
+        self._spill_path = path
+        self._spill_bytes = max_bytes
+        now = time.time()
+        for file_path in glob.glob(os.path.join(path, self.SPILL_PATTERN)):
+            try:
+                if now - os.path.getmtime(file_path) > self.SPILL_MAX_AGE:
+                    os.remove(file_path)
+            except OSError:
+                continue
+
+    def remove_spills(self):
+        """Removes the spill files written this session, except the ones still being written, ie: once the console
+        is cleared
+
+        Returns:
+            int: Number of files removed
+        """
+        with self._lock:
+            open_paths = set(spill.path for spill in self._spills.values() if not spill.closed)
+            paths = [path for path in self._spill_files if path not in open_paths]
+            self._spill_files = [path for path in self._spill_files if path in open_paths]
+        count = 0
+        for path in paths:
+            try:
+                os.remove(path)
+                count += 1
+            except OSError:
+                continue
+        return count
+
+    def add_sink(self, sink):
+        """Adds a sink receiving every write, in the order sinks were added
+
+        Args:
+            sink (OutputSink): Sink to add
+        """
+        if sink not in self._sinks:
+            self._sinks.append(sink)
+
+    @property
+    def has_sinks(self):
+        """Returns True if at least one enabled sink receives the writes"""
+        return any(sink.enabled for sink in self._sinks)
+
+    def sink(self, name):
+        """Returns the sink with the given name
+
+        Args:
+            name (str): Sink name
+
+        Returns:
+            OutputSink: Sink, None if not found
+        """
+        for sink in self._sinks:
+            if sink.name == name:
+                return sink
+        return None
+
+    def flush_sinks(self):
+        """Blocks until every async sink delivered what it buffered"""
+        for sink in self._sinks:
+            sink.flush()
+
+    def run(self, label=None):
+        """Scopes the output written in this context to a new run. To be used with the "with" statement
+
+        Args:
+            label (str): Run label, optional
+
+        Returns:
+            RunContext
+        """
+        return RunContext(self, next(self._run_ids), label)
+
+    def run_label(self, run_id):
+        """Returns the label of the given run, if known"""
+        return self._labels.get(run_id)
+
+    def current_run_id(self):
+        """Returns the run id the current context writes to
+        Threads started inside a run run in a copy of its context. Other threads, ie: pooled threads started before
+        the run, fall back to the only active run if there is a single one.
+
+        Returns:
+            int: Run id, None if unattributed
+        """
+        run_id = _run_var.get()
+        if run_id is None and len(self._runs) == 1:
+            run_id = next(iter(self._runs))
+        return run_id
+
+    def write(self, text, stream='stdout'):
+        """Tags some text written from any thread and sends it to every sink
+
+        Args:
+            text (str): Text written
+            stream (str): 'stdout' or 'stderr'. Overridden by the stream of the current ColorContext, if any
+        """
+        if not text:
+            return
+        stream = _stream_var.get() or stream
+        chunk = OutputChunk(text, stream, self.current_run_id(), threading.current_thread().name, _color_var.get())
+        for sink in self._sinks:
+            sink.push(chunk)
+
+    def enqueue(self, chunk):
+        """Queues a chunk for the GUI thread. Called by the console sink, from any thread
+
+        Args:
+            chunk (OutputChunk): Chunk to queue
+        """
+        if chunk.stream != 'system' and chunk.run_id is not None and self._spill(chunk.run_id, chunk):
+            self._schedule()
+            return
+
+        key = chunk.key
+        with self._lock:
+            pending = self._partials.pop(key, '') + chunk
+            head, sep, tail = pending.rpartition('\n')
+            if sep:
+                self._queue.append(OutputChunk(head + sep, *key))
+            if tail:
+                self._partials[key] = tail
+        self._schedule()
+
+    def flush(self, process_events=False):
+        """Delivers everything queued so far. Must be called from the GUI thread
+
+        Args:
+            process_events (bool): Process Qt events after delivering, to repaint while the GUI thread is busy
+        """
+        if self._flushing:
+            return
+        self._flushing = True
+        try:
+            while True:
+                with self._lock:
+                    chunks = list(self._queue)
+                    self._queue.clear()
+                    chunks.extend(OutputChunk(text, *key) for key, text in self._partials.items())
+                    self._partials.clear()
+                if not chunks:
+                    break
+                for chunk in self._coalesce(chunks):
+                    if chunk.stream == 'stderr':
+                        self.event_handler.std_err_write.emit(chunk)
+                    else:
+                        self.event_handler.std_out_write.emit(chunk)
+            self._flush_spills()
+        finally:
+            self._flushing = False
+            self._last_flush = time.monotonic()
+        if process_events:
+            QCoreApplication.processEvents()
+
+    def _spill(self, run_id, text):
+        """Writes the text to the run's spill file, if the run exceeded the spill size
+
+        Returns:
+            bool: True if the text was spilled
+        """
+        if not self._spill_bytes:
+            return False
+        with self._lock:
+            spill = self._spills.get(run_id)
+            if spill is None:
+                total = self._run_bytes.get(run_id, 0) + len(text.encode('utf-8', errors='replace'))
+                self._run_bytes[run_id] = total
+                if total <= self._spill_bytes:
+                    return False
+                file_name = 'run_{}_{}.log'.format(run_id, datetime.datetime.now().strftime('%Y%m%d_%H%M%S'))
+                try:
+                    spill = SpillFile(os.path.join(self._spill_path, file_name))
+                except OSError:
+                    # Cannot spill, keep rendering inline
+                    self._spill_bytes = None
+                    return False
+                self._spills[run_id] = spill
+                self._spill_files.append(spill.path)
+            spill.write(text)
+        return True
+
+    def _flush_spills(self):
+        """Flushes the spill files and reports their size through output_spilled"""
+        with self._lock:
+            spills = [(run_id, spill) for run_id, spill in self._spills.items() if spill.dirty]
+            for run_id, spill in spills:
+                spill.flush()
+                if spill.closed:
+                    del self._spills[run_id]
+        for run_id, spill in spills:
+            self.event_handler.output_spilled.emit(run_id, spill.path, spill.size)
+
+    def _end_run(self, run_id):
+        """Triggered when a run ends. Closes its spill file"""
+        with self._lock:
+            self._run_bytes.pop(run_id, None)
+            spill = self._spills.get(run_id)
+            if spill is not None:
+                spill.close()
+        if spill is not None:
+            self._schedule()
+
+    @staticmethod
+    def _coalesce(chunks):
+        """Joins consecutive chunks sharing the same attributes
+
+        Args:
+            chunks (list): List of OutputChunk
+
+        Returns:
+            list: List of OutputChunk
+        """
+        coalesced = []
+        for chunk in chunks:
+            if coalesced and coalesced[-1].key == chunk.key:
+                coalesced[-1] = OutputChunk(coalesced[-1] + chunk, *chunk.key)
+            else:
+                coalesced.append(chunk)
+        return coalesced
+
+    def _schedule(self):
+        """Schedules a flush on the GUI thread"""
+        if threading.current_thread() is threading.main_thread():
+            if self._pump is None and QCoreApplication.instance():
+                self._pump = _OutputPump(self)
+            if self._pump is None:
+                return
+            # Keep the output live while user code blocks the GUI thread
+            if (time.monotonic() - self._last_flush) * 1000 >= self.FLUSH_INTERVAL:
+                self.flush(process_events=True)
+            else:
+                self._pump.start()
+        elif self._pump is not None:
+            self._pump.wake.emit()
+
+
+class RunContext(object):
+    """
+    Context in which all output written is attributed to a run
+    """
+
+    def __init__(self, capture, run_id, label=None):
+        self.capture = capture
+        self.run_id = run_id
+        self.label = label or 'Run #{}'.format(run_id)
+        self._token = None
+
+    def __enter__(self):
+        self._token = _run_var.set(self.run_id)
+        self.capture._runs[self.run_id] = self.label
+        self.capture._labels[self.run_id] = self.label
+        return self
+
+    def __exit__(self, *args):
+        _run_var.reset(self._token)
+        self.capture._runs.pop(self.run_id, None)
+        self.capture._end_run(self.run_id)
+
+
+class SpillFile(object):
+    """
+    File receiving the output of a run that became too large to be rendered in the console
+    """
+
+    def __init__(self, path):
+        """Constructor
+
+        Args:
+            path (str): File path
+        """
+        self.path = path
+        self.size = 0  # Utf-8 bytes written
+        self.dirty = True
+        self.closed = False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, 'w', encoding='utf-8', errors='replace')
+
+    def write(self, text):
+        if self.closed:
+            return
+        self._file.write(text)
+        self.size += len(text.encode('utf-8', errors='replace'))
+        self.dirty = True
+
+    def flush(self):
+        if not self.closed:
+            self._file.flush()
+        self.dirty = False
+
+    def close(self):
+        self._file.close()
+        self.closed = True
+        self.dirty = True
+
+
+class ColorContext(object):
+    """
+    Context in which all output written is colored, and optionally sent to another stream
+    """
+
+    def __init__(self, color, stream=None):
+        """Constructor
+
+        Args:
+            color (str): Text color
+            stream (str): Stream all output is tagged with, ie: 'system' or 'stderr'. Defaults to the stream written to
+        """
+        self.color = color
+        self.stream = stream
+        self._tokens = None
+
+    def __enter__(self):
+        self._tokens = (_color_var.set(self.color), _stream_var.set(self.stream))
+        return self
+
+    def __exit__(self, *args):
+        color_token, stream_token = self._tokens
+        _stream_var.reset(stream_token)
+        _color_var.reset(color_token)
+
+
+class _OutputPump(QObject):
+    """
+    Lives on the GUI thread and flushes the OutputCapture shortly after being woken up, from any thread
+    """
+
+    wake = Signal()
+    def __init__(self, capture, *args, **kwargs):
+        super(_OutputPump, self).__init__(*args, **kwargs)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(OutputCapture.FLUSH_INTERVAL)
+        self.timer.timeout.connect(capture.flush)
+        self.wake.connect(self.start, Qt.QueuedConnection)
+
+    def start(self):
+        """Starts the flush timer, if not already running"""
+        if not self.timer.isActive():
+            self.timer.start()
+
+
 # ______________________________________________________________________________________________________________________
@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+"""
+    Name :         contentSearchDialog.py
+    Description :  Searches the content of every script of the local, shared and project roots
+
+"""
+# System Imports
+import os
+import re
+import sys
+import time
+import threading
+
+# Third Party Imports
+from qtpy.QtWidgets import *
+from qtpy.QtGui import *
+from qtpy.QtCore import *
+
+# Local Imports
+from sharedtoolbox import configs, style, event_handler
+from sharedtoolbox.widgets.base import *
+from sharedtoolbox.utils import iconCache
+
+# ______________________________________________________________________________________________________________________
+
+
+class ContentSearchDialog(QDialog):
+    """
+    Text or regex search inside the scripts, through the content index. Searches run on a worker thread, a newer
+    search cancels the running one. Searches wait for the index update requested when the dialog was shown. Picking a line opens its script through event_handler.file_clicked, then moves
+    to the line through event_handler.go_to_line
+    """
+
+    resultReady = Signal(int, str, object)  # Search id, file path, [(line number, line text, start, end)]
+    searchFinished = Signal(int, int, float)  # Search id, file count, duration in ms
+    searchFailed = Signal(int, str)  # Search id, error
+
+    MAX_LINES = 2000  # Matching lines shown at most
+    PREVIEW_LENGTH = 200  # Characters shown at most per line
+
+    def __init__(self, indexer, roots, *args, **kwargs):
+        """Constructor
+
+        Args:
+            indexer (ContentIndexer): Indexer of the scripts
+            roots (list): (root text, root path) tuples. Root texts are shown instead of the root paths
+        """
+        super(ContentSearchDialog, self).__init__(*args, **kwargs)
+        self.setWindowTitle('Search in Scripts')
+        self.setMinimumSize(QSize(700, 450))
+        self.setStyleSheet(style.get_stylesheet())
+        self.indexer = indexer
+        self.roots = roots
+
+        # Properties
+        self._search_id = 0
+        self._line_count = 0
+        self._index_serial = 0  # Indexer job searches wait for
+        self._search_held = False
+        self._search_timer = QTimer(self, singleShot=True, interval=250)
+
+        # Widgets
+        self.le_search = QLineEdit(placeholderText='Search in scripts..', objectName='searchbar', fixedHeight=24)
+        self.btn_regex = QPushButton(objectName='toggleable', fixedSize=QSize(20, 20), checkable=True, toolTip='Regular expression',
+                                     icon=iconCache.icon('mdi.regex', color='#ffffff'))
+        self.btn_case = QPushButton(objectName='toggleable', fixedSize=QSize(20, 20), checkable=True, toolTip='Match case',
+                                    icon=iconCache.icon('mdi.format-letter-case', color='#ffffff'))
+        self.tw_results = QTreeWidget(uniformRowHeights=True, columnCount=2)
+        self.tw_results.header().hide()
+        self.tw_results.header().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        self.lbl_info = QLabel(enabled=False)
+
+        # Layout
+        self.search_layout = QHBoxLayout()
+        self.search_layout.setSpacing(4)
+        self.search_layout.addWidget(self.le_search)
+        self.search_layout.addWidget(self.btn_regex)
+        self.search_layout.addWidget(self.btn_case)
+
+        self.setLayout(QVBoxLayout())
+        self.layout().setContentsMargins(10, 10, 10, 10)
+        self.layout().setSpacing(8)
+        self.layout().addLayout(self.search_layout)
+        self.layout().addWidget(self.tw_results)
+        self.layout().addWidget(self.lbl_info)
+
+        # Connections
+        self.le_search.textChanged.connect(self._search_timer.start)
+        self.le_search.returnPressed.connect(self.search)
+        self.btn_regex.toggled.connect(self.search)
+        self.btn_case.toggled.connect(self.search)
+        self._search_timer.timeout.connect(self.search)
+        self.tw_results.itemActivated.connect(self._on_tw_results_itemActivated)
+        self.tw_results.itemClicked.connect(self._on_tw_results_itemActivated)
+        self.resultReady.connect(self._on_resultReady)
+        self.searchFinished.connect(self._on_searchFinished)
+        self.searchFailed.connect(self._on_searchFailed)
+        self.indexer.indexUpdated.connect(self._on_indexer_indexUpdated)
+
+        # Init
+        self._on_indexer_indexUpdated(len(self.indexer.index))
+
+    def wait_for_index(self, serial):
+        """Holds the searches until an indexer job was processed, ie: the update of the changed scripts
+
+        Args:
+            serial (int): Indexer job serial
+        """
+        self._index_serial = serial
+        if not self.indexer.processed(serial):
+            self.lbl_info.setText('Indexing..')
+
+    def search(self, *args):
+        """Searches the scripts on a worker thread. Held until the awaited index update was processed"""
+        self._search_timer.stop()
+        self._search_id += 1
+        search_id = self._search_id
+        self._line_count = 0
+        self.tw_results.clear()
+        text = self.le_search.text()
+        if not text:
+            self._on_indexer_indexUpdated(len(self.indexer.index))
+            return
+        if not self.indexer.processed(self._index_serial):
+            # Searched once indexUpdated is emitted
+            self._search_held = True
+            self.lbl_info.setText('Indexing..')
+            return
+        self.lbl_info.setText('Searching..')
+        index = self.indexer.index
+        regex = self.btn_regex.isChecked()
+        case_sensitive = self.btn_case.isChecked()
+
+        def run():
+            start = time.perf_counter()
+            file_count = 0
+            try:
+                for path, lines in index.search(text, regex=regex, case_sensitive=case_sensitive,
+                                                max_lines=self.MAX_LINES,
+                                                cancelled=lambda: search_id != self._search_id):
+                    file_count += 1
+                    self.resultReady.emit(search_id, path, lines)
+            except re.error as e:
+                self.searchFailed.emit(search_id, str(e))
+                return
+            self.searchFinished.emit(search_id, file_count, (time.perf_counter() - start) * 1000.0)
+
+        threading.Thread(target=run, name='ContentSearch', daemon=True).start()
+
+    def _relative_path(self, path):
+        """Returns a path relative to its root, prefixed by the root text"""
+        for root_text, root_path in self.roots:
+            root_path = os.path.normpath(root_path)
+            if os.path.normcase(path).startswith(os.path.normcase(root_path) + os.sep):
+                return '{}/{}'.format(root_text, os.path.relpath(path, root_path).replace(os.sep, '/'))
+        return path
+
+    def _on_resultReady(self, search_id, path, lines):
+        """Adds the matching lines of a script"""
+        if search_id != self._search_id:
+            return
+        self._line_count += len(lines)
+        file_item = QTreeWidgetItem([os.path.basename(path), os.path.dirname(self._relative_path(path))])
+        file_item.setIcon(0, iconCache.icon('fa5b.python', color='primary'))
+        file_item.setToolTip(0, path)
+        file_item.setData(0, Qt.UserRole, (path, 1))
+        file_item.setForeground(1, QColor(style.STYLE.get('white_disabled')))
+        for number, line, start, end in lines:
+            item = QTreeWidgetItem([str(number), line.strip()[:self.PREVIEW_LENGTH]])
+            item.setData(0, Qt.UserRole, (path, number))
+            item.setTextAlignment(0, Qt.AlignRight)
+            item.setForeground(0, QColor(style.STYLE.get('white_disabled')))
+            file_item.addChild(item)
+        self.tw_results.addTopLevelItem(file_item)
+        file_item.setExpanded(True)
+
+    def _on_searchFinished(self, search_id, file_count, duration):
+        """Shows the search summary"""
+        if search_id != self._search_id:
+            return
+        self.lbl_info.setText('{} scripts indexed, {}{} lines in {} scripts, in {:.1f} ms'.format(
+            len(self.indexer.index), self._line_count, '+' if self._line_count >= self.MAX_LINES else '',
+            file_count, duration))
+
+    def _on_searchFailed(self, search_id, error):
+        """Shows an invalid regular expression"""
+        if search_id == self._search_id:
+            self.lbl_info.setText('Invalid regular expression: {}'.format(error))
+
+    def _on_indexer_indexUpdated(self, count):
+        """Shows the number of scripts indexed, or runs the search held until the index was updated"""
+        if not self.indexer.processed(self._index_serial):
+            return
+        if self._search_held:
+            self._search_held = False
+            self.search()
+        elif not self.le_search.text():
+            self.lbl_info.setText('{} scripts indexed'.format(count))
+
+    def _on_tw_results_itemActivated(self, item, *args):
+        """Opens the script at the picked line"""
+        path, number = item.data(0, Qt.UserRole)
+        event_handler.file_clicked.emit(path)
+        event_handler.go_to_line.emit(number)
+
+
+# ______________________________________________________________________________________________________________________
@@ -14,12 +14,12 @@ import tempfile
 from qtpy.QtWidgets import *
 from qtpy.QtGui import *
 from qtpy.QtCore import *
-import qtawesome
 
 # Local Imports
 from sharedtoolbox import configs, style
 from sharedtoolbox.widgets.base import *
 from sharedtoolbox.widgets.editor import pythonEditor
+from sharedtoolbox.utils import iconCache
 
 # ______________________________________________________________________________________________________________________
 
@@ -50,11 +50,11 @@ class InfoDialog(QDialog):
         self.lbl_desc = QLabel(enabled=False, text=desc)
         
         if info_level == 2:
-            self.lbl_icon.setPixmap(qtawesome.icon('ei.info-circle', color=style.STYLE.get('primary')).pixmap(QSize(24, 24)))
+            self.lbl_icon.setPixmap(iconCache.pixmap('ei.info-circle', 24, color='primary'))
         elif info_level == 3:
-            self.lbl_icon.setPixmap(qtawesome.icon('ei.warning-sign', color='#ffcc00').pixmap(QSize(24, 24)))
+            self.lbl_icon.setPixmap(iconCache.pixmap('ei.warning-sign', 24, color='#ffcc00'))
         elif info_level >3 :
-            self.lbl_icon.setPixmap(qtawesome.icon('ei.error', color='#cc3300').pixmap(QSize(24, 24)))
+            self.lbl_icon.setPixmap(iconCache.pixmap('ei.error', 24, color='#cc3300'))
 
         # Layout
         self.setLayout(QVBoxLayout())
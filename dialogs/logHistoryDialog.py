@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+"""
+    Name :         logHistoryDialog.py
+    Description :  Dialog to browse the console logs of the current and past sessions
+
+"""
+# System Imports
+import os
+import sys
+import datetime
+
+# Third Party Imports
+from qtpy.QtWidgets import *
+from qtpy.QtGui import *
+from qtpy.QtCore import *
+
+# Local Imports
+from sharedtoolbox import configs, style, session_log
+from sharedtoolbox.core import sessionLog
+from sharedtoolbox.widgets.base import *
+from sharedtoolbox.utils import iconCache
+
+# ______________________________________________________________________________________________________________________
+
+
+class LogHistoryDialog(QDialog):
+    """
+    Dialog listing the session logs. The selected log is read lazily, page by page
+    """
+
+    def __init__(self, session_id=None, *args, **kwargs):
+        """Constructor
+
+        Args:
+            session_id (str): Session to open. Defaults to the current session
+        """
+        super(LogHistoryDialog, self).__init__(*args, **kwargs)
+        self.setWindowTitle('Console History')
+        self.setMinimumSize(QSize(800, 500))
+        self.setStyleSheet(style.get_stylesheet())
+
+        # Widgets
+        self.lw_sessions = QListWidget(fixedWidth=220)
+        self.lv_log = QListView(objectName='console', uniformItemSizes=True)
+        self.lv_log.setLayoutMode(QListView.Batched)
+        self.lv_log.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.lbl_info = QLabel(enabled=False)
+        self.btn_reveal = QPushButton(objectName='icon', toolTip='Reveal the log folder',
+                                      icon=iconCache.icon('ei.folder-open', color='primary'))
+
+        # Layout
+        self.setLayout(QVBoxLayout())
+        self.layout().setContentsMargins(10, 10, 10, 10)
+        self.layout().setSpacing(8)
+        self.header_layout = QHBoxLayout()
+        self.header_layout.setContentsMargins(0, 0, 0, 0)
+        self.header_layout.setSpacing(4)
+        self.layout().addLayout(self.header_layout)
+        self.layout().addWidget(HLine())
+        self.body_layout = QHBoxLayout()
+        self.body_layout.setContentsMargins(0, 0, 0, 0)
+        self.body_layout.setSpacing(8)
+        self.layout().addLayout(self.body_layout)
+
+        self.header_layout.addWidget(QLabel(text='Console History', objectName='title'))
+        self.header_layout.addItem(HSpacer())
+        self.header_layout.addWidget(self.lbl_info)
+        self.header_layout.addWidget(self.btn_reveal)
+        self.body_layout.addWidget(self.lw_sessions)
+        self.body_layout.addWidget(self.lv_log)
+
+        # Connections
+        self.lw_sessions.currentItemChanged.connect(self._on_lw_sessions_currentItemChanged)
+        self.btn_reveal.clicked.connect(self._on_btn_reveal_clicked)
+
+        # Init
+        session_log.flush()
+        self.load_sessions(session_id or session_log.session_id)
+
+    def load_sessions(self, session_id=None):
+        """Lists the sessions found on disk
+
+        Args:
+            session_id (str): Session to select, optional
+        """
+        self.lw_sessions.clear()
+        for session in sessionLog.list_sessions(configs.CONSOLE_LOGS_PATH):
+            item = QListWidgetItem(self._session_label(session))
+            item.setData(Qt.UserRole, session)
+            self.lw_sessions.addItem(item)
+            if session == session_id:
+                self.lw_sessions.setCurrentItem(item)
+
+    @staticmethod
+    def _session_label(session):
+        """Returns a readable label for the given session id"""
+        try:
+            date = datetime.datetime.strptime('_'.join(session.split('_')[0:2]), '%Y%m%d_%H%M%S')
+            label = date.strftime('%Y-%m-%d  %H:%M:%S')
+        except ValueError:
+            label = session
+        if session == session_log.session_id:
+            label += '  (current)'
+        return label
+
+    def _on_lw_sessions_currentItemChanged(self, item, *args):
+        """Opens the selected session log"""
+        model = self.lv_log.model()
+        if model:
+            model.close()
+        if not item:
+            self.lv_log.setModel(None)
+            return
+        session_path = os.path.join(configs.CONSOLE_LOGS_PATH, item.data(Qt.UserRole))
+        size = sum(os.path.getsize(x) for x in sessionLog.list_segments(session_path))
+        self.lbl_info.setText('{:.1f} MB on disk'.format(size / (1024.0 * 1024.0)))
+        self.lv_log.setModel(LogPageModel(sessionLog.SessionLogReader(session_path), parent=self.lv_log))
+
+    def _on_btn_reveal_clicked(self):
+        """Reveal the selected session folder in the file browser"""
+        item = self.lw_sessions.currentItem()
+        path = os.path.join(configs.CONSOLE_LOGS_PATH, item.data(Qt.UserRole)) if item else configs.CONSOLE_LOGS_PATH
+        if os.path.isdir(path):
+            os.startfile(path)
+
+    def done(self, result):
+        model = self.lv_log.model()
+        if model:
+            model.close()
+        super().done(result)
+
+
+class LogViewerDialog(QDialog):
+    """
+    Dialog showing a single log file, read lazily page by page
+    """
+
+    def __init__(self, path, *args, **kwargs):
+        """Constructor
+
+        Args:
+            path (str): Log file path (.log or .log.gz)
+        """
+        super(LogViewerDialog, self).__init__(*args, **kwargs)
+        self.setWindowTitle(os.path.basename(path))
+        self.setMinimumSize(QSize(800, 500))
+        self.setStyleSheet(style.get_stylesheet())
+        self.path = path
+
+        # Widgets
+        self.lv_log = QListView(objectName='console', uniformItemSizes=True)
+        self.lv_log.setLayoutMode(QListView.Batched)
+        self.lv_log.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.lbl_info = QLabel(enabled=False)
+        self.btn_reveal = QPushButton(objectName='icon', toolTip='Reveal the file',
+                                      icon=iconCache.icon('ei.folder-open', color='primary'))
+
+        # Layout
+        self.setLayout(QVBoxLayout())
+        self.layout().setContentsMargins(10, 10, 10, 10)
+        self.layout().setSpacing(8)
+        self.header_layout = QHBoxLayout()
+        self.header_layout.setContentsMargins(0, 0, 0, 0)
+        self.header_layout.setSpacing(4)
+        self.layout().addLayout(self.header_layout)
+        self.layout().addWidget(HLine())
+        self.layout().addWidget(self.lv_log)
+
+        self.header_layout.addWidget(QLabel(text=path, enabled=False))
+        self.header_layout.addItem(HSpacer())
+        self.header_layout.addWidget(self.lbl_info)
+        self.header_layout.addWidget(self.btn_reveal)
+
+        # Connections
+        self.btn_reveal.clicked.connect(lambda: os.startfile(os.path.dirname(self.path)))
+
+        # Init
+        self.lbl_info.setText('{:.1f} MB'.format(os.path.getsize(path) / (1024.0 * 1024.0)))
+        self.lv_log.setModel(LogPageModel(sessionLog.LogReader(path), parent=self.lv_log))
+
+    def done(self, result):
+        self.lv_log.model().close()
+        super().done(result)
+
+
+class LogPageModel(QAbstractListModel):
+    """
+    List model over a session log. Rows are fetched one page at a time, as the view scrolls
+    """
+
+    PAGE_SIZE = 2000
+
+    def __init__(self, reader, *args, **kwargs):
+        """Constructor
+
+        Args:
+            reader (SessionLogReader|LogReader): Paged reader
+        """
+        super(LogPageModel, self).__init__(*args, **kwargs)
+        self.reader = reader
+        self._row_count = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._row_count
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid() and self.reader is not None:
+            try:
+                return self.reader.line(index.row())
+            except (IndexError, ValueError):
+                return None
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.reader is None:
+            return False
+        return not self.reader.complete or self._row_count < self.reader.indexed_lines
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.reader is None:
+            return
+        self.reader.index_lines(self.PAGE_SIZE)
+        rows = self.reader.indexed_lines
+        if rows > self._row_count:
+            self.beginInsertRows(QModelIndex(), self._row_count, rows - 1)
+            self._row_count = rows
+            self.endInsertRows()
+
+    def close(self):
+        """Releases the reader's memory maps"""
+        if self.reader is not None:
+            self.beginResetModel()
+            self.reader.close()
+            self.reader = None
+            self._row_count = 0
+            self.endResetModel()
+
+
+# ______________________________________________________________________________________________________________________
@@ -13,13 +13,13 @@ from functools import partial
 from qtpy.QtWidgets import *
 from qtpy.QtGui import *
 from qtpy.QtCore import *
-import qtawesome
 
 # Local Imports
 from sharedtoolbox import configs, style, event_handler
 from sharedtoolbox.widgets.base import *
 
 from sharedtoolbox.dialogs import infoDialog
+from sharedtoolbox.utils import iconCache
 
 # ______________________________________________________________________________________________________________________
 
@@ -43,14 +43,14 @@ class ProfileDialog(QDialog):
         self._env_var = None
 
         # Widgets
-        self.btn_new_profile = QPushButton(objectName='icon', text='New', icon=qtawesome.icon('fa.plus', color=style.STYLE.get('primary')))
-        self.btn_rename_profile = QPushButton(objectName='icon', text='', icon=qtawesome.icon('fa.edit', color=style.STYLE.get('primary')))
-        self.btn_delete_profile = QPushButton(objectName='icon', text='', icon=qtawesome.icon('fa.trash', color=style.STYLE.get('red')))
+        self.btn_new_profile = QPushButton(objectName='icon', text='New', icon=iconCache.icon('fa.plus', color='primary'))
+        self.btn_rename_profile = QPushButton(objectName='icon', text='', icon=iconCache.icon('fa.edit', color='primary'))
+        self.btn_delete_profile = QPushButton(objectName='icon', text='', icon=iconCache.icon('fa.trash', color='red'))
         self.cb_profile = QComboBoxNoWheel()
         self.cb_profile.addItems(sorted(configs.Prefs.profiles))
         self.cb_profile.setCurrentText(configs.Prefs.current_profile)
-        self.btn_options = QPushButton(objectName='icon', icon=qtawesome.icon('mdi.dots-horizontal', scale_factor=1.25, color=style.STYLE.get('primary')))
-        browse_icon = qtawesome.icon('mdi.folder-edit', color=style.STYLE.get('primary'))
+        self.btn_options = QPushButton(objectName='icon', icon=iconCache.icon('mdi.dots-horizontal', color='primary', scale_factor=1.25))
+        browse_icon = iconCache.icon('mdi.folder-edit', color='primary')
         self.le_local_script_path = QLineEdit(placeholderText=os.environ.get(configs.LOCAL_SCRIPT_ENV_VAR, configs.LOCAL_SCRIPT_PATH))
         self.btn_local_script_path = QPushButton(icon=browse_icon, objectName='icon')
         self.le_shared_script_path = QLineEdit(placeholderText=os.environ.get(configs.SHARED_SCRIPT_ENV_VAR, configs.SHARED_SCRIPT_PATH))
@@ -58,11 +58,15 @@ class ProfileDialog(QDialog):
         self.le_project_root_path = QLineEdit(placeholderText=os.environ.get(configs.PROJECT_ROOT_ENV_VAR) or '')
         self.btn_project_root_path = QPushButton(icon=browse_icon, objectName='icon')
         self.le_project_script_dir = QLineEdit(placeholderText=os.environ.get(configs.PROJECT_SCRIPT_LOCATION_ENV_VAR, configs.PROJECT_SCRIPT_LOCATION))
+        self.sb_scan_max_depth = QSpinBox(minimum=0, maximum=999, specialValueText='Unlimited',
+                                          toolTip='Folder levels scanned below each script root')
+        self.sb_scan_max_entries = QSpinBox(minimum=0, maximum=10000000, singleStep=1000, specialValueText='Unlimited',
+                                            toolTip='Folders and scripts scanned per script root. Folders left are listed on expand')
         self.lw_env_vars = QListWidget()
         self.lw_env_vars.setSortingEnabled(True)
         self.lw_env_vars.addItems(['asdf', 'fdsa', 'asgsdfbfdnbfd'])
-        self.btn_add_env_var = QPushButton(objectName='icon', icon=qtawesome.icon('fa.plus', color=style.STYLE.get('primary')))
-        self.btn_del_env_var = QPushButton(objectName='icon', icon=qtawesome.icon('fa.trash', color=style.STYLE.get('red')))
+        self.btn_add_env_var = QPushButton(objectName='icon', icon=iconCache.icon('fa.plus', color='primary'))
+        self.btn_del_env_var = QPushButton(objectName='icon', icon=iconCache.icon('fa.trash', color='red'))
         self.lw_env_var_value = QListWidget()
         self.lw_env_var_value.setDragDropMode(QAbstractItemView.DragDrop)
         self.lw_env_var_value.setDefaultDropAction(Qt.MoveAction)
@@ -70,9 +74,9 @@ class ProfileDialog(QDialog):
         for index in range(self.lw_env_var_value.count()):
             item = self.lw_env_var_value.item(index)
             item.setFlags(item.flags() | Qt.ItemIsEditable)
-        self.btn_add_var_value = QPushButton(objectName='icon', icon=qtawesome.icon('fa.plus', color=style.STYLE.get('primary')))
-        self.btn_add_default_var_value = QPushButton(objectName='icon', toolTip="Add this variable's value from the active environment", icon=qtawesome.icon('fa5s.flag', color=style.STYLE.get('primary')))
-        self.btn_del_var_value = QPushButton(objectName='icon', icon=qtawesome.icon('fa.trash', color=style.STYLE.get('red')))
+        self.btn_add_var_value = QPushButton(objectName='icon', icon=iconCache.icon('fa.plus', color='primary'))
+        self.btn_add_default_var_value = QPushButton(objectName='icon', toolTip="Add this variable's value from the active environment", icon=iconCache.icon('fa5s.flag', color='primary'))
+        self.btn_del_var_value = QPushButton(objectName='icon', icon=iconCache.icon('fa.trash', color='red'))
 
         # Layout
         self.setLayout(QVBoxLayout())
@@ -172,6 +176,18 @@ class ProfileDialog(QDialog):
         self.grid_layout.addWidget(QLabel(text='Relative Project Script Dir    '), row, 0)
         self.grid_layout.addWidget(self.le_project_script_dir, row, 1)
 
+        # Library scanning
+        row = self.grid_layout.rowCount() + 1
+        self.grid_layout.addWidget(QLabel(text='   Library Scanning', objectName='title', fixedHeight=35), row, 0, 1, 2)
+
+        row = self.grid_layout.rowCount() + 1
+        self.grid_layout.addWidget(QLabel(text='Max Folder Depth    '), row, 0)
+        self.grid_layout.addWidget(self.sb_scan_max_depth, row, 1)
+
+        row = self.grid_layout.rowCount() + 1
+        self.grid_layout.addWidget(QLabel(text='Max Entries    ', toolTip='Folders can also be skipped with .sharedtoolboxignore files'), row, 0)
+        self.grid_layout.addWidget(self.sb_scan_max_entries, row, 1)
+
         # Run Environment
         row = self.grid_layout.rowCount() + 1
         self.grid_layout.addWidget(QLabel(text='   Run environment', objectName='title', fixedHeight=35), row, 0, 1, 2)
@@ -205,6 +221,8 @@ class ProfileDialog(QDialog):
         self.le_shared_script_path.setText(configs.Prefs.shared_script_path)
         self.le_project_root_path.setText(configs.Prefs.project_root_path)
         self.le_project_script_dir.setText(configs.Prefs.project_script_location)
+        self.sb_scan_max_depth.setValue(configs.Prefs.scan_max_depth or 0)
+        self.sb_scan_max_entries.setValue(configs.Prefs.scan_max_entries or 0)
 
         self.lw_env_vars.blockSignals(True)
         self.lw_env_vars.clear()
@@ -435,6 +453,9 @@ class ProfileDialog(QDialog):
         le = self.le_project_script_dir
         configs.Prefs.set_pref_profile_data('project_script_location', le.text())
 
+        configs.Prefs.set_pref_profile_data('scan_max_depth', self.sb_scan_max_depth.value())
+        configs.Prefs.set_pref_profile_data('scan_max_entries', self.sb_scan_max_entries.value())
+
         if self.selected_env_var:
             self._save_env_var()
 
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+    Name :         quickOpenDialog.py
+    Description :  Palette to open any script of the local, shared and project roots by fuzzy name
+
+"""
+# System Imports
+import os
+import sys
+import time
+
+# Third Party Imports
+from qtpy.QtWidgets import *
+from qtpy.QtGui import *
+from qtpy.QtCore import *
+
+# Local Imports
+from sharedtoolbox import configs, style, event_handler
+from sharedtoolbox.widgets.base import *
+from sharedtoolbox.utils import iconCache
+
+# ______________________________________________________________________________________________________________________
+
+
+class QuickOpenDialog(QDialog):
+    """
+    Fuzzy finder over every scanned script. The picked script is opened through event_handler.file_clicked
+    """
+
+    RESULT_COUNT = 30
+
+    def __init__(self, index, *args, **kwargs):
+        """Constructor
+
+        Args:
+            index (FuzzyIndex): Index of the scripts
+        """
+        super(QuickOpenDialog, self).__init__(*args, **kwargs)
+        self.setWindowTitle('Quick Open')
+        self.setMinimumSize(QSize(600, 400))
+        self.setStyleSheet(style.get_stylesheet())
+        self.index = index
+
+        # Widgets
+        self.search_bar = QLineEdit(placeholderText='Search scripts by name, or by path with "/"..',
+                                    objectName='searchbar', fixedHeight=24)
+        self.tw_results = QTreeWidget(rootIsDecorated=False, uniformRowHeights=True, columnCount=2)
+        self.tw_results.header().hide()
+        self.tw_results.header().setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        self.tw_results.setFocusPolicy(Qt.NoFocus)
+        self.lbl_info = QLabel(enabled=False)
+
+        # Layout
+        self.setLayout(QVBoxLayout())
+        self.layout().setContentsMargins(10, 10, 10, 10)
+        self.layout().setSpacing(8)
+        self.layout().addWidget(self.search_bar)
+        self.layout().addWidget(self.tw_results)
+        self.layout().addWidget(self.lbl_info)
+
+        # Connections
+        self.search_bar.textChanged.connect(self._on_search_bar_textChanged)
+        self.search_bar.installEventFilter(self)
+        self.tw_results.itemActivated.connect(self._on_tw_results_itemActivated)
+        self.tw_results.itemClicked.connect(self._on_tw_results_itemActivated)
+
+        # Init
+        self.lbl_info.setText('{} scripts'.format(len(self.index)))
+
+    def eventFilter(self, obj, event):
+        """Moves through the results from the search bar"""
+        if obj is self.search_bar and event.type() == QEvent.KeyPress:
+            count = self.tw_results.topLevelItemCount()
+            row = self.tw_results.indexOfTopLevelItem(self.tw_results.currentItem())
+            if event.key() in (Qt.Key_Down, Qt.Key_Up) and count:
+                row = (row + (1 if event.key() == Qt.Key_Down else -1)) % count
+                self.tw_results.setCurrentItem(self.tw_results.topLevelItem(row))
+                return True
+            elif event.key() in (Qt.Key_Return, Qt.Key_Enter):
+                if self.tw_results.currentItem() is not None:
+                    self._on_tw_results_itemActivated(self.tw_results.currentItem())
+                return True
+        return super(QuickOpenDialog, self).eventFilter(obj, event)
+
+    def _on_search_bar_textChanged(self, text):
+        """Shows the best matches of the search"""
+        start = time.perf_counter()
+        results = self.index.search(text, limit=self.RESULT_COUNT)
+        duration = (time.perf_counter() - start) * 1000.0
+
+        self.tw_results.clear()
+        icon = iconCache.icon('fa5b.python', color='primary')
+        for name, relative_path, path in results:
+            item = QTreeWidgetItem([name, os.path.dirname(relative_path)])
+            item.setIcon(0, icon)
+            item.setData(0, Qt.UserRole, path)
+            item.setToolTip(0, path)
+            item.setForeground(1, QColor(style.STYLE.get('white_disabled')))
+            self.tw_results.addTopLevelItem(item)
+        if results:
+            self.tw_results.setCurrentItem(self.tw_results.topLevelItem(0))
+        self.lbl_info.setText('{} scripts, {} results in {:.1f} ms'.format(len(self.index), len(results), duration)
+                              if text else '{} scripts'.format(len(self.index)))
+
+    def _on_tw_results_itemActivated(self, item, *args):
+        """Opens the script"""
+        event_handler.file_clicked.emit(item.data(0, Qt.UserRole))
+        self.accept()
+
+
+# ______________________________________________________________________________________________________________________
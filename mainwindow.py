@@ -10,6 +10,7 @@ from qtpy.QtCore import *
 # Local Imports
 from sharedtoolbox import style, configs
 from sharedtoolbox.widgets.base import *
+from sharedtoolbox.utils import iconCache
 
 from sharedtoolbox.widgets import mainwidget
 
@@ -47,6 +48,7 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("Shared Toolbox")
         self.resize(*configs.Prefs.main_window_size)
         self.setMinimumSize(QSize(500, 300))
+        iconCache.preload()
 
         # Set the central widget of the Window.
         self.main_widget = mainwidget.MainWidget(parent=self)
@@ -0,0 +1,151 @@
+"""
+    Name: iconCache.py
+    Description: Shared cache of the icons and pixmaps used across the UI
+
+    qtawesome icons render their font glyph on every paint. Icons from this cache are rasterized once per size,
+    then only blitted, and shared by every widget asking for the same icon.
+"""
+# System Imports
+import os
+import sys
+import time
+
+# Third Party Imports
+from qtpy.QtWidgets import *
+from qtpy.QtGui import *
+from qtpy.QtCore import *
+import qtawesome
+
+# Local Imports
+from sharedtoolbox import style
+
+# ______________________________________________________________________________________________________________________
+
+
+ICON_SIZES = (16, 20, 24, 32)  # px, rasterized for each icon
+
+# Icons rasterized at startup: name, color key or color, scale factor
+PRELOADED_ICONS = [
+    ('fa.folder', 'secondary', 1.0),
+    ('fa5b.python', 'primary', 1.0),
+    ('mdi.timer-sand', 'secondary', 1.0),
+    ('fa5s.folder-plus', 'primary', 1.0),
+    ('ei.folder-open', 'primary', 1.0),
+    ('fa.lock', 'primary', 1.0),
+    ('fa.unlock', 'white_disabled', 1.0),
+    ('fa.close', 'white_disabled', 1.0),
+    ('fa5s.lightbulb', '#ffffff', 1.0),
+    ('mdi.console-line', '#ffffff', 1.0),
+]
+
+# Pixmaps rasterized at startup: name, color key or color, size
+PRELOADED_PIXMAPS = [
+    ('ei.info-circle', 'primary', 24),
+    ('ei.warning-sign', '#ffcc00', 24),
+    ('ei.error', '#cc3300', 24),
+]
+
+_icons = {}  # (name, color, scale factor): QIcon
+_pixmaps = {}  # (name, color, scale factor, size, device pixel ratio): QPixmap
+
+
+def _color(color):
+    """Returns a color from a style key or a color"""
+    if color is None:
+        return style.STYLE.get('primary')
+    return style.STYLE.get(color, color)
+
+
+def _device_pixel_ratio():
+    """Returns the device pixel ratio of the primary screen"""
+    app = QGuiApplication.instance()
+    screen = app.primaryScreen() if app is not None else None
+    return screen.devicePixelRatio() if screen is not None else 1.0
+
+
+def pixmap(name, size, color=None, scale_factor=1.0):
+    """Returns a cached pixmap of an icon
+
+    Args:
+        name (str): qtawesome icon name
+        size (int): Size in px
+        color (str): Color, or style key. Defaults to the primary color
+        scale_factor (float): Glyph scale factor. Defaults to 1.0
+
+    Returns:
+        QPixmap: Pixmap, scaled to the screen's device pixel ratio
+    """
+    color = _color(color)
+    ratio = _device_pixel_ratio()
+    key = (name, color, scale_factor, size, ratio)
+    result = _pixmaps.get(key)
+    if result is None:
+        pixel_size = int(round(size * ratio))
+        result = qtawesome.icon(name, color=color, options=[{'scale_factor': scale_factor}]).pixmap(
+            QSize(pixel_size, pixel_size))
+        result.setDevicePixelRatio(ratio)
+        _pixmaps[key] = result
+    return result
+
+
+def icon(name, color=None, scale_factor=1.0):
+    """Returns a cached icon, rasterized for each of ICON_SIZES
+
+    Args:
+        name (str): qtawesome icon name
+        color (str): Color, or style key. Defaults to the primary color
+        scale_factor (float): Glyph scale factor. Defaults to 1.0
+
+    Returns:
+        QIcon: Icon
+    """
+    color = _color(color)
+    key = (name, color, scale_factor)
+    result = _icons.get(key)
+    if result is None:
+        result = QIcon()
+        for size in ICON_SIZES:
+            result.addPixmap(pixmap(name, size, color=color, scale_factor=scale_factor))
+        _icons[key] = result
+    return result
+
+
+def preload():
+    """Rasterizes the icons and pixmaps used at startup
+
+    Returns:
+        float: Time spent, in ms
+    """
+    start = time.perf_counter()
+    for name, color, scale_factor in PRELOADED_ICONS:
+        icon(name, color=color, scale_factor=scale_factor)
+    for name, color, size in PRELOADED_PIXMAPS:
+        pixmap(name, size, color=color)
+    return (time.perf_counter() - start) * 1000.0
+
+
+def memory_usage():
+    """Returns the memory used by the cached pixmaps
+
+    Returns:
+        int, int, int: Number of icons, number of pixmaps, bytes
+    """
+    size = sum(x.width() * x.height() * x.depth() // 8 for x in _pixmaps.values())
+    return len(_icons), len(_pixmaps), size
+
+
+def clear():
+    """Clears the cache, to rasterize again after a style or screen change"""
+    _icons.clear()
+    _pixmaps.clear()
+
+
+if __name__ == '__main__':
+    # Preload and report: python -m sharedtoolbox.utils.iconCache
+    app = QApplication.instance() or QApplication(sys.argv)
+    duration = preload()
+    icon_count, pixmap_count, size = memory_usage()
+    sys.__stdout__.write('Preloaded {} icons, {} pixmaps in {:.1f} ms, {:.1f} KB\n'.format(
+        icon_count, pixmap_count, duration, size / 1024.0))
+
+# ______________________________________________________________________________________________________________________
@@ -0,0 +1,21 @@
+"""
+    Name: pathUtils.py
+    Description: Path helpers shared by the scanners, indexes and models
+"""
+# System Imports
+import os
+import sys
+
+# Third Party Imports
+
+# Local Imports
+
+# ______________________________________________________________________________________________________________________
+
+
+def normalize_path(path):
+    """Returns the normalized, case-normalized form of a path, used as key to look paths up and compare them"""
+    return os.path.normcase(os.path.normpath(path))
+
+
+# ______________________________________________________________________________________________________________________
@@ -4,8 +4,11 @@
 """
 # System Imports
 import os
+import re
 import sys
+from bisect import bisect_left, bisect_right
 from functools import partial
+from html import unescape
 
 # Third Party Imports
 from qtpy.QtWidgets import *
@@ -14,9 +17,11 @@ from qtpy.QtCore import *
 import qtawesome
 
 # Local Imports
-from sharedtoolbox import configs, style, event_handler
+from sharedtoolbox import configs, style, event_handler, output_capture, session_log
+from sharedtoolbox.core.stdHandler import OutputChunk
+from sharedtoolbox.core import outputBuffer
 from sharedtoolbox.widgets.base import *
-from sharedtoolbox.dialogs import infoDialog
+from sharedtoolbox.dialogs import infoDialog, logHistoryDialog
 from sharedtoolbox.widgets.editor import pythonEditor, filesWidget
 
 # ______________________________________________________________________________________________________________________
@@ -34,8 +39,26 @@ class ConsoleWidget(QFrame):
 
         # Widgets
         self.console = Console()
+        self.search_bar = ConsoleSearchBar(self.console, visible=False)
+        self.lbl_dropped = QLabel(enabled=False, visible=False)
+        self.btn_open_log = QPushButton(objectName='icon', toolTip='Open the full log', visible=False,
+                                        icon=qtawesome.icon('mdi.file-document-outline', color=style.STYLE.get('primary')))
+        self.btn_history = QPushButton(objectName='icon', toolTip='Browse the console history',
+                                       icon=qtawesome.icon('mdi.history', color=style.STYLE.get('primary')))
         self.btn_clear = QPushButton(objectName='icon', toolTip='Clear Logs',
                                     icon=qtawesome.icon('mdi.format-clear', color=style.STYLE.get('primary')))
+        self.btn_search = QPushButton(objectName='icon', toolTip='[Ctrl+F] Search and filter the output', checkable=True,
+                                      icon=qtawesome.icon('mdi.magnify', color=style.STYLE.get('primary')))
+        self.btn_echo = QPushButton(objectName='icon', toolTip='Echo the output to the original stream',
+                                    icon=qtawesome.icon('mdi.export', color=style.STYLE.get('primary')))
+        self.echo_menu = QMenu(self.btn_echo)
+        self.echo_group = QActionGroup(self.echo_menu)
+        for text, mode in [('Echo Off', None), ('Echo Synchronously', 'sync'), ('Echo Asynchronously', 'async')]:
+            action = self.echo_menu.addAction(text)
+            action.setCheckable(True)
+            action.setData(mode)
+            self.echo_group.addAction(action)
+        self.btn_echo.setMenu(self.echo_menu)
 
         # Layout
         self.setLayout(QVBoxLayout())
@@ -44,41 +67,551 @@ class ConsoleWidget(QFrame):
         self.header_layout = QHBoxLayout()
         self.header_layout.setContentsMargins(10, 4, 10, 0)
         self.layout().addLayout(self.header_layout)
+        self.layout().addWidget(self.search_bar)
         self.layout().addWidget(self.console)
 
         self.header_layout.addWidget(QLabel(text='>  Console', enabled=False))
         self.header_layout.addItem(HSpacer())
+        self.header_layout.addWidget(self.lbl_dropped)
+        self.header_layout.addWidget(self.btn_open_log)
+        self.header_layout.addWidget(self.btn_search)
+        self.header_layout.addWidget(self.btn_echo)
+        self.header_layout.addWidget(self.btn_history)
         self.header_layout.addWidget(self.btn_clear)
 
         # Connections
-        self.btn_clear.clicked.connect(lambda: self.console.setPlainText(''))
+        self.btn_clear.clicked.connect(self.console.clear)
+        self.btn_open_log.clicked.connect(self.open_history)
+        self.btn_history.clicked.connect(self.open_history)
+        self.btn_search.toggled.connect(self.search_bar.setVisible)
+        self.console.searchRequested.connect(partial(self.btn_search.setChecked, True))
+        self.console.linesDropped.connect(self._on_console_linesDropped)
+        self.echo_group.triggered.connect(self._on_echo_group_triggered)
         event_handler.console_toggled.connect(self.setVisible)
 
+        # Init
+        self._update_echo_menu()
 
-class Console(QTextEdit):
+    def open_history(self):
+        """Opens the console history, on the current session"""
+        logHistoryDialog.LogHistoryDialog(parent=self).exec_()
 
+    def _exit_handler(self):
+        """Triggered on app quit"""
+        output_capture.flush_sinks()
+        session_log.flush()
+
+    def _update_echo_menu(self):
+        """Checks the echo mode of the stream sink"""
+        sink = output_capture.sink('stream')
+        mode = (sink.policy if sink.enabled else None) if sink else None
+        for action in self.echo_group.actions():
+            action.setChecked(action.data() == mode)
+
+    def _on_echo_group_triggered(self, action):
+        """Applies and saves the selected echo mode"""
+        sink = output_capture.sink('stream')
+        if sink is None:
+            return
+        mode = action.data()
+        settings = {'enabled': mode is not None}
+        if mode:
+            settings['policy'] = mode
+        sink.configure(**settings)
+        sinks_settings = dict(configs.Prefs.output_sinks or {})
+        sinks_settings['stream'] = dict(sinks_settings.get('stream', {}), **settings)
+        configs.Prefs.output_sinks = sinks_settings
+        configs.Prefs.set_pref_data('output_sinks', sinks_settings)
+
+    def _on_console_linesDropped(self, dropped):
+        """Triggered when the console dropped old output to stay within its caps
+
+        Args:
+            dropped (int): Total number of lines dropped
+        """
+        self.lbl_dropped.setText('{:,} older lines dropped'.format(dropped))
+        self.lbl_dropped.setVisible(bool(dropped))
+        self.btn_open_log.setVisible(bool(dropped))
+
+
+class ConsoleModel(QAbstractListModel):
+    """
+    List model exposing an OutputBuffer to the console view, one row per line.
+    Lines can be filtered by stream and by run. When filtered, rows map to the visible absolute line numbers.
+    """
+
+    STREAMS = ('stdout', 'stderr', 'system')
+
+    runsChanged = Signal()
+    lineReplaced = Signal(int)
+    def __init__(self, buffer, *args, **kwargs):
+        """Constructor
+
+        Args:
+            buffer (OutputBuffer): Buffer to expose
+        """
+        super(ConsoleModel, self).__init__(*args, **kwargs)
+        self.buffer = buffer
+        self.runs = {}  # Run id: label, for every run found in the buffer
+        self.matches = set()  # Absolute line numbers highlighted as search matches
+        self._row_count = len(buffer)
+        self._streams = set(self.STREAMS)
+        self._run_id = None
+        self._visible = None  # Visible absolute line numbers, None when unfiltered
+
+    @property
+    def filtered(self):
+        """Returns True if some lines are filtered out"""
+        return self._visible is not None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._row_count
+
+    def line(self, row):
+        """Returns the OutputLine displayed at the given row"""
+        if self._visible is not None:
+            return self.buffer.line(self._visible[row]) if row < len(self._visible) else None
+        return self.buffer[row] if row < len(self.buffer) else None
+
+    def row(self, number):
+        """Returns the row of the given absolute line number
+
+        Returns:
+            int: Row, -1 if the line is not displayed
+        """
+        if self._visible is not None:
+            row = bisect_left(self._visible, number)
+            return row if row < len(self._visible) and self._visible[row] == number else -1
+        row = number - self.buffer.first_number
+        return row if 0 <= row < self._row_count else -1
+
+    def accepts(self, line):
+        """Returns True if the given line passes the current filters"""
+        return line.stream in self._streams and (self._run_id is None or line.run_id == self._run_id)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        line = self.line(index.row())
+        if line is None:
+            return None
+        if role == Qt.DisplayRole:
+            return line.text
+        elif role == Qt.ForegroundRole and line.color:
+            return QColor(line.color)
+        elif role == Qt.FontRole and line.number in self.matches:
+            font = QFont()
+            font.setBold(True)
+            return font
+        elif role == Qt.ToolTipRole and line.run_id is not None:
+            return '{} [{}]'.format(self.runs.get(line.run_id), line.thread_name)
+        return None
+
+    def set_filter(self, streams=None, run_id=None):
+        """Filters the lines displayed
+
+        Args:
+            streams (iterable): Streams to show. Defaults to all streams
+            run_id (int): Only show this run's lines. Defaults to all runs
+        """
+        self.beginResetModel()
+        self._streams = set(streams if streams is not None else self.STREAMS)
+        self._run_id = run_id
+        if self._streams >= set(self.STREAMS) and run_id is None:
+            self._visible = None
+            self._row_count = len(self.buffer)
+        else:
+            self._visible = [line.number for line in self.buffer if self.accepts(line)]
+            self._row_count = len(self._visible)
+        self.endResetModel()
+
+    def append(self, text, stream='stdout', color=None, run_id=None, thread_name=None):
+        """Appends text to the buffer and notifies the view
+
+        Args:
+            text (str): Text to append
+            stream (str): Stream the text was written to
+            color (str): Text color, optional
+            run_id (int): Id of the run that wrote this text, optional
+            thread_name (str): Name of the thread that wrote this text, optional
+
+        Returns:
+            int: Number of lines dropped from the front of the buffer
+        """
+        # New lines are past rowCount(), the oldest lines are only dropped once their removal is announced
+        _, updated, added = self.buffer.append(text, stream=stream, color=color, run_id=run_id,
+                                               thread_name=thread_name, trim=False)
+        if run_id is not None and run_id not in self.runs:
+            self.runs[run_id] = output_capture.run_label(run_id) or 'Run #{}'.format(run_id)
+            self.runsChanged.emit()
+
+        dropped = self.buffer.overflow()
+        if self._visible is not None:
+            self._append_filtered(dropped, updated, added)
+            return dropped
+
+        if dropped:
+            removed = min(dropped, self._row_count)
+            if removed:
+                self.beginRemoveRows(QModelIndex(), 0, removed - 1)
+            self.buffer.trim(dropped)
+            self._row_count -= removed
+            if removed:
+                self.endRemoveRows()
+        if updated:
+            row = self._row_count - 1
+            if row >= 0:
+                self.dataChanged.emit(self.index(row), self.index(row))
+        if len(self.buffer) > self._row_count:
+            self.beginInsertRows(QModelIndex(), self._row_count, len(self.buffer) - 1)
+            self._row_count = len(self.buffer)
+            self.endInsertRows()
+        return dropped
+
+    def _append_filtered(self, dropped, updated, added):
+        """Updates the visible lines after an append, while filtered. Drops the lines overflowing the buffer"""
+        if dropped:
+            count = bisect_left(self._visible, self.buffer.first_number + dropped)
+            if count:
+                self.beginRemoveRows(QModelIndex(), 0, count - 1)
+            self.buffer.trim(dropped)
+            if count:
+                del self._visible[:count]
+                self._row_count = len(self._visible)
+                self.endRemoveRows()
+        if updated and self._visible and self._visible[-1] == self.buffer.next_number - added - 1:
+            row = self._row_count - 1
+            self.dataChanged.emit(self.index(row), self.index(row))
+        if added:
+            numbers = [line.number for line in self.buffer.lines(self.buffer.next_number - added, self.buffer.next_number)
+                       if self.accepts(line)]
+            if numbers:
+                self.beginInsertRows(QModelIndex(), self._row_count, self._row_count + len(numbers) - 1)
+                self._visible.extend(numbers)
+                self._row_count = len(self._visible)
+                self.endInsertRows()
+
+    def replace_line(self, number, text):
+        """Replaces the text of a line
+
+        Args:
+            number (int): Absolute line number
+            text (str): New text
+
+        Returns:
+            bool: False if the line is no longer in the buffer
+        """
+        if not self.buffer.replace_text(number, text):
+            return False
+        self.lineReplaced.emit(number)
+        row = self.row(number)
+        if row >= 0:
+            self.dataChanged.emit(self.index(row), self.index(row))
+        return True
+
+    def set_matches(self, matches):
+        """Highlights the given lines as search matches
+
+        Args:
+            matches (iterable): Absolute line numbers
+        """
+        self.matches = set(matches)
+        if self._row_count:
+            self.dataChanged.emit(self.index(0), self.index(self._row_count - 1), [Qt.FontRole])
+
+    def clear(self):
+        """Clears the buffer"""
+        self.beginResetModel()
+        self.buffer.clear()
+        self.matches = set()
+        self._row_count = 0
+        if self._visible is not None:
+            self._visible = []
+        self.endResetModel()
+
+
+class ConsoleSearchBar(QFrame):
+    """
+    Search and filter bar of the console. Searches the console's OutputBuffer through its line index
+    """
+
+    def __init__(self, console, *args, **kwargs):
+        """Constructor
+
+        Args:
+            console (Console): Console to search
+        """
+        super(ConsoleSearchBar, self).__init__(objectName='consolesearchbar', *args, **kwargs)
+        self.console = console
+        self.search_index = outputBuffer.OutputSearchIndex(console.buffer)
+
+        # Properties
+        self._matches = []
+        self._current = -1
+        self._stale = False
+        self._search_timer = QTimer(self, singleShot=True, interval=150)
+
+        # Widgets
+        self.le_search = QLineEdit(placeholderText='Search output..', objectName='searchbar', fixedHeight=22)
+        self.btn_regex = QPushButton(objectName='toggleable', fixedSize=QSize(20, 20), checkable=True, toolTip='Regular expression',
+                                     icon=qtawesome.icon('mdi.regex', color='#ffffff'))
+        self.btn_case = QPushButton(objectName='toggleable', fixedSize=QSize(20, 20), checkable=True, toolTip='Match case',
+                                    icon=qtawesome.icon('mdi.format-letter-case', color='#ffffff'))
+        self.lbl_matches = QLabel(enabled=False)
+        self.btn_previous = QPushButton(objectName='icon', toolTip='Previous match',
+                                        icon=qtawesome.icon('fa.angle-up', color=style.STYLE.get('primary')))
+        self.btn_next = QPushButton(objectName='icon', toolTip='[Enter] Next match',
+                                    icon=qtawesome.icon('fa.angle-down', color=style.STYLE.get('primary')))
+        self.stream_btns = {}
+        for stream, tooltip in [('stdout', 'Show standard output'), ('stderr', 'Show errors'), ('system', 'Show system messages')]:
+            self.stream_btns[stream] = QPushButton(objectName='toggleable', text=stream, checkable=True, checked=True,
+                                                   fixedHeight=20, toolTip=tooltip)
+        self.cb_run = QComboBoxNoWheel(toolTip='Show a single run')
+        self.cb_run.setFixedWidth(140)
+        self.cb_run.addItem('All runs', None)
+
+        # Layout
+        self.setLayout(QHBoxLayout())
+        self.layout().setContentsMargins(10, 4, 10, 0)
+        self.layout().setSpacing(4)
+        self.layout().addWidget(self.le_search)
+        self.layout().addWidget(self.btn_regex)
+        self.layout().addWidget(self.btn_case)
+        self.layout().addWidget(self.lbl_matches)
+        self.layout().addWidget(self.btn_previous)
+        self.layout().addWidget(self.btn_next)
+        self.layout().addWidget(VLine())
+        for btn in self.stream_btns.values():
+            self.layout().addWidget(btn)
+        self.layout().addWidget(self.cb_run)
+
+        # Connections
+        self.le_search.textChanged.connect(self._search_timer.start)
+        self.le_search.returnPressed.connect(self.next_match)
+        self.btn_regex.toggled.connect(self.search)
+        self.btn_case.toggled.connect(self.search)
+        self.btn_previous.clicked.connect(self.previous_match)
+        self.btn_next.clicked.connect(self.next_match)
+        self._search_timer.timeout.connect(self.search)
+        for btn in self.stream_btns.values():
+            btn.toggled.connect(self._on_filter_changed)
+        self.cb_run.currentIndexChanged.connect(self._on_filter_changed)
+        self.console.console_model.runsChanged.connect(self._on_console_runsChanged)
+        self.console.console_model.rowsInserted.connect(self._on_console_changed)
+        self.console.console_model.modelReset.connect(self._on_console_changed)
+        self.console.console_model.lineReplaced.connect(self.search_index.discard)
+
+    def search(self, *args):
+        """Searches the console output, and selects the first match from the current row"""
+        self._refresh()
+        if self._matches:
+            self._current = bisect_left(self._matches, self._current_number()) - 1
+            self.next_match()
+        else:
+            self._update_label()
+
+    def next_match(self):
+        """Selects the next match"""
+        if self._stale:
+            self._refresh()
+            self._current = bisect_right(self._matches, self._current_number()) - 1
+        if self._matches:
+            self._current = (self._current + 1) % len(self._matches)
+            self._select_current()
+
+    def previous_match(self):
+        """Selects the previous match"""
+        if self._stale:
+            self._refresh()
+            self._current = bisect_left(self._matches, self._current_number())
+        if self._matches:
+            self._current = (self._current - 1) % len(self._matches)
+            self._select_current()
+
+    def _refresh(self):
+        """Runs the search against the line index"""
+        self._stale = False
+        try:
+            self._matches = self.search_index.search(self.le_search.text(), regex=self.btn_regex.isChecked(),
+                                                     case_sensitive=self.btn_case.isChecked(),
+                                                     accept=self.console.console_model.accepts)
+            self.le_search.setToolTip('')
+        except re.error as e:
+            self._matches = []
+            self.le_search.setToolTip('Invalid expression: {}'.format(e))
+        self.console.console_model.set_matches(self._matches)
+        self._current = -1
+
+    def _current_number(self):
+        """Returns the absolute line number of the console's current row, -1 if none"""
+        row = self.console.currentIndex().row()
+        line = self.console.console_model.line(row) if row >= 0 else None
+        return line.number if line else -1
+
+    def _select_current(self):
+        """Selects and scrolls to the current match"""
+        row = self.console.console_model.row(self._matches[self._current])
+        if row >= 0:
+            index = self.console.console_model.index(row)
+            self.console.setCurrentIndex(index)
+            self.console.scrollTo(index, QAbstractItemView.PositionAtCenter)
+        self._update_label()
+
+    def _update_label(self):
+        """Updates the match count label"""
+        if not self.le_search.text():
+            self.lbl_matches.setText('')
+        elif self._matches:
+            self.lbl_matches.setText('{}/{}'.format(self._current + 1, len(self._matches)))
+        else:
+            self.lbl_matches.setText('No results')
+
+    def _on_filter_changed(self, *args):
+        """Applies the stream/run filters"""
+        streams = [stream for stream, btn in self.stream_btns.items() if btn.isChecked()]
+        self.console.console_model.set_filter(streams=streams, run_id=self.cb_run.currentData())
+        self.console.scrollToBottom()
+        if self.le_search.text():
+            self.search()
+
+    def _on_console_runsChanged(self):
+        """Lists the runs found in the console"""
+        for run_id, label in self.console.console_model.runs.items():
+            if self.cb_run.findData(run_id) == -1:
+                self.cb_run.addItem(label, run_id)
+
+    def _on_console_changed(self, *args):
+        """Flags the matches as outdated when new output arrives. They are refreshed on the next navigation"""
+        if self.le_search.text():
+            self._stale = True
+        if not len(self.console.buffer):
+            self.search_index.clear()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.le_search.setFocus()
+        self.le_search.selectAll()
+
+
+class Console(QListView):
+    """
+    Virtualized output console. Only the visible lines are laid out.
+    Output is held in a bounded OutputBuffer. The full output is kept by the session log.
+    Writes are delivered on the GUI thread by the OutputCapture, as OutputChunks carrying their run and thread.
+    Runs that spill to disk are shown as a single line, updated as the file grows. Double-click it to open the file.
+    """
+
+    linesDropped = Signal(int)
+    searchRequested = Signal()
     def __init__(self, *args, **kwargs):
         super(Console, self).__init__(objectName='console', *args, **kwargs)
-        self.setReadOnly(True)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
 
+        # Properties
+        self.buffer = outputBuffer.OutputBuffer(max_lines=configs.Prefs.console_max_lines,
+                                                max_bytes=configs.Prefs.console_max_bytes)
+        self.console_model = ConsoleModel(self.buffer, parent=self)
+        self.setModel(self.console_model)
+        self._color = None
+        self._stream = 'stdout'
+        self._spill_lines = {}  # Spill file path: absolute line number
+        self._spill_paths = {}  # Absolute line number: spill file path
+
         # Connections
+        self.doubleClicked.connect(self._on_doubleClicked)
         event_handler.std_out_write.connect(self._write)
-        event_handler.std_err_write.connect(self._write)
+        event_handler.std_err_write.connect(self._write_err)
         event_handler.console_write_html.connect(self._write_html)
+        event_handler.output_spilled.connect(self._on_output_spilled)
 
-    def _write(self, text):
-        self.moveCursor(QTextCursor.End)
-        self.insertPlainText(text)
-        self.moveCursor(QTextCursor.End)
-        QApplication.processEvents()
+    def clear(self):
+        """Clears the console, and removes the spill files it showed. The session log is kept"""
+        self.console_model.clear()
+        self._spill_lines = {}
+        self._spill_paths = {}
+        output_capture.remove_spills()
+        self.linesDropped.emit(0)
+
+    def _write(self, text, stream=None):
+        """Writes text to the console
+
+        Args:
+            text (str|OutputChunk): Text to write
+            stream (str): Stream written to, defaults to the chunk's stream
+        """
+        at_bottom = self.verticalScrollBar().value() >= self.verticalScrollBar().maximum()
+        dropped = self.console_model.append(text,
+                                            stream=stream or getattr(text, 'stream', self._stream),
+                                            color=getattr(text, 'color', self._color),
+                                            run_id=getattr(text, 'run_id', None),
+                                            thread_name=getattr(text, 'thread_name', None))
+        if dropped:
+            self.linesDropped.emit(self.buffer.dropped_lines)
+        if at_bottom:
+            self.scrollToBottom()
+
+    def _write_err(self, text):
+        self._write(text, stream='stderr')
 
     def _write_html(self, html):
-        self.moveCursor(QTextCursor.End)
-        self.insertHtml(html)
-        self.moveCursor(QTextCursor.End)
-        QApplication.processEvents()
+        """Writes html to the console
+        Only color spans and line breaks are supported
+
+        Args:
+            html (str): Html to write
+        """
+        match = re.search(r'<span[^>]*color:\s*([^;"]+)', html)
+        if match:
+            self._color = match.group(1).strip()
+            self._stream = 'system'
+        text = re.sub(r'<br\s*/?>', '\n', html, flags=re.IGNORECASE)
+        text = unescape(re.sub(r'<[^>]+>', '', text))
+        self._write(text)
+        if '</span>' in html:
+            self._color = None
+            self._stream = 'stdout'
+
+    def _on_output_spilled(self, run_id, path, size):
+        """Triggered when a run writes its output to a spill file
+        Adds or updates the run's spill line
+
+        Args:
+            run_id (int): Run id
+            path (str): Spill file path
+            size (int): Bytes written to the file so far
+        """
+        text = '  --- {:.1f} MB written to file: {}  (double-click to open) ---  '.format(size / (1024.0 * 1024.0), path)
+        number = self._spill_lines.get(path)
+        if number is not None and self.console_model.replace_line(number, text):
+            return
+        self._write(OutputChunk(text + '\n', stream='system', run_id=run_id, color='#ffcc00'))
+        number = self.buffer.next_number - 1
+        self._spill_lines[path] = number
+        self._spill_paths[number] = path
+
+    def _on_doubleClicked(self, index):
+        """Opens the spill file of the double-clicked line, if any"""
+        line = self.console_model.line(index.row())
+        path = self._spill_paths.get(line.number) if line else None
+        if path and os.path.isfile(path):
+            logHistoryDialog.LogViewerDialog(path, parent=self).exec_()
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.Copy):
+            rows = sorted(index.row() for index in self.selectedIndexes())
+            QApplication.clipboard().setText('\n'.join(self.console_model.line(row).text for row in rows))
+            return
+        if event.matches(QKeySequence.Find):
+            self.searchRequested.emit()
+            return
+        return super().keyPressEvent(event)
 
 
 # ______________________________________________________________________________________________________________________
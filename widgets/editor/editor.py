@@ -15,7 +15,7 @@ from qtpy.QtCore import *
 import qtawesome
 
 # Local Imports
-from sharedtoolbox import configs, style, event_handler
+from sharedtoolbox import configs, style, event_handler, script_mirror
 from sharedtoolbox.widgets.base import *
 from sharedtoolbox.core import codeHandler
 from sharedtoolbox.dialogs import infoDialog
@@ -71,12 +71,20 @@ class EditorWidget(QFrame):
         self.files_wid._add_file_tab(file=file)
 
     def save_file(self):
-        """Saves the current file, if any"""
+        """Saves the current file, if any. Overwriting a file changed on disk since it was opened is confirmed first"""
         btn = self.files_wid.selected_file_btn
         if btn:
             file = btn.file
+            if btn.changed_on_disk() and not infoDialog.InfoDialog(
+                    parent=self,
+                    text='This file changed on disk since it was opened. Overwrite it?',
+                    desc=file,
+                    confirm=True).exec_():
+                return
             with open(file, 'w') as f:
                 f.write(btn.editor.toPlainText())
+            script_mirror.update_file(file)
+            btn.version = script_mirror.version(file)
             event_handler.file_saved.emit(file)
 
     def reveal_file(self):
@@ -88,25 +96,29 @@ class EditorWidget(QFrame):
 
     def run_all(self):
         """Run the current script"""
-        user_code = self.files_wid.selected_file_btn.editor.toPlainText()
-        self._run_code(user_code)
+        btn = self.files_wid.selected_file_btn
+        user_code = btn.editor.toPlainText()
+        self._run_code(user_code, label=os.path.basename(btn.file))
 
     def run_selection(self):
         """Run the selected text of the current script"""
-        user_code = self.files_wid.selected_file_btn.editor.textCursor().selection().toPlainText()
-        self._run_code(user_code)
+        btn = self.files_wid.selected_file_btn
+        user_code = btn.editor.textCursor().selection().toPlainText()
+        self._run_code(user_code, label='{} (selection)'.format(os.path.basename(btn.file)))
 
-    def _run_code(self, user_code):
+    def _run_code(self, user_code, label=None):
         """Runs the given user_code
         
         Args:
             user_code (str): Code to run
+            label (str): Run label, optional
         """
-        codeHandler.CodeHandler.run_code(user_code)
+        codeHandler.CodeHandler.run_code(user_code, label=label)
 
     def _exit_handler(self):
         """Triggered on app quit"""
         self.files_wid._exit_handler()
+        self.console_wid._exit_handler()
         configs.Prefs.set_pref_data('editor_widget_size', (self.width(), self.height()))
 
 class EditorControls(QFrame):
@@ -191,8 +203,8 @@ class EditorControls(QFrame):
         self.btn_new_temp_file.clicked.connect(self.editor.new_temp_file)
         self.btn_save.clicked.connect(self.editor.save_file)
         self.btn_reveal.clicked.connect(self.editor.reveal_file)
-        self.btn_unindent.clicked.connect(event_handler.unindent_text.emit)
-        self.btn_indent.clicked.connect(event_handler.indent_text.emit)
+        self.btn_unindent.clicked.connect(partial(self._emit_to_current_editor, event_handler.unindent_text))
+        self.btn_indent.clicked.connect(partial(self._emit_to_current_editor, event_handler.indent_text))
         self.btn_move_btn_l.clicked.connect(event_handler.move_filebtn_left.emit)
         self.btn_prev_btn.clicked.connect(event_handler.select_previous_filebtn.emit)
         self.btn_next_btn.clicked.connect(event_handler.select_next_filebtn.emit)
@@ -209,6 +221,16 @@ class EditorControls(QFrame):
                 
         return super().eventFilter(obj, event)
 
+    def _emit_to_current_editor(self, event, *args):
+        """Emits an event to the current CodeEditor only
+
+        Args:
+            event (Event): Event to emit
+        """
+        btn = self.editor.files_wid.selected_file_btn
+        if btn:
+            event.emit_to(btn.editor)
+
     def _set_btn_options(self):
         """Set default styling options to buttons"""
         for i in range(self.layout().count()):
@@ -2,6 +2,7 @@
     Name: filesWidget.py
     Description: Widget that holds the list of files, as buttons.
                  Each button holds its editor, which is parented to the editor's stackedlayout.
+                 Pinned files are restored as placeholders, their editor is only built once selected.
 """
 # System Imports
 import os
@@ -13,14 +14,14 @@ import tempfile
 from qtpy.QtWidgets import *
 from qtpy.QtGui import *
 from qtpy.QtCore import *
-import qtawesome
 
 # Local Imports
-from sharedtoolbox import configs, style, event_handler
+from sharedtoolbox import configs, style, event_handler, script_mirror
 from sharedtoolbox.widgets.base import *
 
 from sharedtoolbox.dialogs import infoDialog
 from sharedtoolbox.widgets.editor import pythonEditor
+from sharedtoolbox.utils import iconCache
 
 # ______________________________________________________________________________________________________________________
 
@@ -60,18 +61,18 @@ class FilesWidget(QFrame):
         event_handler.shortcut_previous_filebtn.connect(self._select_previous_filebtn)
         event_handler.shortcut_next_filebtn.connect(self._select_next_filebtn)
         event_handler.file_saved.connect(self._on_file_saved)
+        event_handler.go_to_line.connect(self._go_to_line)
 
         # Init
         self.stacked_layout.addWidget(QLabel(text='\n\nSelect a file to get started..', 
                                              alignment=Qt.AlignHCenter, enabled=False))
-        for file in configs.Prefs.get_pinned_files(valid_only=True):
-            if os.path.isfile(file):
-                self._add_file_tab(file, pinned=True)
+        for file in configs.Prefs.get_pinned_files(valid_only=True, exists=script_mirror.exists):
+            self._add_file_tab(file, pinned=True, select=False)
         if self._file_btns:
             self.select_btn(self._file_btns[0])
 
     def select_btn(self, btn):
-        """Selects the given button
+        """Selects the given button. A placeholder button reads its file and builds its editor first
         
         Args:
             btn (FileButton): Button to select
@@ -79,6 +80,13 @@ class FilesWidget(QFrame):
         if btn is None:
             self.selected_file_btn = None
             return
+        if not btn.loaded:
+            try:
+                btn.load()
+            except OSError:
+                infoDialog.InfoDialog(text='File could not be read', desc=btn.file, info_level=3).exec()
+                return
+            self.stacked_layout.addWidget(btn.editor)
         for btn_ in self._file_btns:
             btn_.selected = False
         btn.selected = True
@@ -88,12 +96,14 @@ class FilesWidget(QFrame):
         event_handler.file_opened.emit(btn.file)
         event_handler.file_state_changed.emit(btn.clean)
         
-    def _add_file_tab(self, file, pinned=False):
+    def _add_file_tab(self, file, pinned=False, select=True):
         """Adds a file tab
         
         Args:
             file (str): File path
             pinned (bool): Pinned? Defaults to False. Only works on new tabs
+            select (bool): Select the tab? Defaults to True. A new tab not selected is a placeholder, its file is
+                only read once selected
 
         Returns:
             FileButton: File button added
@@ -103,14 +113,16 @@ class FilesWidget(QFrame):
                 self.select_btn(btn)
                 return btn
         else:
-            btn = FileButton(file=file, pinned=pinned)
-            self.stacked_layout.addWidget(btn.editor)
+            btn = FileButton(file=file, pinned=pinned, lazy=not select)
+            if btn.loaded:
+                self.stacked_layout.addWidget(btn.editor)
             btn.clicked.connect(partial(self.select_btn, btn))
             btn.closed.connect(partial(self._on_filebtn_closed, btn))
             btn.pinnedChanged.connect(partial(self._on_filebtn_pinnedChanged, btn))
             self._file_btns.append(btn)
             self.btn_layout.insertWidget(self.btn_layout.count() - 1, btn)
-            self.select_btn(btn)
+            if select:
+                self.select_btn(btn)
             return btn
 
     def _on_filebtn_closed(self, btn):
@@ -129,7 +141,8 @@ class FilesWidget(QFrame):
                         self.select_btn(None)
 
         self._file_btns.remove(btn)
-        btn.editor.deleteLater()
+        if btn.loaded:
+            btn.editor.deleteLater()
         btn.deleteLater()
 
     def _on_filebtn_pinnedChanged(self, btn, pinned):
@@ -212,6 +225,15 @@ class FilesWidget(QFrame):
                     event_handler.file_state_changed.emit(btn.clean)
                 break
 
+    def _go_to_line(self, line_number):
+        """Moves the current editor to a line
+
+        Args:
+            line_number (int): Line number, starting at 1
+        """
+        if self.selected_file_btn is not None:
+            self.selected_file_btn.editor.go_to_line(line_number)
+
     def _exit_handler(self):
         """Triggered when the app quits"""
         for btn in self._file_btns:
@@ -222,13 +244,14 @@ class FileButton(QFrame):
     clicked = Signal()
     closed = Signal()
     pinnedChanged = Signal(bool)
-    def __init__(self, file, pinned=False, *args, **kwargs):
+    def __init__(self, file, pinned=False, lazy=False, *args, **kwargs):
         """Constructor
         The button that lives in the FilesWidget. Also contains its python code editor
         
         Args:
             file (str): File path
             pinned (bool): Is file pinned to fileswidget? Defaults to False
+            lazy (bool): Only build the editor and read the file once loaded? Defaults to False
         """
         super(FileButton, self).__init__(objectName='filebutton', *args, **kwargs)
         self.setFixedHeight(24)
@@ -236,16 +259,17 @@ class FileButton(QFrame):
         self._pinned = pinned
         self.volatile = True if self.file.startswith(configs.TEMP_SCRIPT_PATH) else False
         self.clean = True
+        self.version = None  # Version of the file read, see ScriptMirror.version
 
         # Widgets
-        self.icon_locked = qtawesome.icon('fa.lock', color=style.STYLE.get('primary'))
-        self.icon_unlocked = qtawesome.icon('fa.unlock', color=style.STYLE.get('white_disabled'))
-        self.icon_close = qtawesome.icon('fa.close', color=style.STYLE.get('white_disabled'))
+        self.icon_locked = iconCache.icon('fa.lock', color='primary')
+        self.icon_unlocked = iconCache.icon('fa.unlock', color='white_disabled')
+        self.icon_close = iconCache.icon('fa.close', color='white_disabled')
         self.btn_lock = QPushButton(fixedSize=QSize(16, 16), objectName='invisible',
                                     icon=self.icon_locked if pinned else self.icon_unlocked)
         self.lbl_name = QLabel(text=os.path.normpath(file).split(os.sep)[-1], alignment=Qt.AlignCenter)
         self.btn_close = QPushButton(objectName='icon', fixedSize=QSize(16, 16))
-        self.editor = pythonEditor.CodeEditor()
+        self.editor = None  # Built once loaded
 
         # Layout
         self.setLayout(QHBoxLayout())
@@ -258,12 +282,13 @@ class FileButton(QFrame):
         self.selected = False
 
         # Connections
-        self.editor.textChanged.connect(self._on_editor_textChanged)
         self.btn_lock.clicked.connect(self._on_btn_lock_clicked)
         self.btn_close.clicked.connect(self._on_btn_close_clicked)
+        event_handler.file_changed_on_disk.connect(self._on_file_changed_on_disk)
 
         # Init
-        self._read_file()
+        if not lazy:
+            self.load()
 
         # Volatile file settings
         if self.volatile:
@@ -278,7 +303,13 @@ class FileButton(QFrame):
         self._selected = selected
         self.setProperty('selected', selected)
         self.setStyleSheet(self.styleSheet())
-        self.editor.is_selected = selected
+        if self.editor is not None:
+            self.editor.is_selected = selected
+
+    @property
+    def loaded(self):
+        """Returns True once the editor is built"""
+        return self.editor is not None
 
     @property
     def pinned(self):
@@ -318,12 +349,50 @@ class FileButton(QFrame):
         self.closed_handler()
         self.closed.emit()
 
-    def _read_file(self):
-        """Reads the file and set it to the editor"""
-        with open(self.file, 'r') as f:
-            self.editor.setPlainText(f.read())
+    def load(self):
+        """Builds the editor and reads the file into it, if not loaded yet
+
+        Raises:
+            OSError: The file cannot be read
+        """
+        if self.editor is not None:
+            return
+        text = script_mirror.read_text(self.file)
+        self.version = script_mirror.version(self.file)
+        self.editor = pythonEditor.CodeEditor()
+        self.editor.is_selected = self.selected
+        self._read_file(text)
+        self.editor.textChanged.connect(self._on_editor_textChanged)
+
+    def _read_file(self, text=None):
+        """Reads the file and set it to the editor. Shared scripts are read from their local mirror
+
+        Args:
+            text (str): File content already read, optional
+        """
+        self.editor.setPlainText(script_mirror.read_text(self.file) if text is None else text)
         self.clean = True
 
+    def changed_on_disk(self):
+        """Returns True if the file changed on disk since it was read, ie: saved by someone else meanwhile.
+        Mirrored scripts compare against their version as last revalidated by the mirror, without reaching the share"""
+        if self.version is None:
+            return False
+        version = script_mirror.version(self.file)
+        return version is not None and tuple(version) != tuple(self.version)
+
+    def _on_file_changed_on_disk(self, file):
+        """Reads the file again once it changed in the library, unless it has unsaved changes"""
+        if file != self.file or self.editor is None or not self.clean:
+            return
+        self.editor.textChanged.disconnect(self._on_editor_textChanged)
+        try:
+            self._read_file()
+        except OSError:
+            pass
+        self.editor.textChanged.connect(self._on_editor_textChanged)
+        self.version = script_mirror.version(self.file)
+
     def _on_editor_textChanged(self):
         """Sets the filebutton as not clean"""
         if self.clean:
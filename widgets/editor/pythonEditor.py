@@ -56,14 +56,13 @@ class CodeEditor(QPlainTextEdit):
         self.installEventFilter(self)
 
         # Connections
-        # In connections, be mindful of checking if the current editor is currently selected/focus with self.is_selected
-        # Because by default, all active editors are listening to events.
-        event_handler.indent_text.connect(self._indent_selection)
-        event_handler.unindent_text.connect(self._unindent_selection)
-        event_handler.shortcut_indent.connect(self._indent_selection)
-        event_handler.shortcut_unindent.connect(self._unindent_selection)
-        event_handler.theme_changed.connect(self._set_theme)
-        event_handler.font_changed.connect(self._set_theme)
+        # Editing events are targeted to this editor only, see Event.emit_to. Theme and font changes are broadcasts.
+        event_handler.indent_text.connect(self._indent_selection, target=self)
+        event_handler.unindent_text.connect(self._unindent_selection, target=self)
+        event_handler.shortcut_indent.connect(self._indent_selection, target=self)
+        event_handler.shortcut_unindent.connect(self._unindent_selection, target=self)
+        event_handler.theme_changed.connect(self._set_theme, debounce_ms=150)
+        event_handler.font_changed.connect(self._set_theme, debounce_ms=150)
         
     def eventFilter(self, obj, event, *args):
         """Event Filter"""
@@ -101,9 +100,9 @@ class CodeEditor(QPlainTextEdit):
         elif key == Qt.Key_Right and modifiers == Qt.KeyboardModifier.AltModifier | Qt.KeyboardModifier.ControlModifier:
             event_handler.move_filebtn_right.emit()
         elif key == Qt.Key_Tab and modifiers == Qt.KeyboardModifier.NoModifier:
-            event_handler.shortcut_indent.emit()
+            event_handler.shortcut_indent.emit_to(self)
         elif key == Qt.Key_Backtab and modifiers == Qt.KeyboardModifier.ShiftModifier:
-            event_handler.shortcut_unindent.emit()
+            event_handler.shortcut_unindent.emit_to(self)
         elif key == Qt.Key_F3:
             event_handler.shortcut_run_selection.emit()
         elif key == Qt.Key_F5:
@@ -271,8 +270,6 @@ class CodeEditor(QPlainTextEdit):
 
     def _indent_selection(self):
         """Indent the selected lines (or indent from cursor position)"""
-        if not self.is_selected:
-            return
         text_cursor = self.textCursor()
         end_pos = text_cursor.selectionEnd()
         with EditBlock(text_cursor):
@@ -300,8 +297,6 @@ class CodeEditor(QPlainTextEdit):
         
     def _unindent_selection(self):
         """Unindent the selected lines (or the current line)"""
-        if not self.is_selected:
-            return
         text_cursor = self.textCursor()
         end_pos = text_cursor.selectionEnd()
         with EditBlock(text_cursor):
@@ -396,6 +391,19 @@ class CodeEditor(QPlainTextEdit):
 
 
 
+    def go_to_line(self, line_number):
+        """Moves the cursor to the start of a line, and centers the view on it
+
+        Args:
+            line_number (int): Line number, starting at 1
+        """
+        block = self.document().findBlockByNumber(line_number - 1)
+        if not block.isValid():
+            return
+        self.setTextCursor(QTextCursor(block))
+        self.centerCursor()
+        self.setFocus()
+
     def highlight_current_line(self):
         extraSelections = []
 
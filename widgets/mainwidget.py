@@ -1,6 +1,7 @@
 # System Imports
 import os
 import sys
+import datetime
 
 # Third Party Imports
 from qtpy.QtWidgets import *
@@ -10,7 +11,7 @@ import qtawesome
 
 
 # Local Imports
-from sharedtoolbox import configs, style, event_handler
+from sharedtoolbox import configs, style, event_handler, script_mirror
 from sharedtoolbox.widgets.base import *
 
 from sharedtoolbox.dialogs import infoDialog, profileDialog
@@ -33,7 +34,7 @@ class MainWidget(QWidget):
         self.cb_profile.setCurrentText(configs.Prefs.current_profile)
         self.btn_profile_settings = QPushButton(objectName='icon',
                                                 icon=qtawesome.icon('fa.gear', color=style.STYLE.get('primary'), options=[{'scale_factor': 1.25}]))
-        self.btn_reload = QPushButton(objectName='icon',
+        self.btn_reload = QPushButton(objectName='icon', toolTip='Refresh scripts',
                                       icon=qtawesome.icon('mdi.reload', color=style.STYLE.get('primary'), options=[{'scale_factor': 1.25}]))
         self.status_widget = statusBarWidget.StatusBarWidget(parent=self)  # StatusWidget must be constructed first to catch all events
         self.nav_widget = navigation.NavigationWidget(parent=self)
@@ -68,7 +69,11 @@ class MainWidget(QWidget):
         # Connections
         self.btn_profile_settings.clicked.connect(self._show_settings)
         self.cb_profile.currentTextChanged.connect(self._on_profile_changed)
-        self.btn_reload.clicked.connect(self.reload)
+        self.btn_reload.clicked.connect(self.refresh)
+        self.shortcut_quick_open = QShortcut(QKeySequence('Ctrl+P'), self, context=Qt.WindowShortcut)
+        self.shortcut_quick_open.activated.connect(event_handler.shortcut_quick_open.emit)
+        self.shortcut_search_in_scripts = QShortcut(QKeySequence('Ctrl+Shift+F'), self, context=Qt.WindowShortcut)
+        self.shortcut_search_in_scripts.activated.connect(event_handler.shortcut_search_in_scripts.emit)
 
         # Init
         self.bootstrap()
@@ -86,13 +91,14 @@ class MainWidget(QWidget):
             configs.LOCAL_SCRIPT_PATH,
             configs.SHARED_CONFIGS_PATH,
             configs.SHARED_SCRIPT_PATH,
-            configs.TEMP_SCRIPT_PATH
+            configs.TEMP_SCRIPT_PATH,
+            configs.CONSOLE_LOGS_PATH
         ]:
             os.makedirs(dir, exist_ok=True)
 
         # Validate pinned files
         pinned_files = configs.Prefs.get_pinned_files()
-        valid_pinned_files = configs.Prefs.get_pinned_files(valid_only=True)
+        valid_pinned_files = configs.Prefs.get_pinned_files(valid_only=True, exists=script_mirror.exists)
         invalid_pinned_files = [file for file in pinned_files if file not in valid_pinned_files]
         if invalid_pinned_files:
             dlg = infoDialog.InfoDialog(text="Some saved pinned files could not be found. They will be ignored.",
@@ -107,6 +113,9 @@ class MainWidget(QWidget):
         self.nav_widget.reload()
         self.editor_widget.reload()
 
+    def refresh(self):
+        """Refreshes the scripts shown, without reloading the profile"""
+        self.nav_widget.refresh()
 
     def _on_profile_changed(self, profile, silent=False):
         """Triggered when the profile changed
@@ -150,5 +159,9 @@ class MainWidget(QWidget):
         self.nav_widget._exit_handler()
         self.editor_widget._exit_handler()
         self.status_widget._exit_handler()
+        if event_handler.tracing:
+            path = os.path.join(configs.EVENT_TRACES_PATH,
+                                'events_{}.json'.format(datetime.datetime.now().strftime('%Y%m%d_%H%M%S')))
+            event_handler.stop_trace(path)
 
 # ______________________________________________________________________________________________________________________
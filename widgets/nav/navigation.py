@@ -1,17 +1,22 @@
 # System Imports
 import os
 import sys
+import hashlib
+import threading
 
 # Third Party Imports
 from qtpy.QtWidgets import *
 from qtpy.QtGui import *
 from qtpy.QtCore import *
-import qtawesome
 
 # Local Imports
-from sharedtoolbox import style, configs, event_handler
-from sharedtoolbox.dialogs import infoDialog
+from sharedtoolbox import style, configs, event_handler, script_mirror
+from sharedtoolbox.core import scriptScanner, scriptIndex, scriptWatcher, fuzzyIndex, contentIndex, scriptMetadata, \
+    scanRules
+from sharedtoolbox.dialogs import infoDialog, quickOpenDialog, contentSearchDialog
 from sharedtoolbox.widgets.base import *
+from sharedtoolbox.widgets.nav import scriptTreeModel
+from sharedtoolbox.utils import iconCache, pathUtils
 
 # ______________________________________________________________________________________________________________________
 
@@ -23,19 +28,38 @@ class NavigationWidget(QFrame):
         self.resize(*configs.Prefs.nav_widget_size)
 
         # Properties
-        self._item_cache = {}
+        self.scanner = scriptScanner.ScriptScanner(self)
+        self.watcher = scriptWatcher.ScriptWatcher(self)
+        self.poll_timer = QTimer(self, interval=int(configs.Prefs.nav_poll_interval * 1000))
+        self.mirror_timer = QTimer(self, interval=int(configs.Prefs.mirror_sync_interval * 1000))
+        self.search_timer = QTimer(self, singleShot=True, interval=150)
+        self._roots = {}  # Root key: {'path': str, 'network': bool, 'index': ScriptIndex, 'script_location': str}
+        self._scanning = set()  # Root keys
+        self.scan_rules = scanRules.ScanRules()  # Ignore rules and limits of the current profile
+        self.quick_open_index = None  # FuzzyIndex of every cached script, built in the background
+        self._quick_open_build = None  # (model, listings version) of the last index build started
+        self.content_indexer = contentIndex.ContentIndexer(self)
+        self.content_search_dialog = None
+        self.metadata_extractor = scriptMetadata.MetadataExtractor(os.path.join(configs.SCAN_INDEX_PATH, 'metadata.json'),
+                                                                   parent=self)
+        self.listings_timer = QTimer(self, singleShot=True, interval=1000)
+        self._revealing = False  # True while the opened file is selected, so it is not opened again
+        self._pending_reveal = None  # Opened file not listed yet, revealed once its listing is cached
 
         # Widgets
         self.nav_tree = QTreeView()
         self.nav_tree.header().hide()
         self.proxy_model = FilterProxyModel()
         self.btn_new_script = QPushButton(objectName='icon', enabled=False, toolTip='Create a new script in selected location',
-                                          icon=qtawesome.icon('fa5b.python', color=style.STYLE.get('primary')))
+                                          icon=iconCache.icon('fa5b.python', color='primary'))
         self.btn_new_dir = QPushButton(objectName='icon', enabled=False, toolTip='Create a new folder in selected location',
-                                          icon=qtawesome.icon('fa5s.folder-plus', color=style.STYLE.get('primary')))
+                                          icon=iconCache.icon('fa5s.folder-plus', color='primary'))
         self.btn_open_dir = QPushButton(objectName='icon', enabled=False, toolTip='Open selected location',
-                                          icon=qtawesome.icon('ei.folder-open', color=style.STYLE.get('primary')))
-        self.search_bar = QLineEdit(placeholderText='Search..', objectName='searchbar', fixedHeight=24)
+                                          icon=iconCache.icon('ei.folder-open', color='primary'))
+        self.btn_search_in_scripts = QPushButton(objectName='icon', toolTip='[Ctrl+Shift+F] Search in scripts',
+                                                 icon=iconCache.icon('mdi.text-search', color='primary'))
+        self.search_bar = QLineEdit(placeholderText='Search..', objectName='searchbar', fixedHeight=24,
+                                    toolTip='Search by name, by path with "/", or by tag, dcc or author with "#"')
 
         # Layout
         self.header_layout = QHBoxLayout()
@@ -63,17 +87,33 @@ class NavigationWidget(QFrame):
         self.btn_new_script.clicked.connect(self._on_btn_new_script_clicked)
         self.btn_new_dir.clicked.connect(self._on_btn_new_dir_clicked)
         self.btn_open_dir.clicked.connect(self._on_btn_open_dir_clicked)
+        self.btn_search_in_scripts.clicked.connect(self.show_content_search)
+        self.scanner.rootStarted.connect(self._on_scanner_rootStarted)
+        self.scanner.batchReady.connect(self._on_scanner_batchReady)
+        self.scanner.rootFinished.connect(self._on_scanner_rootFinished)
+        self.watcher.dirsChanged.connect(self._on_watcher_dirsChanged)
+        self.poll_timer.timeout.connect(self._on_poll_timer_timeout)
+        self.mirror_timer.timeout.connect(self.sync_mirror)
+        self.search_timer.timeout.connect(self._on_search_timer_timeout)
+        self.listings_timer.timeout.connect(self._on_listings_timer_timeout)
+        event_handler.shortcut_quick_open.connect(self.show_quick_open)
+        event_handler.shortcut_search_in_scripts.connect(self.show_content_search)
+        event_handler.file_saved.connect(self.content_indexer.update_file)
+        event_handler.file_saved.connect(self.metadata_extractor.request_file)
+        self.metadata_extractor.metadataReady.connect(self._on_metadata_extractor_metadataReady)
         event_handler.file_opened.connect(self._on_editor_file_opened)
 
         # Init
         self._set_new_model()
         self._load_scripts()
+        self.poll_timer.start()
+        self.mirror_timer.start()
 
     @property
     def selected_item(self):
         """Returns the selected item"""
         index = self.nav_tree.selectionModel().currentIndex()
-        if index.isValid():
+        if index.isValid() and self.nav_tree.selectedIndexes():
             item = self.proxy_model.itemData(self.nav_tree.selectedIndexes()[0])
             return item
         else:
@@ -89,11 +129,69 @@ class NavigationWidget(QFrame):
             return None
 
     def reload(self):
-        """Reload tool"""
-        self._item_cache = {}
+        """Reload tool. Rebuilds the model, used when the profile changed"""
         self._set_new_model()
         self._load_scripts()
 
+    def refresh(self):
+        """Scans every root again. Only the directories changed since their last scan are listed and updated"""
+        for key in self._roots:
+            self._scan_root(key)
+
+    def sync_mirror(self):
+        """Revalidates the local mirror of the shared scripts in the background, once the shared root is scanned"""
+        node = self.model.root_node('shared')
+        if node is None or not node.listing_path or 'shared' in self._scanning:
+            return
+        roots, listings = [(node.name, node.listing_path)], self.model.snapshot()[1]
+        script_mirror.request_sync(path for name, relative_path, path in scriptTreeModel.iter_scripts(roots, listings))
+
+    def show_quick_open(self):
+        """Shows the quick open palette"""
+        if self._quick_open_build != (self.model, self.model.listings_version) or self.quick_open_index is None:
+            # Index outdated, or still building
+            self._quick_open_build = (self.model, self.model.listings_version)
+            self.quick_open_index = fuzzyIndex.FuzzyIndex(list(scriptTreeModel.iter_scripts(*self.model.snapshot())))
+        quickOpenDialog.QuickOpenDialog(self.quick_open_index, parent=self).exec_()
+
+    def show_content_search(self):
+        """Shows the search in scripts dialog. Scripts changed on disk since they were indexed are indexed again"""
+        roots, listings = self.model.snapshot()
+        serial = self.content_indexer.update(
+            path for name, relative_path, path in scriptTreeModel.iter_scripts(roots, listings))
+        if self.content_search_dialog is None:
+            self.content_search_dialog = contentSearchDialog.ContentSearchDialog(self.content_indexer, roots, parent=self)
+        self.content_search_dialog.roots = roots
+        self.content_search_dialog.wait_for_index(serial)
+        self.content_search_dialog.show()
+        self.content_search_dialog.raise_()
+        self.content_search_dialog.activateWindow()
+        self.content_search_dialog.le_search.setFocus()
+        self.content_search_dialog.le_search.selectAll()
+
+    def _on_listings_timer_timeout(self):
+        """Indexes the content and extracts the metadata of the scripts changed on disk, on a worker thread. Scripts
+        edited in place change no listing, so this runs on every poll and directory change.
+        Once the listings changed, also builds the quick open index"""
+        build = (self.model, self.model.listings_version)
+        rebuild = build != self._quick_open_build
+        if rebuild:
+            self._quick_open_build = build
+            self.quick_open_index = None
+        roots, listings = self.model.snapshot()
+
+        def run():
+            scripts = list(scriptTreeModel.iter_scripts(roots, listings))
+            self.content_indexer.update(script[2] for script in scripts)
+            self.metadata_extractor.request(script[2] for script in scripts)
+            if not rebuild:
+                return
+            index = fuzzyIndex.FuzzyIndex(scripts)
+            if self._quick_open_build is build:
+                self.quick_open_index = index
+
+        threading.Thread(target=run, name='ScriptIndexes', daemon=True).start()
+
     def init_header_layout(self):
         """Init the header layout"""
         self.header_layout.addWidget(QLabel(text='Explorer', enabled=False))
@@ -102,16 +200,19 @@ class NavigationWidget(QFrame):
         self.header_layout.addWidget(self.btn_new_dir)
         self.header_layout.addWidget(VLine())
         self.header_layout.addWidget(self.btn_open_dir)
+        self.header_layout.addWidget(VLine())
+        self.header_layout.addWidget(self.btn_search_in_scripts)
 
     def _set_new_model(self):
         """Sets a new model on the treeview"""
-        self.model = QStandardItemModel()
+        self.model = scriptTreeModel.ScriptTreeModel()
+        self.model.listing_filter = self._filter_listing
         self.proxy_model.setSourceModel(self.model)
         self.nav_tree.setModel(self.proxy_model)
         self.nav_tree.selectionModel().selectionChanged.connect(self._on_treeview_itemSelected)
 
     def _on_treeview_itemSelected(self, *args, **kwargs):
-        """Triggered when a ContainerItem/ScriptItem has been selected"""
+        """Triggered when a directory/script has been selected"""
         item_path = self.selected_item_path
 
         # Toggle new script button state
@@ -125,83 +226,187 @@ class NavigationWidget(QFrame):
             self.btn_open_dir.setEnabled(True)
 
         # Emit selection signal
-        if item_path and item_path.endswith('.py'):
+        if item_path and item_path.endswith('.py') and not self._revealing:
             event_handler.file_clicked.emit(item_path)
 
     def _load_scripts(self):
-        """Loads all scripts found"""
-        _item_cache = {}
+        """Loads all scripts found
+        Every root is first rendered from its index, the result of its last scan. Roots are then scanned in the
+        background, listing only the directories changed since, so expanding a directory never waits on the disk
+        or network.
+        Directories on local drives are then watched, roots on network drives are scanned again every
+        nav_poll_interval seconds.
+        Directories pruned by the .sharedtoolboxignore files or the profile's scan limits are never listed
+        """
+        self.scanner.cancel()
+        self.watcher.clear()
+        self._roots = {}
+        self._scanning = set()
+        self.scan_rules = scanRules.ScanRules(max_depth=configs.Prefs.scan_max_depth,
+                                              max_entries=configs.Prefs.scan_max_entries)
+        self.metadata_extractor.reset()
+        self.content_indexer.open(os.path.join(configs.SCAN_INDEX_PATH, 'content_{}.json.gz'.format(
+            hashlib.sha1(str(configs.Prefs.current_profile).encode('utf-8')).hexdigest())))
 
         # Local scripts
         local_script_path = configs.Prefs.get_local_script_path()
-        local_item = ContainerItem(local_script_path, 'Local')
-        self.model.appendRow(local_item)
-        _item_cache[local_script_path] = local_item
-
-        if os.path.exists(local_script_path):
-            for root, dirs, files in os.walk(local_script_path):
-                for dir in dirs:
-                    itemN = ContainerItem(os.path.join(root, dir), dir)
-                    _item_cache.get(root).appendRow(itemN)
-                    _item_cache[os.path.join(root, dir)] = itemN
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    if file.endswith('.py'):
-                        itemN = ScriptItem(file_path, file[0:-3])
-                        _item_cache.get(root).appendRow(itemN)
-                    
+        self.model.add_root('local', local_script_path, 'Local')
+        self._add_root('local', local_script_path)
+
         # Shared scripts
         shared_script_path = configs.Prefs.get_shared_script_path()
-        shared_item = ContainerItem(shared_script_path, 'Shared')
-        self.model.appendRow(shared_item)
-        _item_cache[shared_script_path] = shared_item
-
-        if os.path.exists(shared_script_path):
-            for root, dirs, files in os.walk(shared_script_path):
-                for dir in dirs:
-                    itemN = ContainerItem(os.path.join(root, dir), dir)
-                    _item_cache.get(root).appendRow(itemN)
-                    _item_cache[os.path.join(root, dir)] = itemN
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    if file.endswith('.py'):
-                        itemN = ScriptItem(file_path, file[0:-3])
-                        _item_cache.get(root).appendRow(itemN)
+        self.model.add_root('shared', shared_script_path, 'Shared')
+        self._add_root('shared', shared_script_path)
 
         # Project Scripts
         project_root_path = configs.Prefs.get_project_root_path()
         project_script_location = configs.Prefs.get_project_script_location()
-        project_item = ContainerItem(None, 'Projects')
-        self.model.appendRow(project_item)
-        _item_cache[project_root_path] = shared_item
-
-        if project_root_path and os.path.exists(project_root_path):
-            for dir in os.listdir(project_root_path):
-                dir_path = os.path.join(project_root_path, dir)
-                if not os.path.isdir(dir_path):
-                    continue
-                project_script_path = os.path.join(dir_path, project_script_location)
-                current_project_item = ContainerItem(project_script_path, dir)
-                _item_cache[project_script_path] = current_project_item
-                project_item.appendRow(current_project_item)
-                for root, dirs, files in os.walk(project_script_path):
-                    for dir_ in dirs:
-                        itemN = ContainerItem(os.path.join(root, dir_), dir_)
-                        _item_cache.get(root).appendRow(itemN)
-                        _item_cache[os.path.join(root, dir_)] = itemN
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        if file.endswith('.py'):
-                            itemN = ScriptItem(file_path, file[0:-3])
-                            _item_cache.get(root).appendRow(itemN)
-
-        self._item_cache = _item_cache
+        self.model.add_root('projects', None, 'Projects', listing_path=project_root_path or None, scan_only=True)
+        if project_root_path:
+            self._add_root('projects', project_root_path, script_location=project_script_location)
+
+    def _add_root(self, key, path, script_location=None):
+        """Renders a root from its index, watches it if local, and scans it in the background
+
+        Args:
+            key (str): Root key
+            path (str): Root path
+            script_location (str): Script folder, relative to each project. Only for the projects root
+        """
+        index = scriptIndex.ScriptIndex(configs.SCAN_INDEX_PATH, path)
+        network = scriptWatcher.is_network_path(path)
+        self._roots[key] = {'path': path, 'network': network, 'index': index, 'script_location': script_location}
+        if index.load():
+            listings = list(index.listings())
+            self.model.cache_listings(listings)
+            self.listings_timer.start()
+            if not network:
+                self.watcher.watch(listing[0] for listing in listings)
+        self._scan_root(key)
+
+    def _scan_root(self, key):
+        """Scans a root in the background, unless it is already being scanned
+
+        Args:
+            key (str): Root key
+        """
+        root = self._roots.get(key)
+        if root is None or key in self._scanning:
+            return
+        self._scanning.add(key)
+        share_concurrency = {os.path.normcase(share): value
+                             for share, value in (configs.Prefs.scan_share_concurrency or {}).items()}
+        concurrency = share_concurrency.get(scriptScanner.share_of(root['path']), configs.Prefs.scan_concurrency or 1)
+        if root['script_location'] is None:
+            self.scanner.scan(key, root['path'], index=root['index'], concurrency=concurrency, rules=self.scan_rules)
+        else:
+            self.scanner.scan_projects(key, root['path'], root['script_location'], index=root['index'],
+                                       concurrency=concurrency, rules=self.scan_rules)
+
+    def _filter_listing(self, path, dirs, files):
+        """Prunes a directory listed on expand or refresh with the scan rules, like the scanned listings
+
+        Args:
+            path (str): Directory path
+            dirs (list): [(directory name, directory path)]
+            files (list): Script names
+
+        Returns:
+            list, list: [(directory name, directory path)], script names
+        """
+        key = pathUtils.normalize_path(path)
+        for root in self._roots.values():
+            root_path = root['path']
+            root_key = pathUtils.normalize_path(root_path)
+            if key != root_key and not key.startswith(os.path.join(root_key, '')):
+                continue
+            if root['script_location'] is not None:
+                # Rules apply from the script location of each project
+                if key == root_key:
+                    return dirs, files
+                project = os.path.relpath(path, root_path).split(os.sep)[0]
+                root_path = os.path.join(root_path, project, root['script_location'])
+            return self.scan_rules.filter_listing(root_path, path, dirs, files)
+        return dirs, files
+
+    def _on_scanner_rootStarted(self, generation, key):
+        """Shows the root as busy while it is scanned, if it has nothing to show yet"""
+        if generation != self.scanner.generation:
+            return
+        node = self.model.root_node(key)
+        if node is not None and node.listing_path and self.model.cached_listing(node.listing_path) is None:
+            self.model.set_busy(key, True)
+
+    def _on_scanner_batchReady(self, generation, key, listings):
+        """Caches a batch of listings scanned in the background"""
+        if generation != self.scanner.generation:
+            return
+        self.model.cache_listings(listings)
+        self.listings_timer.start()
+        if self.search_bar.text():
+            self.search_timer.start()
+        if self._pending_reveal is not None and self.reveal(self._pending_reveal):
+            self._pending_reveal = None
+        root = self._roots.get(key)
+        if root is not None and not root['network']:
+            self.watcher.watch(listing[0] for listing in listings)
+
+    def _on_scanner_rootFinished(self, generation, key):
+        """Clears the root's busy state. The shared scripts' mirror is revalidated once the shared root is scanned"""
+        if generation == self.scanner.generation:
+            self._scanning.discard(key)
+            self.model.set_busy(key, False)
+            if key == 'shared':
+                self.sync_mirror()
+
+    def _on_watcher_dirsChanged(self, paths):
+        """Lists the changed directories again, along with the new directories found in them"""
+        projects = self._roots.get('projects')
+        stack = list(paths)
+        while stack:
+            path = stack.pop()
+            if projects is not None and pathUtils.normalize_path(path) == pathUtils.normalize_path(projects['path']):
+                # Projects point to their script location, the scanner resolves them
+                self._scan_root('projects')
+                continue
+            self.model.refresh_dir(path)
+            listing = self.model.cached_listing(path)
+            if listing is None:
+                continue
+            self.watcher.watch([path])
+            stack.extend(dir_path for name, dir_path in listing[0] if self.model.cached_listing(dir_path) is None)
+        self.listings_timer.start()
+        if self.search_bar.text():
+            self.search_timer.start()
+
+    def _on_metadata_extractor_metadataReady(self, metadata):
+        """Shows the scripts' metadata as tooltips, and searches again if searching tags"""
+        self.model.set_metadata(metadata)
+        if self.search_bar.text().startswith('#'):
+            self.search_timer.start()
+
+    def _on_poll_timer_timeout(self):
+        """Scans the network roots again, and revalidates the scripts' indexes against their mtime"""
+        for key, root in self._roots.items():
+            if root['network']:
+                self._scan_root(key)
+        self.listings_timer.start()
 
     def _on_search_bar_textChanged(self, search_text):
-        """Search the script list"""
-        self.proxy_model.setSearchTerm(search_text)
-        if search_text:
-            self.nav_tree.expandAll()
+        """Searches once typing paused"""
+        self.search_timer.start()
+
+    def _on_search_timer_timeout(self):
+        """Search the script list. Only the directories above the matches are fetched and expanded"""
+        ancestors = self.proxy_model.setSearchTerm(self.search_bar.text())
+        if not ancestors:
+            return
+        self.nav_tree.setUpdatesEnabled(False)
+        try:
+            for node in self.model.fetch_paths(ancestors):
+                self.nav_tree.expand(self.proxy_model.mapFromSource(self.model.index_of(node)))
+        finally:
+            self.nav_tree.setUpdatesEnabled(True)
 
     def _on_btn_new_dir_clicked(self):
         """Creates a new directory at the selected location"""
@@ -217,8 +422,7 @@ class NavigationWidget(QFrame):
         except:
             print('Failed creating new script at "{}"'.format(path))
             return
-        itemN = ContainerItem(path, os.path.basename(path))
-        self._item_cache.get(self.selected_item_path).appendRow(itemN)
+        self.model.refresh_dir(self.selected_item_path)
 
     def _on_btn_open_dir_clicked(self):
         """Open the selected item in the file browser"""
@@ -247,25 +451,40 @@ class NavigationWidget(QFrame):
         except:
             print('Failed creating new script at "{}"'.format(path))
             return
-        itemN = ScriptItem(path, os.path.basename(path)[0:-3])
-        self._item_cache.get(os.path.dirname(path)).appendRow(itemN)
+        self.model.refresh_dir(self.selected_item_path)
 
         # Selection not working
         # index = self.nav_tree.model().index(itemN.row(), itemN.column())
         # self.nav_tree.selectionModel().setCurrentIndex(index, QItemSelectionModel.SelectionFlag.Select)
 
-    def iter_tree_items(self):
-        """WIP: Related on _on_editor_file_opened"""
-        root = self.model.invisibleRootItem()
-        def recurse(parent):
-            for row in range(parent.rowCount()):
-                for column in range(parent.columnCount()):
-                    child = parent.child(row, column)
-                    yield child
-                    if child.hasChildren():
-                        yield from recurse(child)
-        if root is not None:
-            yield from recurse(root)
+    def reveal(self, file):
+        """Selects a script, expanding the directories above it and scrolling to it.
+        Only the directories above the script are fetched, see ScriptTreeModel.fetch_path
+
+        Args:
+            file (str): Script path
+
+        Returns:
+            bool: True if the script was found
+        """
+        node = self.model.fetch_path(file)
+        if node is None:
+            return False
+        index = self.proxy_model.mapFromSource(self.model.index_of(node))
+        if not index.isValid():
+            # Filtered out by the search
+            return True
+        parent = index.parent()
+        while parent.isValid():
+            self.nav_tree.expand(parent)
+            parent = parent.parent()
+        self._revealing = True
+        try:
+            self.nav_tree.selectionModel().setCurrentIndex(index, QItemSelectionModel.ClearAndSelect)
+        finally:
+            self._revealing = False
+        self.nav_tree.scrollTo(index)
+        return True
 
     def _on_editor_file_opened(self, file):
         """Triggered by the editor when a new file has been opened
@@ -274,46 +493,44 @@ class NavigationWidget(QFrame):
         Args:
             file (str): File path
         """
-        if self.selected_item_path and os.path.normpath(self.selected_item_path) != os.path.normpath(file):
-            # Select the file if found
-            # TODO: Loop over model items, if item matches get its index from the model and self.nav_tree.expand(index)
-            pass
+        self._pending_reveal = None
+        if self.selected_item_path and os.path.normpath(self.selected_item_path) == os.path.normpath(file):
+            return
+        if not self.reveal(file):
+            self._pending_reveal = file
 
     def _exit_handler(self):
         """Triggered on app quit"""
+        self.poll_timer.stop()
+        self.mirror_timer.stop()
+        self.watcher.clear()
+        self.scanner.cancel()
         configs.Prefs.set_pref_data('nav_widget_size', (self.width(), self.height()))
 
 
-class ContainerItem(QStandardItem):
-
-    def __init__(self, path, *args, **kwargs):
-        icon = qtawesome.icon('fa.folder', color=style.STYLE.get('secondary'))
-        super(ContainerItem, self).__init__(icon, *args, **kwargs)
-        self.path = path
-        self.setEditable(False)
-        self.setCheckable(False)
-        self.setData(path, role=Qt.UserRole)
-
-
-class ScriptItem(QStandardItem):
-
-    def __init__(self, script, *args, **kwargs):
-        icon = qtawesome.icon('fa5b.python', color=style.STYLE.get('primary'))
-        super(ScriptItem, self).__init__(icon, *args, **kwargs)
-        self.script = os.path.normpath(script)
-        self.setEditable(False)
-        self.setCheckable(False)
-        self.setData(script, role=Qt.UserRole)
-
-        
 class FilterProxyModel(QSortFilterProxyModel):
     def __init__(self, *args, **kwargs):
         super(FilterProxyModel, self).__init__(*args, **kwargs)
         self.search_term = ''
+        self.matches = set()  # Normalized paths
+        self.ancestors = set()  # Normalized paths of the directories above the matches
 
     def setSearchTerm(self, term):
+        """Filters the tree down to the matches of the search term, and the directories above them
+
+        Args:
+            term (str): Search term
+
+        Returns:
+            set: Normalized paths of the directories above the matches
+        """
         self.search_term = term.lower()
+        if self.search_term:
+            self.matches, self.ancestors = self.sourceModel().search(self.search_term)
+        else:
+            self.matches, self.ancestors = set(), set()
         self.invalidateFilter()
+        return self.ancestors
 
     def filterAcceptsRow(self, source_row, source_parent):
         if not self.search_term:
@@ -323,15 +540,6 @@ class FilterProxyModel(QSortFilterProxyModel):
         index = model.index(source_row, 0, source_parent)
         if not index.isValid():
             return False
-
-        # Check the current item
-        if self.search_term in model.data(index).lower():
-            return True
-
-        # Check the children of the current item
-        for row in range(model.rowCount(index)):
-            if self.filterAcceptsRow(row, index):
-                return True
-
-        return False
+        key = model.node_key(model.node_from_index(index))
+        return key in self.matches or key in self.ancestors
 # ______________________________________________________________________________________________________________________
@@ -0,0 +1,549 @@
+"""
+    Name: scriptTreeModel.py
+    Description: Lazy item model of the script trees. Directories are only listed when expanded
+"""
+# System Imports
+import os
+import sys
+
+# Third Party Imports
+from qtpy.QtWidgets import *
+from qtpy.QtGui import *
+from qtpy.QtCore import *
+
+# Local Imports
+from sharedtoolbox.core import scriptScanner, scriptMetadata
+from sharedtoolbox.utils import iconCache, pathUtils
+
+# ______________________________________________________________________________________________________________________
+
+
+class TreeNode(object):
+    """
+    A directory or script of the tree
+    """
+    __slots__ = ('name', 'path', 'listing_path', 'is_dir', 'parent', 'children', 'row', 'fetched', 'busy', 'root_key')
+
+    def __init__(self, name, path, is_dir, parent=None, listing_path=None):
+        """Constructor
+
+        Args:
+            name (str): Display name
+            path (str): Path, None for virtual folders
+            is_dir (bool): Is a directory?
+            parent (TreeNode): Parent node
+            listing_path (str): Path listed for the children. Defaults to path
+        """
+        self.name = name
+        self.path = path
+        self.listing_path = listing_path or path
+        self.is_dir = is_dir
+        self.parent = parent
+        self.children = []
+        self.row = 0
+        self.fetched = not is_dir
+        self.busy = False
+        self.root_key = parent.root_key if parent is not None else None
+
+    @property
+    def key(self):
+        """Returns the key identifying this node among its siblings"""
+        return (self.is_dir, self.name)
+
+
+def iter_scripts(roots, listings):
+    """Iterates over every script reachable from the roots' cached listings
+
+    Args:
+        roots (list): [(root text, root listing path)]
+        listings (dict): Normalized directory path: ([(directory name, directory path)], script names)
+
+    Yields:
+        str, str, str: Script name, path relative to the roots (starting with the root text), path
+    """
+    stack = [(path, text) for text, path in reversed(roots)]
+    while stack:
+        path, relative_path = stack.pop()
+        listing = listings.get(pathUtils.normalize_path(path))
+        if listing is None:
+            continue
+        dirs, files = listing
+        for file in files:
+            yield file[0:-3], relative_path + '/' + file[0:-3], os.path.join(path, file)
+        stack.extend((dir_path, relative_path + '/' + name) for name, dir_path in reversed(dirs))
+
+
+class SearchIndex(object):
+    """
+    Lowercase names, paths and tags of every directory and script reachable from the roots' cached listings, used
+    to filter the tree without walking it.
+    A search extending the previous one only checks the previous matches.
+    """
+
+    def __init__(self):
+        self.names = []  # Lowercase names
+        self.paths = []  # Lowercase paths, with forward slashes
+        self.tags = []  # Lowercase tags, dccs and author of the scripts, space separated
+        self.keys = []  # Normalized paths
+        self.parents = {}  # Normalized path: normalized parent path
+        self._last_term = None
+        self._last_matches = None
+
+    @staticmethod
+    def _mode(term):
+        """Returns the values a term is matched against: 'tags' for terms starting with #, 'paths' for terms
+        holding a path separator, else 'names'"""
+        if term.startswith('#'):
+            return 'tags'
+        return 'paths' if '/' in term else 'names'
+
+    def build(self, root_keys, listings, metadata=None):
+        """Indexes the listings reachable from the roots
+
+        Args:
+            root_keys (list): Normalized listing paths of the roots
+            listings (dict): Normalized directory path: ([(directory name, directory path)], script names)
+            metadata (dict): Normalized script path: script metadata, optional. See scriptMetadata.extract
+        """
+        metadata = metadata or {}
+        self.names, self.paths, self.tags, self.keys, self.parents = [], [], [], [], {}
+        self._last_term = self._last_matches = None
+        stack = list(reversed(root_keys))
+        while stack:
+            key = stack.pop()
+            listing = listings.get(key)
+            if listing is None:
+                continue
+            dirs, files = listing
+            dir_keys = [pathUtils.normalize_path(dir_path) for name, dir_path in dirs]
+            # Keys are normalized already, script names only need their case normalized
+            prefix = os.path.join(key, '')
+            file_keys = [prefix + os.path.normcase(file) for file in files]
+            self.names.extend(name.lower() for name, dir_path in dirs)
+            self.names.extend(file[0:-3].lower() for file in files)
+            self.tags.extend('' for dir_key in dir_keys)
+            for file_key in file_keys:
+                script_metadata = metadata.get(file_key)
+                self.tags.append(' '.join(script_metadata.get('tags', []) + script_metadata.get('dcc', []) +
+                                          [script_metadata.get('author', '')]).strip().lower()
+                                 if script_metadata else '')
+            for child_key in dir_keys + file_keys:
+                self.keys.append(child_key)
+                self.paths.append(child_key.lower().replace('\\', '/'))
+                self.parents[child_key] = key
+            stack.extend(reversed(dir_keys))
+
+    def search(self, term):
+        """Searches the index. Terms starting with # are matched against the scripts' tags, dccs and author, terms
+        holding a path separator against paths, else against names
+
+        Args:
+            term (str): Search term
+
+        Returns:
+            set, set: Normalized paths of the matches, normalized paths of the directories above the matches
+        """
+        term = term.lower().replace('\\', '/')
+        mode = self._mode(term)
+        values = getattr(self, mode)
+        if self._last_term is not None and term.startswith(self._last_term) and mode == self._mode(self._last_term):
+            candidates = self._last_matches
+        else:
+            candidates = range(len(values))
+        text = term[1:] if mode == 'tags' else term
+        matches = [i for i in candidates if text in values[i] and (mode != 'tags' or values[i])]
+        self._last_term, self._last_matches = term, matches
+
+        matched = set(self.keys[i] for i in matches)
+        ancestors = set()
+        for key in matched:
+            parent = self.parents.get(key)
+            while parent is not None and parent not in ancestors:
+                ancestors.add(parent)
+                parent = self.parents.get(parent)
+        return matched, ancestors
+
+
+class ScriptTreeModel(QAbstractItemModel):
+    """
+    Item model of the script trees.
+
+    Directory nodes are listed on expand (fetchMore), from the listing cache when the background scan already
+    listed them, else with os.scandir. Listings cached after a directory was fetched are applied incrementally.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(ScriptTreeModel, self).__init__(*args, **kwargs)
+        self._root = TreeNode(None, None, True)
+        self._root.fetched = True
+        self._nodes = {}  # Normalized path: node. Directories are registered by listing path, once created
+        self._listings = {}  # Normalized directory path: ([(directory name, directory path)], script names)
+        self._root_nodes = {}  # Root key: node
+        self._scan_only = set()  # Normalized listing paths whose children only come from scanned listings
+        self._search_index = SearchIndex()
+        self._search_index_dirty = True
+        self._metadata = {}  # Normalized script path: script metadata, see scriptMetadata.extract
+        self.listing_filter = None  # Function pruning the directories listed on expand or refresh, see list_dir
+        self.listings_version = 0  # Incremented whenever a listing is cached
+        self._icons = {
+            'dir': iconCache.icon('fa.folder', color='secondary'),
+            'script': iconCache.icon('fa5b.python', color='primary'),
+            'busy': iconCache.icon('mdi.timer-sand', color='secondary'),
+        }
+
+    # Roots and listings
+
+    def add_root(self, key, path, text, listing_path=None, scan_only=False):
+        """Adds a top-level directory
+
+        Args:
+            key (str): Root key
+            path (str): Root path, None for virtual folders
+            text (str): Display text
+            listing_path (str): Path listed for the children. Defaults to path
+            scan_only (bool): Children only come from scanned listings, never from listing the directory on expand
+
+        Returns:
+            TreeNode: Root node
+        """
+        node = TreeNode(text, path, True, parent=self._root, listing_path=listing_path)
+        if scan_only and node.listing_path:
+            self._scan_only.add(pathUtils.normalize_path(node.listing_path))
+        node.root_key = key
+        node.row = len(self._root.children)
+        self.beginInsertRows(QModelIndex(), node.row, node.row)
+        self._root.children.append(node)
+        self._register(node)
+        self.endInsertRows()
+        self._root_nodes[key] = node
+        return node
+
+    def root_node(self, key):
+        """Returns the root node of the given key"""
+        return self._root_nodes.get(key)
+
+    def snapshot(self):
+        """Returns a copy of the roots and cached listings, safe to read from another thread
+
+        Returns:
+            list, dict: [(root text, root listing path)], listings
+        """
+        roots = [(node.name, node.listing_path) for node in self._root.children if node.listing_path]
+        return roots, dict(self._listings)
+
+    def set_busy(self, key, busy):
+        """Shows a root as busy, while it is scanned
+
+        Args:
+            key (str): Root key
+            busy (bool): Busy?
+        """
+        node = self._root_nodes.get(key)
+        if node is not None and node.busy != busy:
+            node.busy = busy
+            index = self.index_of(node)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole, Qt.ToolTipRole])
+
+    def cache_listings(self, listings):
+        """Caches directory listings. Directories already fetched are updated with the differences
+
+        Args:
+            listings: Iterable of (directory path, [(directory name, directory path)], script names). None listings
+                drop the cached listing of a partially scanned directory, it is listed in full on expand instead
+        """
+        for path, dirs, files in listings:
+            key = pathUtils.normalize_path(path)
+            if dirs is None:
+                if self._listings.pop(key, None) is not None:
+                    self._search_index_dirty = True
+                    self.listings_version += 1
+                continue
+            self._listings[key] = (dirs, files)
+            self._search_index_dirty = True
+            self.listings_version += 1
+            node = self._nodes.get(key)
+            if node is not None and node.fetched:
+                self._apply_listing(node, dirs, files)
+
+    def cached_listing(self, path):
+        """Returns the cached listing of a directory
+
+        Returns:
+            list, list: [(directory name, directory path)], script names. None if not cached
+        """
+        return self._listings.get(pathUtils.normalize_path(path))
+
+    def refresh_dir(self, path):
+        """Lists a directory again and applies the differences
+
+        Args:
+            path (str): Directory path
+        """
+        dirs, files = self.list_dir(path)
+        if dirs is not None:
+            self.cache_listings([(path, dirs, files)])
+
+    def list_dir(self, path):
+        """Lists a directory, pruned by the listing filter like the scanned listings
+
+        Args:
+            path (str): Directory path
+
+        Returns:
+            list, list: [(directory name, directory path)], script names. None, None if the directory cannot be listed
+        """
+        names, files = scriptScanner.list_dir(path)
+        if names is None:
+            return None, None
+        dirs = [(name, os.path.join(path, name)) for name in names]
+        if self.listing_filter is not None:
+            dirs, files = self.listing_filter(path, dirs, files)
+        return dirs, files
+
+    def set_metadata(self, metadata):
+        """Sets the metadata of scripts, shown as tooltips and searched as tags
+
+        Args:
+            metadata (dict): Script path: script metadata, see scriptMetadata.extract
+        """
+        for path, script_metadata in metadata.items():
+            key = pathUtils.normalize_path(path)
+            self._metadata[key] = script_metadata
+            node = self._nodes.get(key)
+            if node is not None:
+                index = self.index_of(node)
+                self.dataChanged.emit(index, index, [Qt.ToolTipRole])
+        self._search_index_dirty = True
+
+    def search(self, term):
+        """Searches the names, the paths or the tags of every cached directory and script
+
+        Args:
+            term (str): Search term
+
+        Returns:
+            set, set: Normalized paths of the matches, normalized paths of the directories above the matches
+        """
+        if self._search_index_dirty:
+            root_keys = [pathUtils.normalize_path(node.listing_path) for node in self._root.children if node.listing_path]
+            self._search_index.build(root_keys, self._listings, self._metadata)
+            self._search_index_dirty = False
+        return self._search_index.search(term)
+
+    def fetch_paths(self, keys):
+        """Fetches the directories of the given normalized paths, from their cached listings, parents first
+
+        Args:
+            keys (set): Normalized directory paths
+
+        Returns:
+            list: Fetched TreeNode list, parents first
+        """
+        fetched = []
+        stack = [node for node in reversed(self._root.children)
+                 if node.listing_path and pathUtils.normalize_path(node.listing_path) in keys]
+        while stack:
+            node = stack.pop()
+            if not node.fetched:
+                self.fetchMore(self.index_of(node))
+            fetched.append(node)
+            stack.extend(child for child in reversed(node.children)
+                         if child.is_dir and pathUtils.normalize_path(child.listing_path) in keys)
+        return fetched
+
+    def node_key(self, node):
+        """Returns the normalized path identifying a node, as used by search"""
+        path = node.listing_path if node.is_dir else node.path
+        return pathUtils.normalize_path(path) if path else None
+
+    def node(self, path):
+        """Returns the created node of a path, or of a directory's listing path"""
+        return self._nodes.get(pathUtils.normalize_path(path))
+
+    def fetch_path(self, path):
+        """Fetches the directories above a path, from their cached listings if any, and returns its node.
+        Only the directories on the way are fetched, each one found by walking the path up to its closest created
+        node, so the cost depends on the path's depth only
+
+        Args:
+            path (str): Script or directory path
+
+        Returns:
+            TreeNode: Node of the path. None if the path is not under a root, or not listed
+        """
+        key = pathUtils.normalize_path(path)
+        while True:
+            node = self._nodes.get(key)
+            if node is not None:
+                return node
+            parent_key = key
+            while node is None:
+                next_key = os.path.dirname(parent_key)
+                if next_key == parent_key:
+                    return None
+                parent_key = next_key
+                node = self._nodes.get(parent_key)
+            if node.fetched:
+                # Listed already, the path is not in it
+                return None
+            self.fetchMore(self.index_of(node))
+
+    def node_from_index(self, index):
+        """Returns the node of a model index"""
+        return index.internalPointer() if index.isValid() else self._root
+
+    def index_of(self, node):
+        """Returns the model index of a node"""
+        if node is None or node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node)
+
+    # QAbstractItemModel
+
+    def index(self, row, column, parent=QModelIndex()):
+        parent_node = self.node_from_index(parent)
+        if column != 0 or not 0 <= row < len(parent_node.children):
+            return QModelIndex()
+        return self.createIndex(row, 0, parent_node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.index_of(index.internalPointer().parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        return len(self.node_from_index(parent).children)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self.node_from_index(parent)
+        if not node.is_dir:
+            return False
+        if node.fetched:
+            return bool(node.children)
+        listing = self._listings.get(pathUtils.normalize_path(node.listing_path)) if node.listing_path else None
+        if listing is not None:
+            return bool(listing[0] or listing[1])
+        return node.listing_path is not None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        node = self.node_from_index(parent)
+        return node.is_dir and not node.fetched
+
+    def fetchMore(self, parent=QModelIndex()):
+        node = self.node_from_index(parent)
+        if not node.is_dir or node.fetched:
+            return
+        node.fetched = True
+        if node.listing_path is None:
+            return
+        listing = self._listings.get(pathUtils.normalize_path(node.listing_path))
+        if listing is None and pathUtils.normalize_path(node.listing_path) in self._scan_only:
+            # Filled in once scanned
+            return
+        if listing is None:
+            dirs, files = self.list_dir(node.listing_path)
+            if dirs is None:
+                return
+            listing = (dirs, files)
+            self._listings[pathUtils.normalize_path(node.listing_path)] = listing
+            self._search_index_dirty = True
+            self.listings_version += 1
+        children = self._create_children(node, *listing)
+        if not children:
+            return
+        self.beginInsertRows(parent, 0, len(children) - 1)
+        node.children = children
+        for child in children:
+            self._register(child)
+        self.endInsertRows()
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if role == Qt.DisplayRole:
+            return node.name
+        elif role == Qt.DecorationRole:
+            if node.busy:
+                return self._icons['busy']
+            return self._icons['dir'] if node.is_dir else self._icons['script']
+        elif role == Qt.UserRole:
+            return node.path
+        elif role == Qt.ToolTipRole:
+            if node.busy:
+                return 'Scanning..'
+            script_metadata = None if node.is_dir else self._metadata.get(pathUtils.normalize_path(node.path))
+            description = scriptMetadata.summary(script_metadata) if script_metadata else ''
+            return '{}\n\n{}'.format(node.path, description) if description else node.path
+        return None
+
+    # Internals
+
+    def _create_children(self, node, dirs, files):
+        """Creates the child nodes of a listing. Directories first, then scripts
+
+        Returns:
+            list: TreeNode list
+        """
+        children = [TreeNode(name, dir_path, True, parent=node) for name, dir_path in dirs]
+        children.extend(TreeNode(file[0:-3], os.path.join(node.listing_path, file), False, parent=node) for file in files)
+        for row, child in enumerate(children):
+            child.row = row
+        return children
+
+    def _apply_listing(self, node, dirs, files):
+        """Inserts and removes the children of a fetched node to match a new listing"""
+        wanted = self._create_children(node, dirs, files)
+        wanted_keys = set(child.key for child in wanted)
+        parent_index = self.index_of(node)
+
+        # Removed children
+        for row in reversed(range(len(node.children))):
+            child = node.children[row]
+            if child.key not in wanted_keys:
+                self.beginRemoveRows(parent_index, row, row)
+                del node.children[row]
+                self._unregister(child)
+                self._renumber(node, row)
+                self.endRemoveRows()
+
+        # Added children, both lists share the same order
+        for row, child in enumerate(wanted):
+            if row < len(node.children) and node.children[row].key == child.key:
+                continue
+            self.beginInsertRows(parent_index, row, row)
+            node.children.insert(row, child)
+            self._register(child)
+            self._renumber(node, row)
+            self.endInsertRows()
+
+    @staticmethod
+    def _renumber(node, start):
+        """Updates the row of the children of a node, from a row on"""
+        for row in range(start, len(node.children)):
+            node.children[row].row = row
+
+    def _register(self, node):
+        """Registers a node by path, by listing path for directories"""
+        if node.listing_path:
+            self._nodes[pathUtils.normalize_path(node.listing_path)] = node
+
+    def _unregister(self, node):
+        """Unregisters a node and its descendants"""
+        if node.listing_path and self._nodes.get(pathUtils.normalize_path(node.listing_path)) is node:
+            del self._nodes[pathUtils.normalize_path(node.listing_path)]
+        for child in node.children:
+            self._unregister(child)
+
+
+# ______________________________________________________________________________________________________________________
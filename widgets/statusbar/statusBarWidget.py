@@ -13,11 +13,11 @@ from qtpy.QtWidgets import *
 from qtpy.QtGui import *
 from qtpy.QtCore import *
 from pygments import styles as editor_styles
-import qtawesome
 
 # Local Imports
 from sharedtoolbox import configs, style, event_handler
 from sharedtoolbox.widgets.base import *
+from sharedtoolbox.utils import iconCache
 
 # ______________________________________________________________________________________________________________________
 
@@ -41,10 +41,10 @@ class StatusBarWidget(QFrame):
         self.cb_editor_theme.setFixedWidth(100)
         self.cb_editor_theme.view().setFixedWidth(150)
         self.btn_toggle_smart_editor = QPushButton(objectName='toggleable', fixedSize=QSize(20, 20), toolTip='Toggle Smart Editor',
-                                              icon=qtawesome.icon('fa5s.lightbulb', color='#ffffff'))
+                                              icon=iconCache.icon('fa5s.lightbulb', color='#ffffff'))
         self.btn_toggle_smart_editor.setCheckable(True)
         self.btn_toggle_console = QPushButton(objectName='toggleable', fixedSize=QSize(20, 20), toolTip='Toggle Console',
-                                              icon=qtawesome.icon('mdi.console-line', color='#ffffff'))
+                                              icon=iconCache.icon('mdi.console-line', color='#ffffff'))
         self.btn_toggle_console.setCheckable(True)
 
         # Layout
@@ -72,7 +72,7 @@ class StatusBarWidget(QFrame):
         self.btn_toggle_console.toggled.connect(event_handler.console_toggled.emit)
         self.btn_toggle_console.toggled.connect(partial(setattr, configs.Prefs, 'console_toggled'))
         event_handler.file_opened.connect(self._on_current_file_changed)
-        event_handler.file_state_changed.connect(self._on_file_state_changed)
+        event_handler.file_state_changed.connect(self._on_file_state_changed, throttle_ms=100)
 
     def init(self):
         """Init the status bar widget"""